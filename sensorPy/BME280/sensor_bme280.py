@@ -1,31 +1,148 @@
+import time
 from sensor import Sensor
+from sensor_i2c import i2cBuses
 from sensor_measurements import Temperature, RelativeHumidity, Pressure, Altitude
-from adafruit_bme280 import basic as adafruit_bme280
-import board
 
+MODE_SLEEP = 0x00
+MODE_FORCED = 0x01
+MODE_NORMAL = 0x03
+REGISTER_STATUS = 0xF3
+REGISTER_DATA = 0xF7
+# ctrl_meas/ctrl_hum code of each oversampling factor
+OVERSAMPLING_CODES = {0: 0, 1: 1, 2: 2, 4: 3, 8: 4, 16: 5}
 
 
 class BME280(Sensor):
-    def __init__(self, pin = board.I2C(), address = 0x76):
-        super().__init__() 
-        self.device = adafruit_bme280.Adafruit_BME280_I2C(pin, address=address)
+    def __init__(self, pin = None, address = 0x76, forcedMode: bool = True,
+                 temperatureOversampling: int = 1, pressureOversampling: int = 16, humidityOversampling: int = 1):
+        super().__init__()
+        self.pin = pin
+        self.address = address
+        self.bus = None
         self.name = "BME280"
+        self.minSamplingPeriod = 0.05
         self.temperature = Temperature()
         self.relativeHumidity = RelativeHumidity()
         self.pressure = Pressure()
         self.altitude = Altitude()
         self.measurements = [self.temperature, self.relativeHumidity, self.pressure, self.altitude]
         self.sea_level_pressure = 1013.25
-        self.device.sea_level_pressure = self.sea_level_pressure
+        self.forcedMode = forcedMode
+        self.oversampling = {}
+        self.setOversampling(temperatureOversampling, pressureOversampling, humidityOversampling)
+
+    def _createDevice(self):
+        from adafruit_bme280 import basic as adafruit_bme280
+        self.bus = i2cBuses.getBus(self.pin)
+        with self.bus.transaction(self.address) as i2c:
+            device = adafruit_bme280.Adafruit_BME280_I2C(i2c, address=self.address)
+            device.sea_level_pressure = self.sea_level_pressure
+            self._configure(device)
+        return device
+
+    def _configure(self, device) -> None:
+        if not hasattr(device, "_write_ctrl_meas"):
+            return
+        device.overscan_temperature = OVERSAMPLING_CODES[self.oversampling["temperature"]]
+        device.overscan_pressure = OVERSAMPLING_CODES[self.oversampling["pressure"]]
+        device.overscan_humidity = OVERSAMPLING_CODES[self.oversampling["humidity"]]
+        # The mode setter rewrites ctrl_hum and ctrl_meas
+        device.mode = MODE_SLEEP if self.forcedMode else MODE_NORMAL
+
+    def setOversampling(self, temperature: int = 1, pressure: int = 16, humidity: int = 1) -> None:
+        """Oversampling factors (0 skips the channel, else 1..16): higher is less noisy but slower."""
+        for name, factor in (("temperature", temperature), ("pressure", pressure), ("humidity", humidity)):
+            if factor not in OVERSAMPLING_CODES:
+                raise ValueError(f"Invalid {name} oversampling {factor}, use one of {sorted(OVERSAMPLING_CODES)}")
+            self.oversampling[name] = factor
+        self.minSamplingPeriod = max(0.05, self.getMeasurementTime())
+        self._reconfigure()
+
+    def setForcedMode(self, forcedMode: bool) -> None:
+        """Forced mode converts once per read and sleeps in between; normal mode converts continuously."""
+        self.forcedMode = forcedMode
+        self._reconfigure()
+
+    def getMeasurementTime(self) -> float:
+        """Datasheet maximum conversion time of one forced measurement [s]."""
+        temperature, pressure, humidity = (self.oversampling[name] for name in ("temperature", "pressure", "humidity"))
+        milliseconds = 1.25 + 2.3 * temperature
+        if pressure:
+            milliseconds += 2.3 * pressure + 0.575
+        if humidity:
+            milliseconds += 2.3 * humidity + 0.575
+        return milliseconds / 1000
+
+    def _reconfigure(self) -> None:
+        if self._device is not None:
+            with self.bus.transaction(self.address):
+                self._configure(self._device)
 
     def _measure(self) -> None:
+        device = self.device
+        if not hasattr(device, "_read_register"):
+            with self.bus.transaction(self.address):
+                return [
+                    round(device.temperature, 2),
+                    round(device.humidity, 2),
+                    round(device.pressure, 2),
+                    round(device.altitude, 2)
+                ]
+        if self.forcedMode:
+            with self.bus.transaction(self.address):
+                device.mode = MODE_FORCED
+            # The bus is free for other devices while the conversion runs
+            time.sleep(self.getMeasurementTime())
+        with self.bus.transaction(self.address):
+            if self.forcedMode:
+                while device._read_register(REGISTER_STATUS, 1)[0] & 0x08:
+                    time.sleep(0.001)
+            data = device._read_register(REGISTER_DATA, 8)
+        temperature, humidity, pressure = compensate(data, device._temp_calib, device._pressure_calib, device._humidity_calib)
         return [
-            round(self.device.temperature, 2),
-            round(self.device.humidity, 2),
-            round(self.device.pressure, 2),
-            round(self.device.altitude, 2)
+            round(temperature, 2),
+            round(humidity, 2),
+            round(pressure, 2),
+            round(pressureAltitude(pressure, self.sea_level_pressure), 2)
         ]
 
     def setSeaLevelPressure(self, pressure: float) -> None:
         self.sea_level_pressure = pressure
-        self.device.sea_level_pressure = pressure
\ No newline at end of file
+        if self._device is not None:
+            self._device.sea_level_pressure = pressure
+
+def compensate(data: bytes, temperatureCalibration: list, pressureCalibration: list, humidityCalibration: list) -> tuple:
+    """Temperature [°C], humidity [%] and pressure [hPa] from the 8 data registers 0xF7..0xFE,
+    with the floating point compensation of the Bosch reference driver."""
+    rawPressure = (data[0] << 12) | (data[1] << 4) | (data[2] >> 4)
+    rawTemperature = (data[3] << 12) | (data[4] << 4) | (data[5] >> 4)
+    rawHumidity = (data[6] << 8) | data[7]
+
+    t1, t2, t3 = temperatureCalibration
+    var1 = (rawTemperature / 16384.0 - t1 / 1024.0) * t2
+    var2 = (rawTemperature / 131072.0 - t1 / 8192.0) ** 2 * t3
+    tFine = int(var1 + var2)
+    temperature = tFine / 5120.0
+
+    p1, p2, p3, p4, p5, p6, p7, p8, p9 = pressureCalibration
+    var1 = tFine / 2.0 - 64000.0
+    var2 = var1 * var1 * p6 / 32768.0
+    var2 += var1 * p5 * 2.0
+    var2 = var2 / 4.0 + p4 * 65536.0
+    var1 = (p3 * var1 * var1 / 524288.0 + p2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * p1
+    if not var1:
+        raise ArithmeticError("Invalid pressure compensation, check the calibration registers")
+    pressure = ((1048576.0 - rawPressure - var2 / 4096.0) * 6250.0) / var1
+    pressure += (p9 * pressure * pressure / 2147483648.0 + pressure * p8 / 32768.0 + p7) / 16.0
+
+    h1, h2, h3, h4, h5, h6 = humidityCalibration
+    var1 = tFine - 76800.0
+    var3 = rawHumidity - (h4 * 64.0 + (h5 / 16384.0) * var1)
+    var5 = 1.0 + (h3 / 67108864.0) * var1
+    var6 = var3 * (h2 / 65536.0) * (var5 * (1.0 + (h6 / 67108864.0) * var1 * var5))
+    humidity = min(max(var6 * (1.0 - h1 * var6 / 524288.0), 0.0), 100.0)
+    return temperature, humidity, pressure / 100
+
+def pressureAltitude(pressure: float, seaLevelPressure: float) -> float:
+    return 44330 * (1.0 - (pressure / seaLevelPressure) ** 0.1903)
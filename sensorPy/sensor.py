@@ -1,60 +1,304 @@
 from abc import ABC, abstractmethod
-from sensor_measurements import Temperature, RelativeHumidity, Pressure
+from sensor_measurements import Temperature, RelativeHumidity, Pressure, MeasurementType, Psychrometrics
 from sensor_units import UnitType
-from sensor_utility import Colour, SensorIO
+from sensor_utility import Colour, SensorIO, CSVSink
+from sensor_scheduler import DeadlineClock
+from sensor_storage import BinarySink
+from sensor_instrumentation import SensorInstrumentation
+from sensor_retry import BurstReport
+from sensor_rollup import RollupEngine
+from sensor_pipeline import Reading
+from sensor_deadband import DeadbandFilter
+import asyncio
 import time
 
 class Sensor(ABC):
     def __init__(self):
-        self.device = None
+        self._device = None
         self.name = ""
         self.colour = Colour.GREEN
         self.measurements = []
+        # Shortest time the device needs between two reads [s]
+        self.minSamplingPeriod = 0.0
+        self.clock = DeadlineClock()
+        self.instrumentation = SensorInstrumentation()
+        self.retryPolicy = None
+        self.lastBurstReport = None
+        self.rollups = None
+        self.lastReading = None
+        self.listeners = []
+        self.sinks = []
+        self.exportFilter = None
+        self.psychrometrics = None
+
+    @property
+    def device(self):
+        """The driver object, built by _createDevice on first use so a missing bus or driver only affects this sensor's reads."""
+        if self._device is None:
+            self._device = self._createDevice()
+        return self._device
+
+    @device.setter
+    def device(self, device) -> None:
+        self._device = device
+
+    def _now(self) -> float:
+        """Timestamp of the current read and export; replayed sensors return the recorded time."""
+        return time.time()
+
+    def _createDevice(self):
+        raise RuntimeError(f"Sensor {self.name} has no device")
+
+    @staticmethod
+    def resolvePin(pin):
+        """Accept board pins or their names ("D21") so callers need not import board themselves."""
+        if isinstance(pin, str):
+            import board
+            return getattr(board, pin)
+        return pin
 
     def measure(self, unitType: UnitType = None, burstNum: int = 1, burstInterval: float = 2.0,
                 burstDelay: float = 30, printArray: bool = False,
-                consolePrint: bool = True, useSymbol: bool = False, exportToCSV: bool = False, csvPath: str = None) -> None:
+                consolePrint: bool = True, useSymbol: bool = False, exportToCSV: bool = False, csvPath: str = None,
+                exportToBinary: bool = False, binaryPath: str = None) -> None:
         self._checkMeasureInput(burstNum, burstInterval, burstDelay)
-        if consolePrint: 
+        if consolePrint:
             SensorIO.printTitle(self.name, self.colour)
         isBurst = burstNum > 1
-        for i in range(burstNum):
+        for measurement in self.measurements:
+            measurement.reserveBurst(burstNum)
+        self.clock.begin()
+        report, failures, start = BurstReport(burstNum), 0, time.monotonic()
+        while True:
+            failures = self._burstRead(report, failures, isBurst)
+            step = self._nextBurstStep(report, failures, burstInterval, time.monotonic() - start)
+            if step == "done":
+                break
+            if step == "retry":
+                time.sleep(self.retryPolicy.getRetryDelay(failures, self.minSamplingPeriod))
+                self.clock.restart()
+            else:
+                self.clock.wait(burstInterval)
+        self._finishBurst(report, start)
+        self._report(unitType, isBurst, printArray, consolePrint, useSymbol, exportToCSV, csvPath, exportToBinary, binaryPath)
+        self.clock.wait(burstDelay)
+
+    async def measureAsync(self, unitType: UnitType = None, burstNum: int = 1, burstInterval: float = 2.0,
+                           burstDelay: float = 30, printArray: bool = False,
+                           consolePrint: bool = True, useSymbol: bool = False, exportToCSV: bool = False, csvPath: str = None,
+                           exportToBinary: bool = False, binaryPath: str = None, executor = None) -> None:
+        """Coroutine version of measure. Device reads run in the executor so other sensors keep going."""
+        self._checkMeasureInput(burstNum, burstInterval, burstDelay)
+        loop = asyncio.get_running_loop()
+        isBurst = burstNum > 1
+        for measurement in self.measurements:
+            measurement.reserveBurst(burstNum)
+        self.clock.begin()
+        report, failures, start = BurstReport(burstNum), 0, time.monotonic()
+        while True:
+            failures = await loop.run_in_executor(executor, self._burstRead, report, failures, isBurst)
+            step = self._nextBurstStep(report, failures, burstInterval, time.monotonic() - start)
+            if step == "done":
+                break
+            if step == "retry":
+                await asyncio.sleep(self.retryPolicy.getRetryDelay(failures, self.minSamplingPeriod))
+                self.clock.restart()
+            else:
+                await self.clock.waitAsync(burstInterval)
+        self._finishBurst(report, start)
+        # The title is printed with the values so concurrent sensors do not interleave their output
+        if consolePrint:
+            SensorIO.printTitle(self.name, self.colour)
+        self._report(unitType, isBurst, printArray, consolePrint, useSymbol, exportToCSV, csvPath, exportToBinary, binaryPath)
+        await self.clock.waitAsync(burstDelay)
+
+    def sample(self) -> bool:
+        """Take a single reading into the measurements' current values."""
+        return self._acquire(False)
+
+    def stream(self, interval: float = None, count: int = None):
+        """Yield a Reading for every good read, one read per interval (at least minSamplingPeriod) on
+        absolute deadlines. Failed reads are skipped. Runs forever unless count readings are requested."""
+        interval = max(interval or 0.0, self.minSamplingPeriod)
+        self.clock.begin()
+        taken = 0
+        while count is None or taken < count:
+            if self._acquire(False):
+                taken += 1
+                yield self.lastReading
+            if count is None or taken < count:
+                self.clock.wait(interval)
+
+    def addListener(self, listener) -> None:
+        """Call listener(reading) after every good read, whichever path (measure, stream, scheduler) took it."""
+        self.listeners.append(listener)
+
+    def removeListener(self, listener) -> None:
+        self.listeners.remove(listener)
+
+    def getInstrumentation(self) -> dict:
+        """Snapshot of read counts, read latency, time per phase and cycle jitter."""
+        snapshot = {"sensor": self.name, **self.instrumentation.snapshot(), "cycleTiming": self.clock.getStatistics()}
+        if self.exportFilter is not None:
+            snapshot["exports"] = self.exportFilter.getStatistics()
+        return snapshot
+
+    @abstractmethod
+    def _measure(self, isBurst: bool) -> list:
+        pass
+
+    def _acquire(self, isBurst: bool) -> bool:
+        start = time.perf_counter()
+        try:
+            temp_measurements = self._measure()
+            if any(value is None for value in temp_measurements):
+                self.instrumentation.recordRead(time.perf_counter() - start, isNone=True)
+                return False
+            self.instrumentation.recordRead(time.perf_counter() - start)
+            timestamp = self._now()
+            for measurement, value in zip(self.measurements, temp_measurements):
+                measurement.setValue(value, isBurst, timestamp)
+            reading = Reading(timestamp, self.name, tuple(measurement.getType() for measurement in self.measurements),
+                              tuple(temp_measurements), tuple(measurement.getUnit().getType() for measurement in self.measurements))
+            self.lastReading = reading
+        except RuntimeError as error:
+            self.instrumentation.recordRead(time.perf_counter() - start, error)
+            SensorIO.printError(f"Runtime Error reading from sensor {self.name}: {error}")
+            return False
+        except Exception as error:
+           self.instrumentation.recordRead(time.perf_counter() - start, error)
+           SensorIO.printError(f"Unexpected error from sensor {self.name}: {error}")
+           return False
+        if self.rollups is not None:
+            try:
+                self.rollups.addSample(reading.timestamp, reading.getSymbols(), reading.values)
+            except OSError as error:
+                SensorIO.printError(f"Could not update the rollups of sensor {self.name}: {error}")
+        self._notifyListeners(reading)
+        return True
+
+    def _notifyListeners(self, reading: Reading) -> None:
+        """A failing consumer is reported but never turns the good read into a failed one."""
+        for listener in self.listeners:
             try:
-                temp_measurements = self._measure()
-                if all(value is not None for value in temp_measurements):
-                    for i, measurement in enumerate(self.measurements):
-                        measurement.setValue(temp_measurements[i], isBurst)
-            except RuntimeError as error:
-                SensorIO.printError(f"Runtime Error reading from sensor {self.name}: {error}")
+                listener(reading)
             except Exception as error:
-               SensorIO.printError(f"Unexpected error from sensor {self.name}: {error}")
-            if isBurst and i < burstNum - 1:
-                time.sleep(burstInterval)
+                SensorIO.printError(f"Listener of sensor {self.name} failed: {error}")
+
+    def addSink(self, sink) -> None:
+        """Export every measure cycle to sink (a SensorSink) in addition to the exportTo* flags."""
+        self.sinks.append(sink)
+
+    def removeSink(self, sink) -> None:
+        self.sinks.remove(sink)
+
+    def enableRollups(self, path: str = None, tiers: tuple = None) -> RollupEngine:
+        """Maintain minute/hour/day aggregates of every good read, persisted next to the raw data.
+        Calling it again with the same path and tiers keeps the running engine; otherwise the old one is closed."""
+        engine = RollupEngine(self.name, path, tiers)
+        if self.rollups is not None:
+            if (self.rollups.path, self.rollups.getTiers()) == (engine.path, engine.getTiers()):
+                engine.close()
+                return self.rollups
+            self.rollups.close()
+        self.rollups = engine
+        return self.rollups
+
+    def setExportDeadband(self, deadbands: dict = None, maxSilence: float = 900.0) -> DeadbandFilter:
+        """Only export a cycle when a value moved by its deadband (MeasurementType.getDeadband() unless
+        overridden in deadbands) or maxSilence seconds passed since the last exported row."""
+        self.exportFilter = DeadbandFilter(deadbands, maxSilence)
+        return self.exportFilter
+
+    def enablePsychrometrics(self) -> Psychrometrics:
+        """Derive dew point, heat index, absolute humidity and vapour-pressure deficit from the Temperature
+        and RelativeHumidity channels every measure cycle; they are printed and exported like native channels.
+        Files already written today keep their columns, the extra ones go to a new CSV segment / binary schema."""
+        channels = {measurement.getType(): measurement for measurement in self.measurements}
+        if MeasurementType.Temperature not in channels or MeasurementType.RelativeHumidity not in channels:
+            raise ValueError(f"Sensor {self.name} does not measure temperature and relative humidity")
+        self.psychrometrics = Psychrometrics(channels[MeasurementType.Temperature], channels[MeasurementType.RelativeHumidity])
+        return self.psychrometrics
+
+    def getChannels(self) -> list:
+        """Measured channels followed by the derived ones."""
+        if self.psychrometrics is None:
+            return self.measurements
+        return self.measurements + self.psychrometrics.measurements
+
+    def setRetryPolicy(self, retryPolicy) -> None:
+        """With a RetryPolicy a burst keeps reading until it holds burstNum good samples or runs out of time."""
+        self.retryPolicy = retryPolicy
+
+    def _burstRead(self, report: BurstReport, failures: int, isBurst: bool) -> int:
+        """One read of a burst. Returns the updated count of consecutive failures."""
+        report.attempts += 1
+        if self._acquire(isBurst):
+            report.good += 1
+            return 0
+        return failures + 1
+
+    def _nextBurstStep(self, report: BurstReport, failures: int, burstInterval: float, elapsed: float) -> str:
+        if self.retryPolicy is None:
+            # Without a policy a failed read simply uses up its slot
+            return "done" if report.attempts >= report.requested else "next"
+        if report.isComplete():
+            return "done"
+        if report.attempts >= report.requested and elapsed >= self.retryPolicy.getTimeBudget(report.requested, burstInterval):
+            return "done"
+        return "retry" if failures > 0 else "next"
+
+    def _finishBurst(self, report: BurstReport, start: float) -> None:
+        report.wallClock = time.monotonic() - start
+        self.lastBurstReport = report
+        self.instrumentation.recordBurst(report)
+
+    def _report(self, unitType: UnitType, isBurst: bool, printArray: bool, consolePrint: bool,
+                useSymbol: bool, exportToCSV: bool, csvPath: str, exportToBinary: bool = False, binaryPath: str = None) -> None:
+        start = time.perf_counter()
+        if self.psychrometrics is not None:
+            self.psychrometrics.update(isBurst)
+        channels = self.getChannels()
+        reduced = None
+        if isBurst:
+            # Burst reads only fill the burst buffers; the cycle's reduced value becomes the current value.
+            # It is reduced once here and reused for printing and export.
+            reduced = [measurement.getReducedBurstValue() for measurement in channels]
+            for measurement, value in zip(channels, reduced):
+                if len(measurement.burst):
+                    measurement.value = value
         if consolePrint:
-            for measurement in self.measurements:
+            for i, measurement in enumerate(channels):
                 if isBurst:
-                    measurement.printBurstValues(unitType, useSymbol, printArray)
+                    measurement.printBurstValues(unitType, useSymbol, printArray, reduced[i])
                 else:
                     measurement.printValue(unitType, useSymbol)
+            if self.retryPolicy is not None and self.lastBurstReport is not None:
+                report = self.lastBurstReport
+                SensorIO.printMessage(f"{report.good}/{report.requested} samples in {report.attempts} reads "
+                                      f"({report.getSuccessRate():.0%}), {report.wallClock:.1f} s", Colour.DARK_GREY)
             print("")
+        exportStart = time.perf_counter()
+        sinks = list(self.sinks)
         if exportToCSV:
-            self._exportSensorDataToCSV(isBurst, csvPath)
+            sinks.append(CSVSink(csvPath))
+        if exportToBinary:
+            sinks.append(BinarySink(binaryPath))
+        if sinks:
+            self._exportSensorData(isBurst, sinks, reduced)
+        self.instrumentation.recordPhase("console", exportStart - start)
+        self.instrumentation.recordPhase("export", time.perf_counter() - exportStart)
+        self.instrumentation.recordCycle()
 
-        for measurement in self.measurements:
+        for measurement in self.getChannels():
                 measurement.resetBurstValues()
-        time.sleep(burstDelay)
-        
 
-    @abstractmethod
-    def _measure(self, isBurst: bool) -> list:
-        pass
-        
     def _checkMeasureInput(self, burstNum: int, burstInterval: float, burstDelay: float) -> None:
         errors = []
         if burstNum < 1:
             errors.append("burstNum must be greater than 0")
-        if burstInterval < 1:
-            errors.append("burstInterval must be greater than or equal to 1")
+        if burstNum > 1 and burstInterval < self.minSamplingPeriod:
+            errors.append(f"burstInterval must be greater than or equal to {self.minSamplingPeriod} for {self.name}")
         if burstDelay < 0:
             errors.append("burstDelay must be greater than or equal to 0")
         if errors:
@@ -62,14 +306,30 @@ class Sensor(ABC):
                 SensorIO().printError(f"ERROR: {error}")
             raise ValueError("Invalid input parameters")
 
-    def _exportSensorDataToCSV(self, isBurst: bool,  path: str = None) -> None:
+    def _exportSensorData(self, isBurst: bool, sinks: list, reduced: list = None) -> None:
+        names, data, units = self._collectSensorData(isBurst, reduced)
+        timestamp = self._now()
+        if self.exportFilter is not None:
+            types = [measurement.getType() for measurement in self.getChannels()]
+            if not self.exportFilter.accept(types, data[:len(types)], timestamp):
+                return
+        for sink in sinks:
+            sink.write(self.name, names, data, units, timestamp)
+
+    def _collectSensorData(self, isBurst: bool, reduced: list = None) -> tuple:
+        """reduced holds the burst values _report already reduced, one per channel."""
         names, data, units = [], [], []
-        for measurement in self.measurements:
+        for i, measurement in enumerate(self.getChannels()):
             names.append(measurement.getType().getSymbol())
             if isBurst:
-                data.append(measurement.getAverageBurstValue())
+                data.append(reduced[i] if reduced is not None else measurement.getReducedBurstValue())
             else:
-                data.append(measurement.getValue())
+                data.append(measurement.getValue()[0])
             units.append(measurement.getUnit().getSymbol())
-        print(names, data, units)
-        SensorIO.exportToCSV(self.name, names, data, units, path)
\ No newline at end of file
+        if isBurst and any(measurement.isRobust() for measurement in self.measurements):
+            # One extra column per measurement with the number of burst samples left out of the value
+            for measurement in self.measurements:
+                names.append(f"{measurement.getType().getSymbol()}_rejected")
+                data.append(measurement.rejectedCount)
+                units.append("n")
+        return names, data, units
\ No newline at end of file
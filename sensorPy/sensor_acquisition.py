@@ -0,0 +1,44 @@
+import asyncio
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sensor import Sensor
+from sensor_storage import BinaryStorage
+from sensor_utility import CSVWriter
+
+async def measureAll(sensors: list, executor = None, **measureArgs) -> None:
+    """Run one measure cycle on every sensor at once. The cycle takes as long as the slowest sensor."""
+    await asyncio.gather(*(sensor.measureAsync(executor=executor, **measureArgs) for sensor in sensors))
+
+async def acquisitionLoop(sensors: list, cycles: int = None, **measureArgs) -> None:
+    """Drive every sensor concurrently, each on its own burst/delay timing, for a number of cycles (forever if None)."""
+    sensors = list(sensors)
+    # One worker per sensor so a slow blocking read never queues behind another sensor's read
+    with ThreadPoolExecutor(max_workers=max(1, len(sensors)), thread_name_prefix="sensor") as executor:
+        await asyncio.gather(*(_sensorLoop(sensor, cycles, executor, measureArgs) for sensor in sensors))
+
+async def _sensorLoop(sensor: Sensor, cycles: int, executor, measureArgs: dict) -> None:
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        await sensor.measureAsync(executor=executor, **measureArgs)
+        cycle += 1
+
+def runConcurrently(sensors: list, cycles: int = None, **measureArgs) -> None:
+    """Blocking entry point: runs acquisitionLoop on a fresh event loop. SIGTERM (systemctl stop, docker stop)
+    ends the run like Ctrl+C and the open files are closed on the way out, which atexit alone does not do on a signal."""
+    isMainThread = threading.current_thread() is threading.main_thread()
+    if isMainThread:
+        previousHandler = signal.signal(signal.SIGTERM, _terminate)
+    try:
+        asyncio.run(acquisitionLoop(sensors, cycles, **measureArgs))
+    finally:
+        if isMainThread:
+            signal.signal(signal.SIGTERM, previousHandler)
+        _closeWriters()
+
+def _terminate(signum, frame) -> None:
+    raise SystemExit(128 + signum)
+
+def _closeWriters() -> None:
+    CSVWriter.closeAll()
+    BinaryStorage.closeAll()
\ No newline at end of file
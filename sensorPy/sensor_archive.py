@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import struct
+import time
+import zlib
+import numpy as np
+
+MAGIC = b"SPYZ"
+VERSION = 1
+PREAMBLE = struct.Struct("<4sBI")
+BLOCK_ROWS = 4096
+
+def archivePath(path: str, sensorName: str, day: str, segment: int = 1) -> str:
+    return os.path.join(path, f"{sensorName}_{day}.spz" if segment == 1 else f"{sensorName}_{day}_{segment}.spz")
+
+def readDailyCSV(filePath: str) -> tuple:
+    """Parse a daily CSV into (seconds since midnight, values, names, units, decimals per column)."""
+    with open(filePath) as file:
+        columns = [column.rstrip("]").split("[") for column in file.readline().rstrip("\n").split(",")[1:]]
+        names, units = [name for name, _ in columns], [unit for _, unit in columns]
+        seconds, rows, decimals = [], [], [0] * len(columns)
+        for line in file:
+            fields = line.rstrip("\n").split(",")
+            if len(fields) != len(columns) + 1 or len(fields[0]) != 8:
+                # Torn last row of a crashed run
+                continue
+            try:
+                row = [float(field) for field in fields[1:]]
+            except ValueError:
+                continue
+            for i, field in enumerate(fields[1:]):
+                point = field.find(".")
+                if point >= 0 and len(field) - point - 1 > decimals[i]:
+                    decimals[i] = len(field) - point - 1
+            seconds.append(int(fields[0][0:2]) * 3600 + int(fields[0][3:5]) * 60 + int(fields[0][6:8]))
+            rows.append(row)
+    values = np.array(rows, dtype=np.float64).reshape(-1, len(columns))
+    return np.array(seconds, dtype=np.int64), values, names, units, [min(decimal, 6) for decimal in decimals]
+
+def writeArchive(filePath: str, sensorName: str, day: str, seconds: np.ndarray, values: np.ndarray,
+                 names: list, units: list, decimals: list) -> int:
+    """Write a compressed archive: per block of rows, zlib over the delta-encoded seconds since midnight
+    followed by each column's delta-encoded values scaled to integers. Returns the file size."""
+    scaled = np.rint(values * np.power(10.0, decimals)).astype(np.int64)
+    columns = []
+    for i, (name, unit, decimal) in enumerate(zip(names, units, decimals)):
+        column = scaled[:, i]
+        deltas = np.diff(column, prepend=0)
+        fits = len(deltas) == 0 or np.abs(deltas).max() < 2 ** 31
+        columns.append({"name": name, "unit": unit, "decimals": decimal, "dtype": "<i4" if fits else "<i8"})
+    blocks, payloads, offset = [], [], 0
+    for first in range(0, len(seconds), BLOCK_ROWS):
+        last = min(first + BLOCK_ROWS, len(seconds))
+        parts = [np.diff(seconds[first:last], prepend=0).astype("<i4").tobytes()]
+        for i, column in enumerate(columns):
+            parts.append(np.diff(scaled[first:last, i], prepend=0).astype(column["dtype"]).tobytes())
+        payload = zlib.compress(b"".join(parts), 9)
+        blocks.append({"offset": offset, "size": len(payload), "rows": last - first,
+                       "first": int(seconds[first]), "last": int(seconds[last - 1])})
+        payloads.append(payload)
+        offset += len(payload)
+    header = json.dumps({"sensor": sensorName, "day": day, "rows": len(seconds), "columns": columns,
+                         "blocks": blocks}).encode()
+    temporaryPath = filePath + ".tmp"
+    with open(temporaryPath, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for payload in payloads:
+            file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporaryPath, filePath)
+    return os.path.getsize(filePath)
+
+class ArchiveReader:
+    """Reads a .spz archive one block at a time, decompressing only the blocks a range query touches."""
+    def __init__(self, filePath: str):
+        self.filePath = filePath
+        with open(filePath, 'rb') as file:
+            magic, version, headerLength = PREAMBLE.unpack(file.read(PREAMBLE.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{filePath} is not a sensorPy archive")
+            self.header = json.loads(file.read(headerLength))
+        self.dataStart = PREAMBLE.size + headerLength
+        self.day = self.header["day"]
+        self.midnight = dayStart(self.day)
+        self.names = [column["name"] for column in self.header["columns"]]
+        self.units = [column["unit"] for column in self.header["columns"]]
+
+    def getRange(self) -> tuple:
+        blocks = self.header["blocks"]
+        if not blocks:
+            return None, None
+        return self.midnight + blocks[0]["first"], self.midnight + blocks[-1]["last"]
+
+    def iterBlocks(self, start: float = None, end: float = None):
+        """Yield (timestamps, values) per block overlapping [start, end); values has one column per measurement."""
+        with open(self.filePath, 'rb') as file:
+            for block in self.header["blocks"]:
+                if (start is not None and self.midnight + block["last"] < start) or \
+                   (end is not None and self.midnight + block["first"] >= end):
+                    continue
+                file.seek(self.dataStart + block["offset"])
+                yield self._decode(zlib.decompress(file.read(block["size"])), block["rows"])
+
+    def _decode(self, payload: bytes, rows: int) -> tuple:
+        offset = rows * 4
+        timestamps = self.midnight + np.cumsum(np.frombuffer(payload, dtype="<i4", count=rows), dtype=np.int64)
+        values = np.empty((rows, len(self.names)), dtype=np.float64)
+        for i, column in enumerate(self.header["columns"]):
+            dtype = np.dtype(column["dtype"])
+            deltas = np.frombuffer(payload, dtype=dtype, count=rows, offset=offset)
+            values[:, i] = np.cumsum(deltas, dtype=np.int64) / 10.0 ** column["decimals"]
+            offset += rows * dtype.itemsize
+        return timestamps.astype(np.float64), values
+
+    def query(self, measurementName: str = None, start: float = None, end: float = None) -> tuple:
+        """Return (timestamps, values) in [start, end): one column if measurementName is given, else all."""
+        timestamps, values = [], []
+        for blockTimes, blockValues in self.iterBlocks(start, end):
+            mask = np.ones(len(blockTimes), dtype=bool)
+            if start is not None:
+                mask &= blockTimes >= start
+            if end is not None:
+                mask &= blockTimes < end
+            timestamps.append(blockTimes[mask])
+            values.append(blockValues[mask])
+        timestamps = np.concatenate(timestamps) if timestamps else np.empty(0, dtype=np.float64)
+        values = np.concatenate(values) if values else np.empty((0, len(self.names)), dtype=np.float64)
+        if measurementName is None:
+            return timestamps, values
+        if measurementName not in self.names:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+        return timestamps, values[:, self.names.index(measurementName)]
+
+def listArchives(path: str, sensorName: str) -> dict:
+    """(day, segment) -> archive path of every .spz file of the sensor, in order."""
+    pattern = re.compile(rf"^{re.escape(sensorName)}_(\d{{4}}_\d{{2}}_\d{{2}})(?:_(\d+))?\.spz$")
+    if not os.path.isdir(path):
+        return {}
+    archives = {(match.group(1), int(match.group(2) or 1)): os.path.join(path, name) for name in os.listdir(path)
+                for match in [pattern.match(name)] if match}
+    return dict(sorted(archives.items()))
+
+def dayStart(day: str) -> float:
+    return time.mktime(time.strptime(day, "%Y_%m_%d"))
@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from sensor_simulation import installSimulatedHardware
+from sensor_utility import Colour, SensorIO
+
+def benchmark(function, number: int, repeat: int = 5) -> float:
+    """Best-of-repeat time per call [s]; the minimum is the least disturbed by the rest of the system."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def benchmarkMeasureCycle(number: int = 200) -> dict:
+    from DHT22.sensor_dht22 import DHT22
+    import board
+    sensor = DHT22(board.D4)
+    sensor.minSamplingPeriod = 0.0
+    perCycle = benchmark(lambda: sensor.measure(burstNum=5, burstInterval=0, burstDelay=0, consolePrint=False), number)
+    return {"measure cycle (5 reads) [us]": perCycle * 1e6}
+
+def benchmarkMeasurementStatistics(number: int = 10000) -> dict:
+    from sensor_measurements import Temperature
+    temperature = Temperature()
+    temperature.reserveBurst(number)
+    start = time.perf_counter()
+    for i in range(number):
+        temperature.setValue(20.0 + (i % 7) * 0.1, True)
+    perSample = (time.perf_counter() - start) / number
+    perAverage = benchmark(temperature.getAverageBurstValue, 1000)
+    return {"setValue (burst) [us]": perSample * 1e6, "getAverageBurstValue [us]": perAverage * 1e6}
+
+def benchmarkUnitConversion(number: int = 100000) -> dict:
+    from sensor_units import TemperatureUnit, UnitType
+    unit = TemperatureUnit()
+    values = [20.0 + (i % 100) * 0.1 for i in range(number)]
+    scalar = benchmark(lambda: [unit.convert_value(value, UnitType.Fahrenheit) for value in values], 1, 3)
+    vector = benchmark(lambda: unit.convert_array(values, UnitType.Fahrenheit), 1, 3)
+    return {"convert_value [values/s]": number / scalar, "convert_array [values/s]": number / vector}
+
+def benchmarkCSVExport(number: int = 5000) -> dict:
+    from sensor_utility import CSVWriter
+    with tempfile.TemporaryDirectory() as directory:
+        names, data, units = ["T", "RH"], [21.5, 45.25], ["°C", "%"]
+        start = time.perf_counter()
+        for _ in range(number):
+            SensorIO.exportToCSV("Benchmark", names, data, units, directory)
+        CSVWriter.closeAll()
+        elapsed = time.perf_counter() - start
+    return {"exportToCSV [rows/s]": number / elapsed}
+
+def measureImportTime(module: str = "burst_measurements") -> dict:
+    """Cumulative import time [us] of module and each of its top-level dependencies, from python -X importtime."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=directory, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+def checkImportBudget(module: str = "burst_measurements", budget: float = 0.5) -> dict:
+    """Fail when importing module takes longer than budget [s] or loads a hardware driver."""
+    times = measureImportTime(module)
+    elapsed = times.get(module, 0) / 1e6
+    drivers = sorted(name for name in times if name.startswith(("adafruit_", "board")))
+    if elapsed > budget:
+        raise RuntimeError(f"Importing {module} took {elapsed * 1000:.0f} ms, budget is {budget * 1000:.0f} ms")
+    if drivers:
+        raise RuntimeError(f"Importing {module} loaded hardware drivers: {', '.join(drivers)}")
+    return {f"import {module} [ms]": elapsed * 1000}
+
+def runBenchmarks() -> dict:
+    installSimulatedHardware(seed=0)
+    results = checkImportBudget()
+    for suite in (benchmarkMeasureCycle, benchmarkMeasurementStatistics, benchmarkUnitConversion, benchmarkCSVExport):
+        results.update(suite())
+    return results
+
+def main():
+    results = runBenchmarks()
+    SensorIO.printTitle("sensorPy benchmarks", Colour.GREEN)
+    for name, value in results.items():
+        SensorIO.printMessage(f"{name:<36} : {value:>14.2f}", Colour.CYAN)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
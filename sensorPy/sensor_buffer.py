@@ -0,0 +1,107 @@
+from collections import deque
+import math
+import numpy as np
+
+class RingBuffer:
+    """Fixed-capacity float ring with running mean, variance (Welford), min and max, all O(1) per sample."""
+    def __init__(self, capacity: int, statistics: bool = True):
+        if capacity < 1:
+            raise ValueError("capacity must be greater than 0")
+        self.data = np.zeros(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.statistics = statistics
+        self.clear()
+
+    def clear(self) -> None:
+        self.head = 0
+        self.count = 0
+        self.pushed = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Monotonic (index, value) queues: the front is always the window's min / max
+        self.minQueue = deque()
+        self.maxQueue = deque()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, value: float) -> None:
+        value = float(value)
+        if self.count == self.capacity:
+            if self.statistics:
+                self._remove(float(self.data[self.head]))
+        else:
+            self.count += 1
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if not self.statistics:
+            return
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        index = self.pushed
+        self.pushed += 1
+        oldest = self.pushed - self.count
+        while self.minQueue and self.minQueue[-1][1] >= value:
+            self.minQueue.pop()
+        self.minQueue.append((index, value))
+        while self.minQueue[0][0] < oldest:
+            self.minQueue.popleft()
+        while self.maxQueue and self.maxQueue[-1][1] <= value:
+            self.maxQueue.pop()
+        self.maxQueue.append((index, value))
+        while self.maxQueue[0][0] < oldest:
+            self.maxQueue.popleft()
+
+    def _remove(self, value: float) -> None:
+        """Take the evicted sample back out of the running mean and variance."""
+        if self.count == 1:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / (self.count - 1)
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+
+    def reserve(self, capacity: int) -> None:
+        """Grow the buffer to hold at least capacity samples, keeping the current ones."""
+        if capacity <= self.capacity:
+            return
+        values = self.values()
+        self.data = np.zeros(capacity, dtype=np.float64)
+        self.data[:len(values)] = values
+        self.capacity = capacity
+        self.head = len(values) % capacity
+
+    def values(self) -> np.ndarray:
+        """Samples in insertion order. A view unless the window wraps around the end of the array."""
+        start = (self.head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            return self.data[start:start + self.count]
+        return np.concatenate((self.data[start:], self.data[:self.head]))
+
+    def getMean(self) -> float:
+        return self.mean
+
+    def getVariance(self) -> float:
+        """Sample variance of the window (0 with fewer than two samples)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def getStandardDeviation(self) -> float:
+        return math.sqrt(self.getVariance())
+
+    def getMin(self) -> float:
+        return self.minQueue[0][1] if self.count else 0.0
+
+    def getMax(self) -> float:
+        return self.maxQueue[0][1] if self.count else 0.0
+
+    def getStatistics(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.getVariance(),
+            "min": self.getMin(),
+            "max": self.getMax(),
+        }
\ No newline at end of file
@@ -0,0 +1,208 @@
+import argparse
+import json
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from sensor_measurements import MeasurementType
+from sensor_pipeline import Reading
+from sensor_registry import sensorRegistry
+from sensor_scheduler import SamplingScheduler
+from sensor_units import UnitType
+from sensor_utility import Colour, SensorIO
+
+MAGIC = 0x53524E47
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "<u4"), ("version", "<u4"), ("capacity", "<u4"), ("channels", "<u4"),
+                         ("metadataSize", "<u4"), ("padding", "<u4"), ("head", "<u8")])
+HEADER_SIZE = 64
+METADATA_CAPACITY = 4096
+# Segments created by this process, already known to its resource tracker
+_createdSegments = set()
+
+def slotDtype(channels: int) -> np.dtype:
+    return np.dtype([("seq", "<u8"), ("timestamp", "<f8"), ("sensor", "<u4"), ("count", "<u4"),
+                     ("values", "<f8", (channels,))])
+
+class SharedRingWriter:
+    """Single-writer ring of readings in a shared memory segment. Layout: a header holding the sequence
+    counter `head`, a JSON block naming each sensor's channels, then `capacity` fixed-width slots.
+    A slot's seq is cleared while it is rewritten and set to its sequence number last, so readers can
+    detect a torn or overwritten slot without any lock."""
+    def __init__(self, name: str, sensors: list, capacity: int = 4096):
+        self.sensorIndex = {sensor.name: index for index, sensor in enumerate(sensors)}
+        channels = max(len(sensor.measurements) for sensor in sensors)
+        metadata = json.dumps({"sensors": [
+            {"name": sensor.name,
+             "types": [measurement.getType().name for measurement in sensor.measurements],
+             "units": [measurement.getUnit().getType().name for measurement in sensor.measurements]}
+            for sensor in sensors]}).encode()
+        if len(metadata) > METADATA_CAPACITY:
+            raise ValueError(f"Sensor metadata is {len(metadata)} bytes, at most {METADATA_CAPACITY} fit")
+        dtype = slotDtype(channels)
+        self.memory = shared_memory.SharedMemory(name=name, create=True,
+                                                 size=HEADER_SIZE + METADATA_CAPACITY + capacity * dtype.itemsize)
+        _createdSegments.add(self.memory._name)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.memory.buf)
+        self.slots = np.ndarray((capacity,), dtype=dtype, buffer=self.memory.buf, offset=HEADER_SIZE + METADATA_CAPACITY)
+        self.slots["seq"] = 0
+        self.memory.buf[HEADER_SIZE:HEADER_SIZE + len(metadata)] = metadata
+        self.header["capacity"] = capacity
+        self.header["channels"] = channels
+        self.header["metadataSize"] = len(metadata)
+        self.header["head"] = 0
+        self.header["version"] = VERSION
+        # Written last: readers refuse the segment until the layout is complete
+        self.header["magic"] = MAGIC
+
+    def publish(self, reading: Reading) -> int:
+        """Append reading and return its sequence number (1 for the first one)."""
+        seq = int(self.header["head"]) + 1
+        slot = self.slots[(seq - 1) % len(self.slots)]
+        slot["seq"] = 0
+        slot["timestamp"] = reading.timestamp
+        slot["sensor"] = self.sensorIndex[reading.sensorName]
+        slot["count"] = len(reading.values)
+        slot["values"][:len(reading.values)] = reading.values
+        slot["seq"] = seq
+        self.header["head"] = seq
+        return seq
+
+    def close(self) -> None:
+        """Detach and remove the segment; attached readers keep their mapping until they close."""
+        if self.memory is None:
+            return
+        del self.header, self.slots
+        self.memory.close()
+        self.memory.unlink()
+        _createdSegments.discard(self.memory._name)
+        self.memory = None
+
+class SharedRingReader:
+    """Attaches to a SharedRingWriter segment by name. Never writes and never blocks the writer: a reader
+    that falls more than `capacity` readings behind skips ahead and counts what it lost in `dropped`."""
+    def __init__(self, name: str, fromStart: bool = False):
+        self.memory = _attach(name)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.memory.buf)
+        if int(self.header["magic"]) != MAGIC or int(self.header["version"]) != VERSION:
+            self.close()
+            raise ValueError(f"Shared memory segment {name} is not a sensorPy ring")
+        capacity, channels = int(self.header["capacity"]), int(self.header["channels"])
+        self.slots = np.ndarray((capacity,), dtype=slotDtype(channels), buffer=self.memory.buf,
+                                offset=HEADER_SIZE + METADATA_CAPACITY)
+        metadata = json.loads(bytes(self.memory.buf[HEADER_SIZE:HEADER_SIZE + int(self.header["metadataSize"])]))
+        self.sensors = [(entry["name"], tuple(MeasurementType[name] for name in entry["types"]),
+                         tuple(UnitType[name] for name in entry["units"])) for entry in metadata["sensors"]]
+        head = int(self.header["head"])
+        self.next = max(1, head - capacity + 1) if fromStart else head + 1
+        self.dropped = 0
+
+    def getHead(self) -> int:
+        return int(self.header["head"])
+
+    def readSlots(self) -> np.ndarray:
+        """Copy of every slot published since the last call, in sequence order."""
+        head = int(self.header["head"])
+        capacity = len(self.slots)
+        if head - self.next + 1 > capacity:
+            self.dropped += head - self.next + 1 - capacity
+            self.next = head - capacity + 1
+        if self.next > head:
+            return self.slots[:0].copy()
+        indices = np.arange(self.next, head + 1, dtype=np.uint64)
+        records = self.slots[(indices - 1) % capacity]
+        # Slots whose seq changed were overwritten (or half-written) while being copied
+        valid = (records["seq"] == indices) & (self.slots["seq"][(indices - 1) % capacity] == indices)
+        self.dropped += int(len(indices) - np.count_nonzero(valid))
+        self.next = head + 1
+        return records[valid]
+
+    def read(self) -> list:
+        """New readings as Reading tuples, ready for a Pipeline."""
+        readings = []
+        for record in self.readSlots():
+            name, types, units = self.sensors[record["sensor"]]
+            readings.append(Reading(float(record["timestamp"]), name, types,
+                                    tuple(record["values"][:record["count"]].tolist()), units))
+        return readings
+
+    def follow(self, interval: float = 0.1):
+        """Yield readings as they are published, polling every interval seconds."""
+        while True:
+            readings = self.read()
+            if not readings:
+                time.sleep(interval)
+            yield from readings
+
+    def close(self) -> None:
+        if self.memory is None:
+            return
+        self.header = self.slots = None
+        self.memory.close()
+        self.memory = None
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with the resource tracker,
+        # which would unlink it under the daemon when this reader exits
+        from multiprocessing import resource_tracker
+        memory = shared_memory.SharedMemory(name=name)
+        if memory._name not in _createdSegments:
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+class AcquisitionDaemon:
+    """Owns the sensors: samples them on a SamplingScheduler and publishes every good reading to the ring."""
+    def __init__(self, sensors: list, name: str = "sensorPy", capacity: int = 4096, rate: float = 1.0, scheduler = None):
+        self.sensors = list(sensors)
+        self.ring = SharedRingWriter(name, self.sensors, capacity)
+        self.scheduler = scheduler if scheduler is not None else SamplingScheduler()
+        for sensor in self.sensors:
+            sensor.addListener(self.ring.publish)
+            self.scheduler.add(sensor, rate)
+
+    def run(self, duration: float = None, samples: int = None) -> None:
+        self.scheduler.run(duration, samples)
+
+    def close(self) -> None:
+        for sensor in self.sensors:
+            sensor.removeListener(self.ring.publish)
+        self.ring.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Acquisition daemon publishing readings to shared memory, or a reader of it.")
+    parser.add_argument("sensors", nargs="*", help="sensor[:pin] entries, e.g. DHT22:D17 BME280")
+    parser.add_argument("--name", default="sensorPy", help="shared memory segment name")
+    parser.add_argument("--capacity", type=int, default=4096, help="readings kept in the ring")
+    parser.add_argument("--rate", type=float, default=1.0, help="sampling rate per sensor [Hz]")
+    parser.add_argument("--read", action="store_true", help="print the readings of a running daemon")
+    args = parser.parse_args()
+    if args.read:
+        reader = SharedRingReader(args.name)
+        try:
+            for reading in reader.follow():
+                values = "  ".join(f"{symbol}: {value:.2f}" for symbol, value in zip(reading.getSymbols(), reading.values))
+                SensorIO.printMessage(f"{reading.sensorName:<8} {values}", Colour.CYAN)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            reader.close()
+        return
+    sensors = []
+    for entry in args.sensors:
+        name, _, pin = entry.partition(":")
+        sensors.append(sensorRegistry.create(name, pin) if pin else sensorRegistry.create(name))
+    if not sensors:
+        parser.error("at least one sensor is required")
+    daemon = AcquisitionDaemon(sensors, args.name, args.capacity, args.rate)
+    SensorIO.printSuccess(f"Publishing {', '.join(sensor.name for sensor in sensors)} to shared memory {args.name}")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+
+if __name__ == "__main__":
+    main()
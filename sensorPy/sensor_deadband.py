@@ -0,0 +1,44 @@
+# Values come from decimal readings: 21.2 - 21.1 must count as a full 0.1 step, and equal values never as a change
+EPSILON = 1e-9
+
+class DeadbandFilter:
+    """Change-based export: a row is persisted when some value moved by at least its MeasurementType's
+    deadband since the last persisted row, or when maxSilence seconds have passed without one (heartbeat)."""
+    def __init__(self, deadbands: dict = None, maxSilence: float = 900.0):
+        """deadbands maps MeasurementType to a threshold in the measurement's unit, overriding getDeadband()."""
+        self.deadbands = dict(deadbands or {})
+        self.maxSilence = maxSilence
+        self.lastValues = None
+        self.lastTime = None
+        self.written = 0
+        self.suppressed = 0
+
+    def getDeadband(self, measurementType) -> float:
+        return self.deadbands.get(measurementType, measurementType.getDeadband())
+
+    def accept(self, types: tuple, values: tuple, timestamp: float) -> bool:
+        """Decide for one row and remember it if it is to be written."""
+        changed = (self.lastValues is None or len(values) != len(self.lastValues)
+                   or (self.maxSilence is not None and timestamp - self.lastTime >= self.maxSilence)
+                   or any(self._moved(abs(value - last), self.getDeadband(measurementType))
+                          for measurementType, value, last in zip(types, values, self.lastValues)))
+        if not changed:
+            self.suppressed += 1
+            return False
+        self.lastValues = tuple(values)
+        self.lastTime = timestamp
+        self.written += 1
+        return True
+
+    @staticmethod
+    def _moved(change: float, deadband: float) -> bool:
+        return change > EPSILON and change >= deadband - EPSILON
+
+    def reset(self) -> None:
+        self.lastValues = None
+        self.lastTime = None
+
+    def getStatistics(self) -> dict:
+        total = self.written + self.suppressed
+        return {"written": self.written, "suppressed": self.suppressed,
+                "suppressedRate": self.suppressed / total if total else 0.0}
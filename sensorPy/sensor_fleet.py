@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import math
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+from sensor import Sensor
+from sensor_acquisition import acquisitionLoop
+from sensor_instrumentation import LatencyHistogram
+from sensor_measurements import Temperature, RelativeHumidity
+from sensor_utility import Colour, CSVWriter, SensorIO
+
+class SyntheticSensor(Sensor):
+    """Temperature/humidity sensor without hardware: values follow a random walk, each read blocks for a
+    log-normally distributed latency and fails with RuntimeError at errorRate or returns None at noneRate."""
+    def __init__(self, name: str, latencyMedian: float = 0.005, latencySigma: float = 0.5,
+                 errorRate: float = 0.0, noneRate: float = 0.0, seed: int = None):
+        super().__init__()
+        self.name = name
+        self.latencyMedian = latencyMedian
+        self.latencySigma = latencySigma
+        self.errorRate = errorRate
+        self.noneRate = noneRate
+        self.random = random.Random(seed)
+        self.temperature = Temperature()
+        self.relativeHumidity = RelativeHumidity()
+        self.measurements = [self.temperature, self.relativeHumidity]
+        self.state = [20.0 + self.random.uniform(-2.0, 2.0), 45.0 + self.random.uniform(-5.0, 5.0)]
+
+    def _createDevice(self):
+        return self
+
+    def _measure(self) -> list:
+        if self.latencyMedian > 0:
+            time.sleep(self.random.lognormvariate(math.log(self.latencyMedian), self.latencySigma))
+        if self.errorRate > 0 and self.random.random() < self.errorRate:
+            raise RuntimeError("Checksum did not validate. Try again.")
+        if self.noneRate > 0 and self.random.random() < self.noneRate:
+            return [None, None]
+        self.state[0] += self.random.gauss(0.0, 0.05)
+        self.state[1] = min(100.0, max(0.0, self.state[1] + self.random.gauss(0.0, 0.2)))
+        return [round(self.state[0], 2), round(self.state[1], 2)]
+
+def createFleet(size: int, seed: int = 0, **options) -> list:
+    return [SyntheticSensor(f"node{index:04d}", seed=seed + index, **options) for index in range(size)]
+
+def runFleet(size: int, cycles: int = 3, burstNum: int = 1, burstInterval: float = 0.0, burstDelay: float = 0.1,
+             exportToCSV: bool = True, quiet: bool = True, traceMemory: bool = True, **options) -> dict:
+    """Run a fleet of size synthetic sensors through acquisitionLoop and report throughput, memory per sensor,
+    CPU per reading and read latency quantiles merged over all sensors. With quiet set, the per-sensor
+    console output (new files, read errors) is discarded; the errors are still counted.
+    With traceMemory, tracemalloc follows the fleet from construction to the end of the run, so the memory
+    figures include the buffers, histograms and CSV writers the run accumulates. Tracing slows allocations,
+    which inflates the CPU per reading; turn it off for clean timing figures."""
+    # Every sensor keeps its daily CSV open, so a large fleet needs a file descriptor per sensor
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if exportToCSV and soft != resource.RLIM_INFINITY and soft < size + 64:
+        target = size + 64 if hard == resource.RLIM_INFINITY else min(hard, size + 64)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    if traceMemory:
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+    fleet = createFleet(size, **options)
+    with tempfile.TemporaryDirectory() as directory:
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            cpuStart, wallStart = time.process_time(), time.perf_counter()
+            asyncio.run(acquisitionLoop(fleet, cycles, burstNum=burstNum, burstInterval=burstInterval, burstDelay=burstDelay,
+                                        consolePrint=False, exportToCSV=exportToCSV, csvPath=directory))
+            wall, cpu = time.perf_counter() - wallStart, time.process_time() - cpuStart
+            # Retained while the sensors and their open writers are still alive
+            memoryPerSensor = peakMemoryPerSensor = 0.0
+            if traceMemory:
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                memoryPerSensor, peakMemoryPerSensor = (current - baseline) / size, (peak - baseline) / size
+            CSVWriter.closeAll()
+    latency = LatencyHistogram()
+    for sensor in fleet:
+        latency.merge(sensor.instrumentation.readLatency)
+    readings = sum(sensor.instrumentation.successes for sensor in fleet)
+    jitter = [sensor.clock.getStatistics() for sensor in fleet]
+    return {
+        "sensors": size,
+        "readings": readings,
+        "failures": sum(sensor.instrumentation.getFailureCount() for sensor in fleet),
+        "readingsPerSecond": readings / wall if wall > 0 else 0.0,
+        "memoryPerSensor": memoryPerSensor,
+        "peakMemoryPerSensor": peakMemoryPerSensor,
+        "cpuPerReading": cpu / readings if readings else 0.0,
+        "readLatencyP50": latency.getQuantile(0.5),
+        "readLatencyP99": latency.getQuantile(0.99),
+        "readLatencyMax": latency.max,
+        "maxJitter": max((statistics["maxJitter"] for statistics in jitter), default=0.0),
+        "wallClock": wall,
+    }
+
+def runFleetSweep(sizes: tuple = (10, 100, 1000), **options) -> list:
+    return [runFleet(size, **options) for size in sizes]
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale test of the acquisition path with synthetic sensors.")
+    parser.add_argument("sizes", nargs="*", type=int, default=[10, 100, 1000], help="fleet sizes to run")
+    parser.add_argument("--cycles", type=int, default=3, help="measure cycles per sensor")
+    parser.add_argument("--burst", type=int, default=1, help="reads per cycle")
+    parser.add_argument("--latency", type=float, default=0.005, help="median read latency [s]")
+    parser.add_argument("--sigma", type=float, default=0.5, help="log-normal sigma of the read latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of reads raising RuntimeError")
+    parser.add_argument("--none-rate", type=float, default=0.0, help="fraction of reads returning None")
+    parser.add_argument("--no-export", action="store_true", help="skip the CSV export")
+    parser.add_argument("--no-memory", action="store_true", help="skip memory tracing for undistorted CPU figures")
+    args = parser.parse_args()
+    SensorIO.printTitle("sensorPy fleet", Colour.GREEN)
+    SensorIO.printMessage(f"{'sensors':>8} {'readings/s':>11} {'mem/sensor':>11} {'cpu/reading':>12} "
+                          f"{'p50':>9} {'p99':>9} {'max jitter':>11}", Colour.WHITE)
+    for size in args.sizes:
+        result = runFleet(size, args.cycles, args.burst, exportToCSV=not args.no_export, traceMemory=not args.no_memory,
+                          latencyMedian=args.latency, latencySigma=args.sigma, errorRate=args.error_rate,
+                          noneRate=args.none_rate)
+        memory = f"{result['memoryPerSensor'] / 1024:>9.1f} kB" if not args.no_memory else f"{'-':>12}"
+        SensorIO.printMessage(f"{size:>8} {result['readingsPerSecond']:>11.0f} {memory} "
+                              f"{result['cpuPerReading'] * 1e6:>9.0f} us {result['readLatencyP50'] * 1000:>6.1f} ms "
+                              f"{result['readLatencyP99'] * 1000:>6.1f} ms {result['maxJitter'] * 1000:>8.1f} ms", Colour.CYAN)
+
+if __name__ == "__main__":
+    main()
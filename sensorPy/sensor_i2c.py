@@ -0,0 +1,124 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+class FairLock:
+    """Ticket lock: threads get the lock in the order they asked for it, so a fast poller cannot starve a slow one."""
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.nextTicket = 0
+        self.serving = 0
+
+    def acquire(self) -> None:
+        with self.condition:
+            ticket = self.nextTicket
+            self.nextTicket += 1
+            while ticket != self.serving:
+                self.condition.wait()
+
+    def release(self) -> None:
+        with self.condition:
+            self.serving += 1
+            self.condition.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.release()
+        return False
+
+class I2CBus:
+    """One physical bus shared by every device on it. A transaction holds the bus for all register
+    accesses of one device read, so reads from different threads cannot interleave."""
+    def __init__(self, i2c, name: str = "default"):
+        self.i2c = i2c
+        self.name = name
+        self.lock = FairLock()
+        self.created = time.perf_counter()
+        self.statisticsLock = threading.Lock()
+        self.busyTime = 0.0
+        self.waitTime = 0.0
+        self.transactions = 0
+        self.deviceBusyTime = defaultdict(float)
+
+    def transaction(self, address: int = None) -> "_I2CTransaction":
+        return _I2CTransaction(self, address)
+
+    def getStatistics(self) -> dict:
+        elapsed = time.perf_counter() - self.created
+        with self.statisticsLock:
+            return {
+                "transactions": self.transactions,
+                "busyTime": self.busyTime,
+                "meanWait": self.waitTime / self.transactions if self.transactions else 0.0,
+                "utilization": self.busyTime / elapsed if elapsed > 0 else 0.0,
+                "devices": {f"0x{address:02X}" if address is not None else "-": busy
+                            for address, busy in self.deviceBusyTime.items()},
+            }
+
+    def deinit(self) -> None:
+        with self.lock:
+            if hasattr(self.i2c, "deinit"):
+                self.i2c.deinit()
+
+class _I2CTransaction:
+    def __init__(self, bus: I2CBus, address: int):
+        self.bus = bus
+        self.address = address
+        self.requested = 0.0
+        self.acquired = 0.0
+
+    def __enter__(self):
+        self.requested = time.perf_counter()
+        self.bus.lock.acquire()
+        self.acquired = time.perf_counter()
+        return self.bus.i2c
+
+    def __exit__(self, excType, excValue, traceback):
+        busy = time.perf_counter() - self.acquired
+        self.bus.lock.release()
+        with self.bus.statisticsLock:
+            self.bus.transactions += 1
+            self.bus.busyTime += busy
+            self.bus.waitTime += self.acquired - self.requested
+            self.bus.deviceBusyTime[self.address] += busy
+        return False
+
+class I2CBusManager:
+    """Pool of I2CBus objects, one per physical bus. getBus() with no argument is the board's default bus."""
+    def __init__(self):
+        self.buses = {}
+        self.lock = threading.Lock()
+
+    def getBus(self, i2c = None) -> I2CBus:
+        """Pooled bus for an existing busio.I2C object, or the default board.I2C() when i2c is None."""
+        key = None if i2c is None else id(i2c)
+        with self.lock:
+            bus = self.buses.get(key)
+            if bus is None:
+                if i2c is None:
+                    import board
+                    bus = I2CBus(board.I2C())
+                else:
+                    bus = I2CBus(i2c, f"i2c{len(self.buses)}")
+                self.buses[key] = bus
+            return bus
+
+    def report(self) -> dict:
+        """Transactions, bus-busy time and lock wait per bus."""
+        with self.lock:
+            buses = dict(self.buses)
+        return {bus.name: bus.getStatistics() for bus in buses.values()}
+
+    def closeAll(self) -> None:
+        with self.lock:
+            buses = list(self.buses.values())
+            self.buses.clear()
+        for bus in buses:
+            bus.deinit()
+
+i2cBuses = I2CBusManager()
+atexit.register(i2cBuses.closeAll)
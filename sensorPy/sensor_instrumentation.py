@@ -0,0 +1,121 @@
+from bisect import bisect_left
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram: one bisect and two additions per observation, no allocation."""
+    bounds = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the observations of another histogram, e.g. to get fleet-wide quantiles."""
+        self.counts = [count + otherCount for count, otherCount in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def getMean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def getQuantile(self, quantile: float) -> float:
+        """Upper bound of the bucket holding the quantile (the observed max for the overflow bucket)."""
+        if self.count == 0:
+            return 0.0
+        rank = quantile * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.getMean(),
+            "max": self.max,
+            "p50": self.getQuantile(0.5),
+            "p90": self.getQuantile(0.9),
+            "p99": self.getQuantile(0.99),
+            "buckets": {f"le_{bound:g}": count for bound, count in zip(self.bounds, self.counts)} | {"le_inf": self.counts[-1]},
+        }
+
+class SensorInstrumentation:
+    """Read outcomes, read latency and per-phase time of one sensor."""
+    phases = ("measure", "console", "export")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.readLatency = LatencyHistogram()
+        self.successes = 0
+        self.noneReadings = 0
+        self.failures = {}
+        self.phaseTime = dict.fromkeys(self.phases, 0.0)
+        self.cycles = 0
+        self.bursts = 0
+        self.burstAttempts = 0
+        self.burstGood = 0
+        self.burstWallClock = 0.0
+        self.lastBurst = None
+        # Bumped on every recorded event so consumers can tell cheaply whether anything changed
+        self.generation = 0
+
+    def recordRead(self, latency: float, error: Exception = None, isNone: bool = False) -> None:
+        self.readLatency.observe(latency)
+        self.phaseTime["measure"] += latency
+        if error is not None:
+            name = type(error).__name__
+            self.failures[name] = self.failures.get(name, 0) + 1
+        elif isNone:
+            self.noneReadings += 1
+        else:
+            self.successes += 1
+        self.generation += 1
+
+    def recordPhase(self, phase: str, seconds: float) -> None:
+        self.phaseTime[phase] += seconds
+
+    def recordCycle(self) -> None:
+        self.cycles += 1
+        self.generation += 1
+
+    def recordBurst(self, report) -> None:
+        self.bursts += 1
+        self.burstAttempts += report.attempts
+        self.burstGood += report.good
+        self.burstWallClock += report.wallClock
+        self.lastBurst = report.asDict()
+
+    def getFailureCount(self) -> int:
+        return sum(self.failures.values())
+
+    def snapshot(self) -> dict:
+        reads = self.readLatency.count
+        return {
+            "reads": reads,
+            "successes": self.successes,
+            "noneReadings": self.noneReadings,
+            "failures": dict(self.failures),
+            "successRate": self.successes / reads if reads else 0.0,
+            "readLatency": self.readLatency.snapshot(),
+            "phaseTime": dict(self.phaseTime),
+            "cycles": self.cycles,
+            "bursts": {
+                "count": self.bursts,
+                "successRate": self.burstGood / self.burstAttempts if self.burstAttempts else 0.0,
+                "meanWallClock": self.burstWallClock / self.bursts if self.bursts else 0.0,
+                "last": self.lastBurst,
+            },
+        }
\ No newline at end of file
@@ -1,7 +1,11 @@
 from enum import Enum
 from abc import ABC, abstractmethod
-from sensor_units import TemperatureUnit, RelativeHumidityUnit, PressureUnit, DistanceUnit, TimeUnit, UnitType
+import time
+import numpy as np
+from sensor_units import TemperatureUnit, RelativeHumidityUnit, PressureUnit, DistanceUnit, TimeUnit, UnitType, \
+    AbsoluteHumidityUnit, VapourPressureUnit
 from sensor_utility import Colour, SensorIO
+from sensor_buffer import RingBuffer
 
 class MeasurementType(Enum):
     Temperature = ("Temperature", "T", 1)
@@ -10,6 +14,10 @@ class MeasurementType(Enum):
     Distance = ("Distance", "D", 4)
     Altitude = ("Altitude", "Alt", 5)
     Time = ("Time", "t", 6)
+    DewPoint = ("Dew Point", "Td", 7)
+    HeatIndex = ("Heat Index", "HI", 8)
+    AbsoluteHumidity = ("Absolute Humidity", "AH", 9)
+    VapourPressureDeficit = ("Vapour Pressure Deficit", "VPD", 10)
     TypeNone = ("TypeNone", "TypeNone", 0)
 
     def getName(self):
@@ -21,14 +29,57 @@ class MeasurementType(Enum):
     def getPriority(self):
         return self.value[2]
 
+    def getMaxRateOfChange(self) -> float:
+        """Fastest physically plausible change per second in the base unit, None if unbounded."""
+        return maxRatesOfChange.get(self)
+
+    def getDeadband(self) -> float:
+        """Smallest change in the base unit worth persisting by default, 0.0 if every change is."""
+        return deadbands.get(self, 0.0)
+
+# Base units: °C/s, %/s, hPa/s, m/s
+maxRatesOfChange = {
+    MeasurementType.Temperature: 2.0,
+    MeasurementType.RelativeHumidity: 10.0,
+    MeasurementType.Pressure: 1.0,
+    MeasurementType.Altitude: 10.0,
+}
+
+# Base units: °C, %, hPa, m, g/m³, kPa; about the resolution of the DHT/BME280 readings
+deadbands = {
+    MeasurementType.Temperature: 0.1,
+    MeasurementType.RelativeHumidity: 0.5,
+    MeasurementType.Pressure: 0.1,
+    MeasurementType.Altitude: 1.0,
+    MeasurementType.DewPoint: 0.1,
+    MeasurementType.HeatIndex: 0.1,
+    MeasurementType.AbsoluteHumidity: 0.05,
+    MeasurementType.VapourPressureDeficit: 0.01,
+}
+
+class BurstReducer(Enum):
+    Mean = ("Mean", 0)
+    Median = ("Median", 1)
+    TrimmedMean = ("Trimmed Mean", 2)
+    MADFilter = ("MAD Outlier Rejection", 3)
+
+    def getName(self):
+        return self.value[0]
+
 class MeasurementBase(ABC):
     def __init__(self):
         self.type = MeasurementType.TypeNone
         self.unit = UnitType.TypeNone
         self.colour = Colour.BLUE
         self.value = 0.0
-        self.burstValues = []
-        self.avgBurstValue = 0.0
+        self.burst = RingBuffer(16)
+        self.burstTimes = RingBuffer(16, statistics=False)
+        self.rolling = None
+        self.reducer = BurstReducer.Mean
+        self.trimFraction = 0.2
+        self.madThreshold = 3.5
+        self.maxRateOfChange = None
+        self.rejectedCount = 0
 
     def getType(self) -> MeasurementType:
         return self.type
@@ -36,11 +87,14 @@ class MeasurementBase(ABC):
     def getUnit(self) -> UnitType:
         return self.unit
 
-    def setValue(self, value: float, isBurst: bool) -> None:
+    def setValue(self, value: float, isBurst: bool, timestamp: float = None) -> None:
         if isBurst:
-            self.burstValues.append(value)
+            self.burst.push(value)
+            self.burstTimes.push(time.monotonic() if timestamp is None else timestamp)
         else:
             self.value = value
+        if self.rolling is not None:
+            self.rolling.push(value)
 
     def getValue(self, unitType: UnitType = None) -> tuple:
         if unitType is None:
@@ -48,28 +102,112 @@ class MeasurementBase(ABC):
         else:
             return self.unit.convert_value(self.value, unitType)
 
+    @property
+    def burstValues(self) -> list:
+        return self.burst.values().tolist()
+
+    def reserveBurst(self, burstNum: int) -> None:
+        """Make room for a whole burst so no sample is overwritten before it is averaged."""
+        self.burst.reserve(burstNum)
+        self.burstTimes.reserve(burstNum)
+
     def getBurstValues(self, unitType: UnitType = None) -> list:
         if unitType is None:
             return [(value, self.unit) for value in self.burstValues]
         else:
-            convertedValues = []
-            for value in self.burstValues:
-                convertedValues.append((self.unit.convert_value(value, unitType), unitType))
-            return convertedValues
+            return [(value, unitType) for value in self.unit.convert_array(self.burst.values(), unitType).tolist()]
 
     def getAverageBurstValue(self, unitType: UnitType = None) -> float:
-        if len(self.burstValues) == 0:
+        if len(self.burst) == 0:
             return 0.0
         if unitType is None:
-            return sum(self.burstValues) / len(self.burstValues)
+            return self.burst.getMean()
         else:
-            convertedValues = []
-            for value in self.burstValues:
-                convertedValues.append(self.unit.convert_value(value, unitType))
-            return sum(convertedValues) / len(convertedValues)
+            # All unit conversions are affine, so converting the mean equals the mean of the converted values
+            return self.unit.convert_value(self.burst.getMean(), unitType)[0]
+
+    def setBurstReducer(self, reducer: BurstReducer, trimFraction: float = 0.2, madThreshold: float = 3.5) -> None:
+        """How a burst is reduced to the exported value. trimFraction is cut from each end for TrimmedMean,
+        madThreshold is the robust z-score above which MADFilter drops a sample."""
+        if not 0 <= trimFraction < 0.5:
+            raise ValueError("trimFraction must be at least 0 and below 0.5, or nothing is left to average")
+        if madThreshold <= 0:
+            raise ValueError("madThreshold must be greater than 0")
+        self.reducer = reducer
+        self.trimFraction = trimFraction
+        self.madThreshold = madThreshold
+
+    def setPlausibilityLimit(self, maxRateOfChange: float = None) -> None:
+        """Drop burst samples that jump faster than maxRateOfChange per second (the type's default if None)."""
+        self.maxRateOfChange = maxRateOfChange if maxRateOfChange is not None else self.type.getMaxRateOfChange()
+
+    def isRobust(self) -> bool:
+        return self.reducer != BurstReducer.Mean or self.maxRateOfChange is not None
+
+    def getReducedBurstValue(self, unitType: UnitType = None) -> float:
+        """Burst value after the plausibility check and the selected reducer; rejectedCount holds the dropped samples."""
+        if not self.isRobust() or len(self.burst) == 0:
+            self.rejectedCount = 0
+            return self.getAverageBurstValue(unitType)
+        values = self.burst.values()
+        kept = values[self.getBurstMask()]
+        self.rejectedCount = int(len(values) - len(kept))
+        if len(kept) == 0:
+            return 0.0
+        if self.reducer == BurstReducer.Median:
+            result = float(np.median(kept))
+        elif self.reducer == BurstReducer.TrimmedMean:
+            cut = int(len(kept) * self.trimFraction)
+            result = float(np.sort(kept)[cut:len(kept) - cut].mean())
+        else:
+            result = float(kept.mean())
+        if unitType is None:
+            return result
+        return self.unit.convert_value(result, unitType)[0]
+
+    def getBurstMask(self) -> np.ndarray:
+        """Which burst samples pass the plausibility check and the MAD filter (all of them unless robust)."""
+        values = self.burst.values()
+        keep = np.ones(len(values), dtype=bool)
+        if self.maxRateOfChange is not None and len(values) > 1:
+            keep &= self._plausibleMask(values, self.burstTimes.values())
+        if self.reducer == BurstReducer.MADFilter and keep.sum() > 2:
+            kept = values[keep]
+            median = np.median(kept)
+            deviation = np.abs(kept - median)
+            scale = np.median(deviation) * 1.4826
+            if scale == 0:
+                # Quantized DHT readings often repeat exactly, which zeroes the MAD; fall back to the mean deviation
+                scale = deviation.mean() * 1.2533
+            if scale > 0:
+                keep &= np.abs(values - median) <= self.madThreshold * scale
+        return keep
+
+    def _plausibleMask(self, values: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """A sample is a spike when the jumps into and out of it both exceed the rate limit.
+        At the burst edges only one jump exists, so the sample further from the median takes the blame."""
+        dt = np.maximum(np.diff(times), 1e-3)
+        jump = np.abs(np.diff(values)) / dt > self.maxRateOfChange
+        spike = np.zeros(len(values), dtype=bool)
+        spike[1:-1] = jump[:-1] & jump[1:]
+        distance = np.abs(values - np.median(values))
+        spike[0] = jump[0] and not spike[1] and distance[0] > distance[1]
+        spike[-1] = jump[-1] and not spike[-2] and distance[-1] > distance[-2]
+        return ~spike
+
+    def getBurstStatistics(self) -> dict:
+        return self.burst.getStatistics()
+
+    def setRollingWindow(self, capacity: int) -> None:
+        """Keep running statistics over the last capacity samples, burst or not."""
+        self.rolling = RingBuffer(capacity)
+
+    def getRollingStatistics(self) -> dict:
+        return self.rolling.getStatistics() if self.rolling is not None else {}
 
     def resetBurstValues(self) -> None:
-        self.burstValues = []
+        self.burst.clear()
+        self.burstTimes.clear()
 
     def printValue(self, unitType: UnitType = None, useSymbol: bool = True) -> None:
         """Print the value in the specified unit."""
@@ -80,15 +218,18 @@ class MeasurementBase(ABC):
         SensorIO.printMessage(formatted_output, self.colour)
 
     
-    def printBurstValues(self, unitType: UnitType = None, useSymbol: bool = False, printArray: bool = True) -> None:
-        """Print the value in the specified unit."""
-        burstData = self.getBurstValues(unitType)
-        values = [value[0] for value in burstData]
-        unit = burstData[0][1]
-        average = sum(values) / len(values)
-        string = f"{unit.getSymbol()}" if useSymbol else f"{unit.getType().getSymbol()}"
+    def printBurstValues(self, unitType: UnitType = None, useSymbol: bool = False, printArray: bool = True,
+                         reducedValue: float = None) -> None:
+        """Print the value in the specified unit. reducedValue is the already reduced burst in the native unit."""
+        unit = self.unit.getType() if unitType is None else unitType
+        if reducedValue is None:
+            average = self.getReducedBurstValue(unitType)
+        else:
+            average = reducedValue if unitType is None else self.unit.convert_value(reducedValue, unitType)[0]
+        string = f"{unit.getSymbol()}"
         label = f"{self.type.getName()}"
         if printArray:
+            values = [value[0] for value in self.getBurstValues(unitType)]
             formatted_output = f"{label:<20} : {average:>10.2f}  [{string:<4}] {values}"
         else:
             formatted_output = f"{label:<20} : {average:>10.2f}  [{string:<4}]"
@@ -130,4 +271,105 @@ class Time(MeasurementBase):
     def __init__(self):
         super().__init__()
         self.unit = TimeUnit()
-        self.colour = Colour.YELLOW
\ No newline at end of file
+        self.colour = Colour.YELLOW
+
+class DewPoint(MeasurementBase):
+    def __init__(self):
+        super().__init__()
+        self.type = MeasurementType.DewPoint
+        self.unit = TemperatureUnit()
+        self.colour = Colour.CYAN
+
+class HeatIndex(MeasurementBase):
+    def __init__(self):
+        super().__init__()
+        self.type = MeasurementType.HeatIndex
+        self.unit = TemperatureUnit()
+        self.colour = Colour.RED
+
+class AbsoluteHumidity(MeasurementBase):
+    def __init__(self):
+        super().__init__()
+        self.type = MeasurementType.AbsoluteHumidity
+        self.unit = AbsoluteHumidityUnit()
+        self.colour = Colour.SKY_BLUE
+
+class VapourPressureDeficit(MeasurementBase):
+    def __init__(self):
+        super().__init__()
+        self.type = MeasurementType.VapourPressureDeficit
+        self.unit = VapourPressureUnit()
+        self.colour = Colour.TOXIC_GREEN
+
+def psychrometrics(temperature, relativeHumidity) -> tuple:
+    """Dew point [°C], heat index [°C], absolute humidity [g/m³] and vapour-pressure deficit [kPa] from
+    temperature [°C] and relative humidity [%], computed for whole arrays at once."""
+    t = np.asarray(temperature, dtype=np.float64)
+    # ln(0) has no dew point; 0.1 % is below what any of the sensors resolves
+    rh = np.clip(np.asarray(relativeHumidity, dtype=np.float64), 0.1, 100.0)
+    # Magnus formula with the Alduchov-Eskridge coefficients, vapour pressures in hPa
+    magnus = 17.625 * t / (t + 243.04)
+    saturation = 6.1094 * np.exp(magnus)
+    vapour = saturation * rh / 100.0
+    gamma = np.log(rh / 100.0) + magnus
+    dewPoint = 243.04 * gamma / (17.625 - gamma)
+    # e / (R_v T) with R_v = 461.5 J/(kg K), hPa -> Pa and kg -> g
+    absoluteHumidity = vapour * 1e5 / (461.5 * (t + 273.15))
+    vapourPressureDeficit = (saturation - vapour) / 10.0
+    return dewPoint, _heatIndex(t, rh), absoluteHumidity, vapourPressureDeficit
+
+def _heatIndex(t: np.ndarray, rh: np.ndarray) -> np.ndarray:
+    """NWS heat index: Steadman's simple formula, the Rothfusz regression with its dry and humid
+    adjustments where the simple result reaches 80 °F."""
+    f = t * 9.0 / 5.0 + 32.0
+    simple = 0.5 * (f + 61.0 + (f - 68.0) * 1.2 + rh * 0.094)
+    full = (-42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh - 6.83783e-3 * f * f
+            - 5.481717e-2 * rh * rh + 1.22874e-3 * f * f * rh + 8.5282e-4 * f * rh * rh - 1.99e-6 * f * f * rh * rh)
+    dry = (rh < 13.0) & (f >= 80.0) & (f <= 112.0)
+    full = full - np.where(dry, (13.0 - rh) / 4.0 * np.sqrt(np.clip(17.0 - np.abs(f - 95.0), 0.0, None) / 17.0), 0.0)
+    humid = (rh > 85.0) & (f >= 80.0) & (f <= 87.0)
+    full = full + np.where(humid, (rh - 85.0) / 10.0 * (87.0 - f) / 5.0, 0.0)
+    index = np.where((simple + f) / 2.0 >= 80.0, full, simple)
+    return (index - 32.0) * 5.0 / 9.0
+
+class Psychrometrics:
+    """Derived DewPoint, HeatIndex, AbsoluteHumidity and VapourPressureDeficit measurements of a
+    Temperature / RelativeHumidity pair. update() computes them for the burst samples both source channels
+    keep (or the current values) in one vectorized pass; the result is cached until the inputs change."""
+    def __init__(self, temperature: Temperature, relativeHumidity: RelativeHumidity):
+        self.temperature = temperature
+        self.relativeHumidity = relativeHumidity
+        self.dewPoint = DewPoint()
+        self.heatIndex = HeatIndex()
+        self.absoluteHumidity = AbsoluteHumidity()
+        self.vapourPressureDeficit = VapourPressureDeficit()
+        self.measurements = [self.dewPoint, self.heatIndex, self.absoluteHumidity, self.vapourPressureDeficit]
+        self.cacheKey = None
+        self.cache = None
+        self.computations = 0
+
+    def update(self, isBurst: bool) -> None:
+        times = None
+        if isBurst:
+            count = min(len(self.temperature.burst), len(self.relativeHumidity.burst))
+            # A sample rejected by either source channel would carry its spike into every derived value
+            keep = self.temperature.getBurstMask()[:count] & self.relativeHumidity.getBurstMask()[:count]
+            temperatures = self.temperature.burst.values()[:count][keep]
+            humidities = self.relativeHumidity.burst.values()[:count][keep]
+            times = self.temperature.burstTimes.values()[:count][keep].tolist()
+        else:
+            temperatures = np.array([self.temperature.value], dtype=np.float64)
+            humidities = np.array([self.relativeHumidity.value], dtype=np.float64)
+        key = (temperatures.tobytes(), humidities.tobytes())
+        if key != self.cacheKey:
+            self.cache = [values.tolist() for values in psychrometrics(temperatures, humidities)]
+            self.cacheKey = key
+            self.computations += 1
+        for measurement, values in zip(self.measurements, self.cache):
+            if isBurst:
+                measurement.resetBurstValues()
+                measurement.reserveBurst(len(values))
+                for value, timestamp in zip(values, times):
+                    measurement.setValue(value, True, timestamp)
+            else:
+                measurement.setValue(values[0], False)
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import math
+import threading
+from sensor_acquisition import acquisitionLoop
+from sensor_instrumentation import LatencyHistogram
+from sensor_registry import sensorRegistry
+from sensor_utility import SensorIO
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class MetricsExporter:
+    """Renders the latest measurement values and the instrumentation of a set of sensors in the Prometheus
+    text exposition format. The rendered page is cached and only rebuilt when a sensor's instrumentation
+    generation has moved, i.e. after a read or a measure cycle."""
+    def __init__(self, sensors: list, prefix: str = "sensorpy"):
+        self.sensors = list(sensors)
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.cacheKey = None
+        self.cache = b""
+        self.renders = 0
+
+    def getGenerations(self) -> tuple:
+        return tuple(sensor.instrumentation.generation for sensor in self.sensors)
+
+    def render(self) -> bytes:
+        key = self.getGenerations()
+        with self.lock:
+            if key != self.cacheKey:
+                self.cache = self._render().encode()
+                self.cacheKey = key
+                self.renders += 1
+            return self.cache
+
+    def _render(self) -> str:
+        prefix = self.prefix
+        lines = []
+
+        def family(name: str, kind: str, description: str) -> str:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            return f"{prefix}_{name}"
+
+        name = family("measurement", "gauge", "Latest value of each measurement.")
+        for sensor in self.sensors:
+            if sensor.lastReading is None:
+                continue
+            for measurement in sensor.getChannels():
+                measurementType, unit = measurement.getType(), measurement.getUnit()
+                lines.append(f'{name}{{{_labels(sensor=sensor.name, measurement=measurementType.getName(), symbol=measurementType.getSymbol(), unit=unit.getSymbol())}}} {_value(measurement.value)}')
+        name = family("last_read_timestamp_seconds", "gauge", "Unix time of the last good read.")
+        for sensor in self.sensors:
+            if sensor.lastReading is not None:
+                lines.append(f"{name}{{{_labels(sensor=sensor.name)}}} {_value(sensor.lastReading.timestamp)}")
+        name = family("reads_total", "counter", "Device reads by outcome.")
+        for sensor in self.sensors:
+            instrumentation = sensor.instrumentation
+            lines.append(f'{name}{{{_labels(sensor=sensor.name, outcome="success")}}} {instrumentation.successes}')
+            lines.append(f'{name}{{{_labels(sensor=sensor.name, outcome="none")}}} {instrumentation.noneReadings}')
+            lines.append(f'{name}{{{_labels(sensor=sensor.name, outcome="error")}}} {instrumentation.getFailureCount()}')
+        name = family("read_errors_total", "counter", "Failed device reads by exception type.")
+        for sensor in self.sensors:
+            for error, count in sorted(sensor.instrumentation.failures.items()):
+                lines.append(f"{name}{{{_labels(sensor=sensor.name, error=error)}}} {count}")
+        name = family("read_latency_seconds", "histogram", "Latency of device reads.")
+        for sensor in self.sensors:
+            histogram = sensor.instrumentation.readLatency
+            cumulative = 0
+            for bound, count in zip(LatencyHistogram.bounds + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{{{_labels(sensor=sensor.name, le=le)}}} {cumulative}")
+            lines.append(f"{name}_sum{{{_labels(sensor=sensor.name)}}} {_value(histogram.total)}")
+            lines.append(f"{name}_count{{{_labels(sensor=sensor.name)}}} {histogram.count}")
+        name = family("phase_seconds_total", "counter", "Time spent per measure cycle phase.")
+        for sensor in self.sensors:
+            for phase, seconds in sensor.instrumentation.phaseTime.items():
+                lines.append(f"{name}{{{_labels(sensor=sensor.name, phase=phase)}}} {_value(seconds)}")
+        name = family("export_rows_total", "counter", "Measure cycles persisted or suppressed by the export deadband.")
+        for sensor in self.sensors:
+            if sensor.exportFilter is not None:
+                lines.append(f'{name}{{{_labels(sensor=sensor.name, outcome="written")}}} {sensor.exportFilter.written}')
+                lines.append(f'{name}{{{_labels(sensor=sensor.name, outcome="suppressed")}}} {sensor.exportFilter.suppressed}')
+        name = family("cycles_total", "counter", "Completed measure cycles.")
+        for sensor in self.sensors:
+            lines.append(f"{name}{{{_labels(sensor=sensor.name)}}} {sensor.instrumentation.cycles}")
+        return "\n".join(lines) + "\n"
+
+def _value(value: float) -> str:
+    """Sample value in the exposition format, which spells the special floats NaN, +Inf and -Inf."""
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsServer:
+    """Minimal asyncio HTTP/1.0 server answering GET /metrics. It shares the event loop of the acquisition,
+    or runs on its own loop in a daemon thread via startThread()."""
+    def __init__(self, exporter: MetricsExporter, host: str = "0.0.0.0", port: int = 9105):
+        self.exporter = exporter
+        self.host = host
+        self.port = port
+        self.server = None
+        self.requests = 0
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def startThread(self) -> threading.Thread:
+        """Serve from a background thread, for programs driving sensors with the blocking measure()."""
+        started = threading.Event()
+
+        def run():
+            async def serve():
+                await self.start()
+                started.set()
+                await self.server.serve_forever()
+            asyncio.run(serve())
+
+        thread = threading.Thread(target=run, name="metrics", daemon=True)
+        thread.start()
+        started.wait()
+        return thread
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5.0)
+            method, path = (request.split(b" ", 2) + [b"", b""])[:2]
+            self.requests += 1
+            if method == b"GET" and path.split(b"?")[0] in (b"/metrics", b"/"):
+                status, contentType, body = "200 OK", CONTENT_TYPE, self.exporter.render()
+            else:
+                status, contentType, body = "404 Not Found", "text/plain", b"Not Found\n"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {contentType}\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(sensors: list, port: int, interval: float) -> None:
+    server = MetricsServer(MetricsExporter(sensors), port=port)
+    await server.start()
+    SensorIO.printSuccess(f"Serving metrics on port {server.port}")
+    try:
+        await acquisitionLoop(sensors, burstNum=1, burstDelay=interval, consolePrint=False)
+    finally:
+        await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Read sensors and serve their metrics over HTTP.")
+    parser.add_argument("sensors", nargs="+", help="sensor[:pin] entries, e.g. DHT22:D17 BME280")
+    parser.add_argument("--port", type=int, default=9105, help="HTTP port")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between reads of each sensor")
+    args = parser.parse_args()
+    sensors = []
+    for entry in args.sensors:
+        name, _, pin = entry.partition(":")
+        sensors.append(sensorRegistry.create(name, pin) if pin else sensorRegistry.create(name))
+    try:
+        asyncio.run(serve(sensors, args.port, args.interval))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from typing import NamedTuple
+from sensor_buffer import RingBuffer
+from sensor_deadband import DeadbandFilter
+from sensor_storage import BinarySink
+from sensor_units import conversionTable
+from sensor_utility import Colour, CSVSink, SensorIO
+
+class Reading(NamedTuple):
+    """One good read of a sensor: every channel's value with its MeasurementType and UnitType."""
+    timestamp: float
+    sensorName: str
+    types: tuple
+    values: tuple
+    units: tuple
+
+    def getValue(self, measurementType) -> float:
+        return self.values[self.types.index(measurementType)]
+
+    def getSymbols(self) -> list:
+        return [measurementType.getSymbol() for measurementType in self.types]
+
+class Pipeline:
+    """Chain of stages applied to one reading at a time. A stage is a callable taking a Reading and
+    returning a Reading, or None to drop it."""
+    def __init__(self, *stages):
+        self.stages = list(stages)
+
+    def then(self, stage) -> "Pipeline":
+        self.stages.append(stage)
+        return self
+
+    def process(self, reading: Reading) -> Reading:
+        for stage in self.stages:
+            reading = stage(reading)
+            if reading is None:
+                return None
+        return reading
+
+    def run(self, readings):
+        """Lazily process an iterable of readings, e.g. Sensor.stream(), yielding what reaches the end."""
+        for reading in readings:
+            reading = self.process(reading)
+            if reading is not None:
+                yield reading
+
+    def __call__(self, reading: Reading) -> Reading:
+        return self.process(reading)
+
+class ConvertUnits:
+    def __init__(self, targetUnits: dict):
+        """targetUnits maps MeasurementType to the UnitType it should be converted to."""
+        self.targetUnits = targetUnits
+
+    def __call__(self, reading: Reading) -> Reading:
+        values, units = list(reading.values), list(reading.units)
+        for i, measurementType in enumerate(reading.types):
+            target = self.targetUnits.get(measurementType)
+            if target is not None and target != units[i]:
+                values[i] = conversionTable.convert(values[i], units[i], target)
+                units[i] = target
+        return reading._replace(values=tuple(values), units=tuple(units))
+
+class MovingAverage:
+    """Replace each channel by its mean over the last `window` readings."""
+    def __init__(self, window: int):
+        self.window = window
+        self.buffers = None
+
+    def __call__(self, reading: Reading) -> Reading:
+        if self.buffers is None:
+            self.buffers = [RingBuffer(self.window) for _ in reading.values]
+        for buffer, value in zip(self.buffers, reading.values):
+            buffer.push(value)
+        return reading._replace(values=tuple(buffer.getMean() for buffer in self.buffers))
+
+class Decimate:
+    """Pass one reading out of every `factor`."""
+    def __init__(self, factor: int):
+        if factor < 1:
+            raise ValueError("factor must be greater than 0")
+        self.factor = factor
+        self.count = 0
+
+    def __call__(self, reading: Reading) -> Reading:
+        self.count += 1
+        if self.count < self.factor:
+            return None
+        self.count = 0
+        return reading
+
+class Deadband:
+    """Drop readings whose values all stayed within their deadband, letting one through every maxSilence seconds."""
+    def __init__(self, deadbands: dict = None, maxSilence: float = 900.0):
+        self.filter = DeadbandFilter(deadbands, maxSilence)
+
+    def __call__(self, reading: Reading) -> Reading:
+        return reading if self.filter.accept(reading.types, reading.values, reading.timestamp) else None
+
+class ExportSink:
+    """Write every reading to a SensorSink (daily CSV, or binary chunks, by default) and pass it on."""
+    def __init__(self, path: str = None, binary: bool = False, sink = None):
+        if sink is None:
+            sink = BinarySink(path) if binary else CSVSink(path)
+        self.sink = sink
+
+    def __call__(self, reading: Reading) -> Reading:
+        self.sink.write(reading.sensorName, reading.getSymbols(), reading.values,
+                        [unit.getSymbol() for unit in reading.units], reading.timestamp)
+        return reading
+
+class ConsoleSink:
+    def __init__(self, colour: Colour = Colour.WHITE):
+        self.colour = colour
+
+    def __call__(self, reading: Reading) -> Reading:
+        channels = "  ".join(f"{measurementType.getName()}: {value:.2f} {unit.getSymbol()}"
+                             for measurementType, value, unit in zip(reading.types, reading.values, reading.units))
+        SensorIO.printMessage(f"{reading.sensorName:<8} {channels}", self.colour)
+        return reading
+
+class Branch:
+    """Fan a reading out to several pipelines and pass the original on unchanged."""
+    def __init__(self, *pipelines):
+        self.pipelines = pipelines
+
+    def __call__(self, reading: Reading) -> Reading:
+        for pipeline in self.pipelines:
+            pipeline(reading)
+        return reading
\ No newline at end of file
@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import os
+import struct
+from collections import deque
+from sensor_acquisition import acquisitionLoop
+from sensor_measurements import MeasurementType
+from sensor_pipeline import Reading
+from sensor_registry import sensorRegistry
+from sensor_units import UnitType
+from sensor_utility import Colour, SensorIO
+
+# Frame: u32 payload length, then the payload. Reading payload: f8 timestamp, u32 readings dropped for this
+# subscriber so far, u8 name length + name, u8 channel count, then per channel u8 type id, u8 unit id, f8 value
+LENGTH = struct.Struct(">I")
+READING_HEADER = struct.Struct(">dI")
+CHANNEL = struct.Struct(">BBd")
+measurementTypes = {measurementType.value[2]: measurementType for measurementType in MeasurementType}
+unitTypes = {unitType.value[2]: unitType for unitType in UnitType}
+
+def encodeReading(reading: Reading, dropped: int = 0) -> bytes:
+    name = reading.sensorName.encode()
+    payload = b"".join([READING_HEADER.pack(reading.timestamp, dropped), bytes([len(name)]), name, bytes([len(reading.values)])]
+                       + [CHANNEL.pack(measurementType.value[2], unit.value[2], value)
+                          for measurementType, unit, value in zip(reading.types, reading.units, reading.values)])
+    return LENGTH.pack(len(payload)) + payload
+
+def decodeReading(payload: bytes) -> tuple:
+    """Return (reading, dropped) from a frame payload without its length prefix."""
+    timestamp, dropped = READING_HEADER.unpack_from(payload)
+    offset = READING_HEADER.size
+    nameLength = payload[offset]
+    name = payload[offset + 1:offset + 1 + nameLength].decode()
+    offset += 1 + nameLength
+    count = payload[offset]
+    offset += 1
+    types, units, values = [], [], []
+    for _ in range(count):
+        typeId, unitId, value = CHANNEL.unpack_from(payload, offset)
+        offset += CHANNEL.size
+        types.append(measurementTypes[typeId])
+        units.append(unitTypes[unitId])
+        values.append(value)
+    return Reading(timestamp, name, tuple(types), tuple(values), tuple(units)), dropped
+
+class TopicFilter:
+    """Topics are "<sensor>/<symbol>", either part may be "*": "BME280/P", "*/T", "DHT22/*"."""
+    def __init__(self, topics: list = None):
+        self.topics = [tuple(topic.split("/", 1)) if "/" in topic else (topic, "*") for topic in (topics or ["*/*"])]
+
+    def select(self, reading: Reading) -> Reading:
+        """The reading restricted to the subscribed channels, or None if none of them are."""
+        symbols = [symbol for sensor, symbol in self.topics if sensor in ("*", reading.sensorName)]
+        if not symbols:
+            return None
+        if "*" in symbols:
+            return reading
+        keep = [i for i, measurementType in enumerate(reading.types) if measurementType.getSymbol() in symbols]
+        if not keep:
+            return None
+        return reading._replace(types=tuple(reading.types[i] for i in keep), values=tuple(reading.values[i] for i in keep),
+                                units=tuple(reading.units[i] for i in keep))
+
+class _Subscriber:
+    def __init__(self, writer: asyncio.StreamWriter, topicFilter: TopicFilter, queueSize: int):
+        self.writer = writer
+        self.filter = topicFilter
+        self.queue = deque(maxlen=queueSize)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.task = asyncio.current_task()
+
+    def offer(self, reading: Reading) -> None:
+        reading = self.filter.select(reading)
+        if reading is None:
+            return
+        if len(self.queue) == self.queue.maxlen:
+            # Slow consumer: the deque discards the oldest reading
+            self.dropped += 1
+        self.queue.append(reading)
+        self.ready.set()
+
+class PubSubServer:
+    """Streams readings of the attached sensors to subscribers on a Unix domain socket. A subscriber sends one
+    frame with comma separated topics, then receives reading frames. Each subscriber has its own bounded queue
+    that drops the oldest readings when it cannot keep up, so a slow tool never delays the sensors or the others."""
+    def __init__(self, path: str, queueSize: int = 256):
+        self.path = path
+        self.queueSize = queueSize
+        self.subscribers = set()
+        self.server = None
+        self.loop = None
+        self.published = 0
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle, path=self.path)
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        for subscriber in list(self.subscribers):
+            subscriber.task.cancel()
+        if self.server is not None:
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def attach(self, sensor) -> None:
+        sensor.addListener(self.publish)
+
+    def detach(self, sensor) -> None:
+        sensor.removeListener(self.publish)
+
+    def publish(self, reading: Reading) -> None:
+        """Safe to call from any thread, e.g. as a sensor listener running in an executor."""
+        if self.loop is None:
+            return
+        try:
+            if asyncio.get_running_loop() is self.loop:
+                self._dispatch(reading)
+                return
+        except RuntimeError:
+            pass
+        self.loop.call_soon_threadsafe(self._dispatch, reading)
+
+    def _dispatch(self, reading: Reading) -> None:
+        self.published += 1
+        for subscriber in self.subscribers:
+            subscriber.offer(reading)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+            topics = (await reader.readexactly(length)).decode()
+        except (asyncio.IncompleteReadError, UnicodeDecodeError):
+            writer.close()
+            return
+        subscriber = _Subscriber(writer, TopicFilter([topic for topic in topics.split(",") if topic]), self.queueSize)
+        self.subscribers.add(subscriber)
+        try:
+            while True:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                frames = []
+                while subscriber.queue:
+                    frames.append(encodeReading(subscriber.queue.popleft(), subscriber.dropped))
+                writer.write(b"".join(frames))
+                await writer.drain()
+        except ConnectionError:
+            # The subscriber went away; cancellation (server close) propagates after the cleanup below
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+
+async def subscribe(path: str, topics: list = None):
+    """Async generator of (reading, dropped) from a PubSubServer."""
+    reader, writer = await asyncio.open_unix_connection(path)
+    request = ",".join(topics or ["*/*"]).encode()
+    writer.write(LENGTH.pack(len(request)) + request)
+    await writer.drain()
+    try:
+        while True:
+            length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+            yield decodeReading(await reader.readexactly(length))
+    except asyncio.IncompleteReadError:
+        return
+    finally:
+        writer.close()
+
+async def serve(path: str, sensors: list, interval: float, queueSize: int = 256) -> None:
+    server = PubSubServer(path, queueSize)
+    await server.start()
+    for sensor in sensors:
+        server.attach(sensor)
+    try:
+        await acquisitionLoop(sensors, burstNum=1, burstDelay=interval, consolePrint=False)
+    finally:
+        await server.close()
+
+async def watch(path: str, topics: list) -> None:
+    async for reading, dropped in subscribe(path, topics):
+        values = "  ".join(f"{symbol}: {value:.2f}" for symbol, value in zip(reading.getSymbols(), reading.values))
+        SensorIO.printMessage(f"{reading.sensorName:<8} {values}" + (f"  ({dropped} dropped)" if dropped else ""), Colour.CYAN)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream live readings over a Unix domain socket, or watch a stream.")
+    parser.add_argument("sensors", nargs="*", help="sensor[:pin] entries to serve, e.g. DHT22:D17 BME280")
+    parser.add_argument("--socket", default="/tmp/sensorPy.sock", help="Unix socket path")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between reads of each sensor")
+    parser.add_argument("--queue", type=int, default=256, help="readings buffered per subscriber")
+    parser.add_argument("--watch", nargs="*", metavar="TOPIC", help="subscribe to topics such as BME280/P or */T")
+    args = parser.parse_args()
+    try:
+        if args.watch is not None:
+            asyncio.run(watch(args.socket, args.watch))
+            return
+        sensors = []
+        for entry in args.sensors:
+            name, _, pin = entry.partition(":")
+            sensors.append(sensorRegistry.create(name, pin) if pin else sensorRegistry.create(name))
+        if not sensors:
+            parser.error("at least one sensor is required")
+        asyncio.run(serve(args.socket, sensors, args.interval, args.queue))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
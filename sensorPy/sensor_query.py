@@ -0,0 +1,138 @@
+import json
+import os
+import re
+import numpy as np
+from sensor_archive import ArchiveReader, dayStart, listArchives
+
+class CSVArchiveIndex:
+    """Sidecar index over <sensor>_YYYY_MM_DD[_<n>].csv files: per file the first/last timestamp and the byte
+    offset where each hour starts, so a range query only reads the hours it asks for."""
+    def __init__(self, sensorName: str, path: str = None):
+        self.sensorName = sensorName
+        self.path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+        self.indexPath = os.path.join(self.path, f"{sensorName}_index.json")
+        self.pattern = re.compile(rf"^{re.escape(sensorName)}_(\d{{4}}_\d{{2}}_\d{{2}})(?:_\d+)?\.csv$")
+        self.files = {}
+        if os.path.isfile(self.indexPath):
+            with open(self.indexPath) as file:
+                self.files = json.load(file)
+
+    def update(self) -> bool:
+        """Index new files and the rows appended since the last update. Returns True if anything changed."""
+        changed = False
+        present = set()
+        for name in sorted(os.listdir(self.path)) if os.path.isdir(self.path) else []:
+            match = self.pattern.match(name)
+            if match is None:
+                continue
+            present.add(name)
+            size = os.path.getsize(os.path.join(self.path, name))
+            entry = self.files.get(name)
+            if entry is not None and entry["size"] == size:
+                continue
+            if entry is None or entry["size"] > size:
+                # New file, or one that was rewritten: start over
+                entry = {"day": match.group(1), "header": None, "dataStart": 0, "size": 0,
+                         "first": None, "last": None, "hours": {}}
+            self._scan(name, entry)
+            self.files[name] = entry
+            changed = True
+        for name in set(self.files) - present:
+            del self.files[name]
+            changed = True
+        if changed:
+            self.save()
+        return changed
+
+    def save(self) -> None:
+        temporaryPath = self.indexPath + ".tmp"
+        with open(temporaryPath, 'w') as file:
+            json.dump(self.files, file)
+        os.replace(temporaryPath, self.indexPath)
+
+    def _scan(self, name: str, entry: dict) -> None:
+        midnight = dayStart(entry["day"])
+        with open(os.path.join(self.path, name), 'rb') as file:
+            file.seek(entry["size"])
+            offset = entry["size"]
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # Row still being written: index it next time
+                    break
+                if entry["header"] is None:
+                    entry["header"] = line.decode().rstrip("\n")
+                    entry["dataStart"] = offset + len(line)
+                else:
+                    hour = line[:2].decode()
+                    if hour not in entry["hours"]:
+                        entry["hours"][hour] = offset
+                    timestamp = midnight + parseSeconds(line)
+                    if entry["first"] is None:
+                        entry["first"] = timestamp
+                    entry["last"] = timestamp
+                offset += len(line)
+            entry["size"] = offset
+
+    def getColumns(self, name: str) -> list:
+        header = self.files[name]["header"] or ""
+        return [column.split("[")[0] for column in header.split(",")[1:]]
+
+    def query(self, measurementName: str, start: float = None, end: float = None) -> tuple:
+        """Return (timestamps, values) NumPy arrays of one measurement in [start, end). Days that were
+        compacted into .spz archives are decompressed block by block and merged in."""
+        self.update()
+        timestamps, values = [], []
+        csvDays = {entry["day"] for entry in self.files.values()}
+        for (day, segment), filePath in listArchives(self.path, self.sensorName).items():
+            midnight = dayStart(day)
+            if day in csvDays or (start is not None and midnight + 86400 <= start) or (end is not None and midnight >= end):
+                continue
+            archiveTimes, archiveValues = ArchiveReader(filePath).query(measurementName, start, end)
+            timestamps.extend(archiveTimes.tolist())
+            values.extend(archiveValues.tolist())
+        for name in sorted(self.files):
+            entry = self.files[name]
+            if entry["first"] is None:
+                continue
+            if (start is not None and entry["last"] < start) or (end is not None and entry["first"] >= end):
+                continue
+            columns = self.getColumns(name)
+            if measurementName not in columns:
+                continue
+            column = columns.index(measurementName) + 1
+            midnight = dayStart(entry["day"])
+            first, last = self._byteRange(entry, midnight, start, end)
+            with open(os.path.join(self.path, name), 'rb') as file:
+                file.seek(first)
+                chunk = file.read(last - first)
+            for line in chunk.splitlines():
+                timestamp = midnight + parseSeconds(line)
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    continue
+                timestamps.append(timestamp)
+                values.append(float(line.split(b",")[column]))
+        timestamps, values = np.array(timestamps, dtype=np.float64), np.array(values, dtype=np.float64)
+        order = np.argsort(timestamps, kind="stable")
+        return timestamps[order], values[order]
+
+    def _byteRange(self, entry: dict, midnight: float, start: float, end: float) -> tuple:
+        hours = sorted((int(hour), offset) for hour, offset in entry["hours"].items())
+        first, last = entry["dataStart"], entry["size"]
+        if start is not None and start > midnight:
+            startHour = int((start - midnight) // 3600)
+            candidates = [offset for hour, offset in hours if hour <= startHour]
+            if candidates:
+                first = candidates[-1]
+        if end is not None:
+            endHour = int((end - midnight) // 3600)
+            later = [offset for hour, offset in hours if hour > endHour]
+            if later:
+                last = later[0]
+        return first, last
+
+def parseSeconds(line: bytes) -> int:
+    """Seconds since midnight of an HH:MM:SS row prefix."""
+    return int(line[0:2]) * 3600 + int(line[3:5]) * 60 + int(line[6:8])
+
+def queryArchive(sensorName: str, measurementName: str, start: float = None, end: float = None, path: str = None) -> tuple:
+    return CSVArchiveIndex(sensorName, path).query(measurementName, start, end)
\ No newline at end of file
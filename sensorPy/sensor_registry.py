@@ -0,0 +1,34 @@
+import importlib
+
+class SensorRegistry:
+    """Maps sensor names to their driver classes, importing a driver module only when that sensor is created."""
+    def __init__(self):
+        self.entries = {}
+        self.classes = {}
+
+    def register(self, name: str, modulePath: str, className: str) -> None:
+        self.entries[name] = (modulePath, className)
+        self.classes.pop(name, None)
+
+    def getNames(self) -> list:
+        return sorted(self.entries)
+
+    def getClass(self, name: str) -> type:
+        sensorClass = self.classes.get(name)
+        if sensorClass is None:
+            if name not in self.entries:
+                raise ValueError(f"Unknown sensor {name}, registered: {', '.join(self.getNames())}")
+            modulePath, className = self.entries[name]
+            sensorClass = getattr(importlib.import_module(modulePath), className)
+            self.classes[name] = sensorClass
+        return sensorClass
+
+    def create(self, name: str, *args, **kwargs):
+        """Construct the sensor; the device itself is only opened on its first read."""
+        return self.getClass(name)(*args, **kwargs)
+
+sensorRegistry = SensorRegistry()
+sensorRegistry.register("DHT11", "DHT11.sensor_dht11", "DHT11")
+sensorRegistry.register("DHT22", "DHT22.sensor_dht22", "DHT22")
+sensorRegistry.register("BME280", "BME280.sensor_bme280", "BME280")
+sensorRegistry.register("SHTC3", "shtc3.SensorSHTC3", "SHTC3")
@@ -0,0 +1,180 @@
+import argparse
+import os
+import re
+import time
+from sensor import Sensor
+from sensor_archive import ArchiveReader
+from sensor_measurements import Temperature, RelativeHumidity, Pressure, Altitude, Distance, \
+    DewPoint, HeatIndex, AbsoluteHumidity, VapourPressureDeficit
+from sensor_units import UnitType, conversionTable
+from sensor_utility import Colour, SensorIO
+
+# Measurement classes by the column symbol used in the exported files
+measurementClasses = {measurementClass().getType().getSymbol(): measurementClass
+                      for measurementClass in (Temperature, RelativeHumidity, Pressure, Altitude, Distance,
+                                               DewPoint, HeatIndex, AbsoluteHumidity, VapourPressureDeficit)}
+unitSymbols = {unitType.getSymbol(): unitType for unitType in UnitType}
+# dht22_burst_read.py wrote YYYY-MM-DD_<sensor>.csv with an hour,min,sec,avg_temp,avg_hum header
+legacyColumns = {"avg_temp": ("T", "°C"), "avg_hum": ("RH", "%")}
+
+def findRecordings(path: str, sensorName: str) -> list:
+    """Every recording of the sensor in path, oldest day first: <sensor>_YYYY_MM_DD[_<n>].csv, the compacted
+    <sensor>_YYYY_MM_DD[_<n>].spz archives and legacy YYYY-MM-DD_<sensor>.csv files."""
+    current = re.compile(rf"^{re.escape(sensorName)}_(\d{{4}})_(\d{{2}})_(\d{{2}})(?:_(\d+))?\.(csv|spz)$")
+    legacy = re.compile(rf"^(\d{{4}})-(\d{{2}})-(\d{{2}})_{re.escape(sensorName)}\.csv$", re.IGNORECASE)
+    recordings = []
+    for name in os.listdir(path):
+        match = current.match(name) or legacy.match(name)
+        if match is not None:
+            segment = int(match.group(4) or 1) if match.re is current else 1
+            recordings.append(("".join(match.group(1, 2, 3)), segment, os.path.join(path, name)))
+    return [filePath for day, segment, filePath in sorted(recordings)]
+
+def readRecordingHeader(filePath: str) -> tuple:
+    """(symbols, units) of the columns of a recording."""
+    if filePath.endswith(".spz"):
+        reader = ArchiveReader(filePath)
+        return reader.names, reader.units
+    with open(filePath) as file:
+        columns = file.readline().rstrip("\n").split(",")
+    if columns[:3] == ["hour", "min", "sec"]:
+        return [legacyColumns[column][0] for column in columns[3:]], [legacyColumns[column][1] for column in columns[3:]]
+    columns = [column.rstrip("]").split("[") for column in columns[1:]]
+    return [symbol for symbol, _ in columns], [unit for _, unit in columns]
+
+def iterRecording(filePath: str):
+    """Yield (timestamp, values) one row at a time, so a recording is never loaded whole."""
+    if filePath.endswith(".spz"):
+        for timestamps, values in ArchiveReader(filePath).iterBlocks():
+            for timestamp, row in zip(timestamps.tolist(), values.tolist()):
+                yield timestamp, row
+        return
+    name = os.path.basename(filePath)
+    day = re.search(r"(\d{4})[-_](\d{2})[-_](\d{2})", name)
+    midnight = time.mktime((int(day.group(1)), int(day.group(2)), int(day.group(3)), 0, 0, 0, 0, 0, -1))
+    with open(filePath) as file:
+        isLegacy = file.readline().startswith("hour,")
+        for line in file:
+            fields = line.rstrip("\n").split(",")
+            try:
+                if isLegacy:
+                    seconds = int(fields[0]) * 3600 + int(fields[1]) * 60 + int(fields[2])
+                    values = [float(field) for field in fields[3:]]
+                else:
+                    hours, minutes, secs = fields[0].split(":")
+                    seconds = int(hours) * 3600 + int(minutes) * 60 + int(secs)
+                    values = [float(field) for field in fields[1:]]
+            except ValueError:
+                # Torn last row of a crashed run
+                continue
+            yield midnight + seconds, values
+
+class ReplaySensor(Sensor):
+    """Plays recorded files back through _measure, paced at speed times real time (as fast as possible
+    when speed is None). Rows are read lazily and exported with their recorded timestamps."""
+    def __init__(self, recordings: list, name: str = None, speed: float = 1.0):
+        super().__init__()
+        if not recordings:
+            raise ValueError("No recordings to replay")
+        self.recordings = list(recordings)
+        self.name = name or re.sub(r"(_\d{4}_\d{2}_\d{2}(_\d+)?|\d{4}-\d{2}-\d{2}_)", "", os.path.splitext(os.path.basename(self.recordings[0]))[0])
+        self.speed = speed
+        symbols, units = readRecordingHeader(self.recordings[0])
+        self.symbols = [symbol for symbol in symbols if symbol in measurementClasses]
+        if not self.symbols:
+            raise ValueError(f"{self.recordings[0]} holds no known measurement columns")
+        self.measurements = [measurementClasses[symbol]() for symbol in self.symbols]
+        self.rows = None
+        self.pending = None
+        self.replayTime = None
+        self.replayStart = None
+        self.wallStart = None
+        self.replayed = 0
+        self.finished = False
+        # Recordings left out because they lack one of the replayed columns
+        self.skipped = []
+
+    @classmethod
+    def fromDirectory(cls, path: str, sensorName: str, speed: float = 1.0) -> "ReplaySensor":
+        return cls(findRecordings(path, sensorName), sensorName, speed)
+
+    def _createDevice(self):
+        return self
+
+    def _rows(self):
+        for filePath in self.recordings:
+            symbols, units = readRecordingHeader(filePath)
+            missing = [symbol for symbol in self.symbols if symbol not in symbols]
+            if missing:
+                # A row without a value would count as a failed read, so the whole file is left out
+                SensorIO.printError(f"Skipping {os.path.basename(filePath)}: no {', '.join(missing)} column")
+                self.skipped.append(filePath)
+                continue
+            columns = []
+            for measurement, symbol in zip(self.measurements, self.symbols):
+                index = symbols.index(symbol)
+                unit = unitSymbols.get(units[index])
+                target = measurement.getUnit().getType()
+                columns.append((index, unit if unit is not None and unit != target else None))
+            for timestamp, values in iterRecording(filePath):
+                yield timestamp, [values[index] if unit is None else
+                                  conversionTable.convert(values[index], unit, measurement.getUnit().getType())
+                                  for (index, unit), measurement in zip(columns, self.measurements)]
+
+    def _measure(self) -> list:
+        if self.rows is None:
+            self.rows = self._rows()
+            self.pending = next(self.rows, None)
+        if self.pending is None:
+            self.finished = True
+            return [None] * len(self.measurements)
+        timestamp, values = self.pending
+        # Look one row ahead so replay() stops right after the last row instead of exporting a stale cycle
+        self.pending = next(self.rows, None)
+        self.finished = self.pending is None
+        if self.replayStart is None:
+            self.replayStart, self.wallStart = timestamp, time.monotonic()
+        if self.speed:
+            delay = self.wallStart + (timestamp - self.replayStart) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.replayTime = timestamp
+        self.replayed += 1
+        return values
+
+    def _now(self) -> float:
+        return self.replayTime if self.replayTime is not None else time.time()
+
+    def rewind(self) -> None:
+        self.rows = self.pending = None
+        self.replayTime = self.replayStart = self.wallStart = None
+        self.finished = False
+        self.skipped = []
+
+    def replay(self, **measureArgs) -> int:
+        """Run measure cycles until the recordings are exhausted. Returns the rows replayed. The recorded
+        timestamps set the pace, so measure()'s burst interval and delay default to 0."""
+        measureArgs.setdefault("burstInterval", 0)
+        measureArgs.setdefault("burstDelay", 0)
+        measureArgs.setdefault("consolePrint", False)
+        while not self.finished:
+            self.measure(**measureArgs)
+        return self.replayed
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sensor data through the export paths.")
+    parser.add_argument("sensor", help="sensor name of the recordings")
+    parser.add_argument("path", help="directory holding the recordings")
+    parser.add_argument("--speed", type=float, default=0.0, help="playback speed factor, 0 for as fast as possible")
+    parser.add_argument("--csv", default=None, help="export the replayed rows as daily CSV files into this directory")
+    parser.add_argument("--binary", default=None, help="export the replayed rows as binary chunks into this directory")
+    args = parser.parse_args()
+    sensor = ReplaySensor.fromDirectory(args.path, args.sensor, args.speed or None)
+    start = time.perf_counter()
+    rows = sensor.replay(exportToCSV=args.csv is not None, csvPath=args.csv,
+                         exportToBinary=args.binary is not None, binaryPath=args.binary)
+    elapsed = time.perf_counter() - start
+    SensorIO.printMessage(f"Replayed {rows} rows of {sensor.name} in {elapsed:.2f} s ({rows / elapsed:.0f} rows/s)", Colour.CYAN)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import os
+import re
+import time
+import numpy as np
+from sensor_archive import ArchiveReader, archivePath, dayStart, listArchives, readDailyCSV, writeArchive
+from sensor_query import CSVArchiveIndex
+from sensor_rollup import readRollup
+from sensor_utility import Colour, SensorIO
+
+class RetentionPolicy:
+    """Daily CSV files older than archiveAge days are compacted into .spz archives. When rollupOnlyAge is
+    set, raw data older than that is deleted once the daily rollups cover it."""
+    def __init__(self, archiveAge: float = 7, rollupOnlyAge: float = None):
+        if archiveAge < 1:
+            raise ValueError("archiveAge must be at least 1 day, today's file is still being written")
+        if rollupOnlyAge is not None and rollupOnlyAge < archiveAge:
+            raise ValueError("rollupOnlyAge must not be shorter than archiveAge")
+        self.archiveAge = archiveAge
+        self.rollupOnlyAge = rollupOnlyAge
+
+def compactSensor(sensorName: str, path: str = None, policy: RetentionPolicy = None, now: float = None) -> dict:
+    """Apply the policy to one sensor's data directory. Returns the files handled and the bytes before and after."""
+    path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+    policy = policy or RetentionPolicy()
+    now = time.time() if now is None else now
+    report = {"archived": 0, "dropped": 0, "kept": 0, "bytesBefore": 0, "bytesAfter": 0}
+    pattern = re.compile(rf"^{re.escape(sensorName)}_(\d{{4}}_\d{{2}}_\d{{2}})(?:_(\d+))?\.csv$")
+    for name in sorted(os.listdir(path)) if os.path.isdir(path) else []:
+        match = pattern.match(name)
+        # A day is old once its last second is older than the threshold
+        if match is None or now - (dayStart(match.group(1)) + 86400) < policy.archiveAge * 86400:
+            continue
+        csvPath = os.path.join(path, name)
+        seconds, values, names, units, decimals = readDailyCSV(csvPath)
+        target = archivePath(path, sensorName, match.group(1), int(match.group(2) or 1))
+        size = os.path.getsize(csvPath)
+        archivedSize = writeArchive(target, sensorName, match.group(1), seconds, values, names, units, decimals)
+        # Only drop the CSV once the archive reads back the same rows
+        archiveTimes, archiveValues = ArchiveReader(target).query()
+        if len(archiveTimes) != len(seconds) or not np.array_equal(archiveTimes, dayStart(match.group(1)) + seconds) or \
+           not np.allclose(archiveValues, values, atol=0.5 * 10.0 ** -max(decimals, default=0)):
+            os.remove(target)
+            SensorIO.printError(f"Archive of {name} did not verify, keeping the CSV file")
+            continue
+        os.remove(csvPath)
+        report["archived"] += 1
+        report["bytesBefore"] += size
+        report["bytesAfter"] += archivedSize
+    if policy.rollupOnlyAge is not None:
+        days = {}
+        for (day, segment), filePath in listArchives(path, sensorName).items():
+            if now - (dayStart(day) + 86400) >= policy.rollupOnlyAge * 86400:
+                days.setdefault(day, []).append(ArchiveReader(filePath))
+        for day, readers in days.items():
+            if not _rollupsCover(sensorName, path, readers):
+                report["kept"] += len(readers)
+                continue
+            for reader in readers:
+                os.remove(reader.filePath)
+            report["dropped"] += len(readers)
+    if report["archived"]:
+        CSVArchiveIndex(sensorName, path).update()
+    return report
+
+def _rollupsCover(sensorName: str, path: str, readers: list) -> bool:
+    """True when, for every measurement of one day's archive segments, the day tier counted at least as many
+    samples as the archives hold rows. Rollups see every read, the files only the exported ones."""
+    rows = {}
+    for reader in readers:
+        for name in reader.names:
+            rows[name] = rows.get(name, 0) + reader.header["rows"]
+    midnight = readers[0].midnight
+    for name, count in rows.items():
+        if readRollup(sensorName, "1d", name, midnight, midnight + 86400, path)["count"].sum() < count:
+            return False
+    return True
+
+def compactArchive(root: str, policy: RetentionPolicy = None, now: float = None) -> dict:
+    """Apply the policy to every <root>/<sensor>/data directory."""
+    reports = {}
+    for sensorName in sorted(os.listdir(root)):
+        dataPath = os.path.join(root, sensorName, "data")
+        if os.path.isdir(dataPath):
+            reports[sensorName] = compactSensor(sensorName, dataPath, policy, now)
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress old daily CSV files and optionally keep only rollups of older data.")
+    parser.add_argument("root", nargs="?", default=os.getcwd(), help="directory holding the <sensor>/data folders")
+    parser.add_argument("--archive-age", type=float, default=7, help="days after which CSV files are compressed")
+    parser.add_argument("--rollup-only-age", type=float, default=None, help="days after which only rollups are kept")
+    args = parser.parse_args()
+    reports = compactArchive(args.root, RetentionPolicy(args.archive_age, args.rollup_only_age))
+    for sensorName, report in reports.items():
+        ratio = report["bytesAfter"] / report["bytesBefore"] if report["bytesBefore"] else 0.0
+        SensorIO.printMessage(f"{sensorName:<8} archived {report['archived']} files ({ratio:.1%} of the CSV size), "
+                              f"dropped {report['dropped']}, kept {report['kept']} without rollups", Colour.CYAN)
+
+if __name__ == "__main__":
+    main()
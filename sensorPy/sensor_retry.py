@@ -0,0 +1,48 @@
+class RetryPolicy:
+    """Fill a burst with good samples: retry a failed read after the device's minimum re-read window
+    (at least minDelay), doubling the wait on consecutive failures, until the burst is full or the time
+    budget is spent."""
+    def __init__(self, backoffFactor: float = 2.0, maxBackoff: float = 30.0, timeBudget: float = None,
+                 budgetFactor: float = 3.0, minDelay: float = 0.05):
+        if backoffFactor < 1:
+            raise ValueError("backoffFactor must be greater than or equal to 1")
+        if minDelay <= 0:
+            raise ValueError("minDelay must be greater than 0")
+        self.backoffFactor = backoffFactor
+        self.maxBackoff = maxBackoff
+        self.timeBudget = timeBudget
+        self.budgetFactor = budgetFactor
+        # Sensors without a minSamplingPeriod would otherwise retry a failing device in a busy loop
+        self.minDelay = minDelay
+
+    def getRetryDelay(self, consecutiveFailures: int, minSamplingPeriod: float) -> float:
+        delay = max(minSamplingPeriod, self.minDelay) * self.backoffFactor ** (consecutiveFailures - 1)
+        return min(delay, self.maxBackoff)
+
+    def getTimeBudget(self, burstNum: int, burstInterval: float) -> float:
+        """Explicit budget, or budgetFactor times what a burst without failures would take."""
+        if self.timeBudget is not None:
+            return self.timeBudget
+        return self.budgetFactor * max(1, burstNum - 1) * burstInterval
+
+class BurstReport:
+    def __init__(self, requested: int):
+        self.requested = requested
+        self.good = 0
+        self.attempts = 0
+        self.wallClock = 0.0
+
+    def getSuccessRate(self) -> float:
+        return self.good / self.attempts if self.attempts else 0.0
+
+    def isComplete(self) -> bool:
+        return self.good >= self.requested
+
+    def asDict(self) -> dict:
+        return {
+            "requested": self.requested,
+            "good": self.good,
+            "attempts": self.attempts,
+            "successRate": self.getSuccessRate(),
+            "wallClock": self.wallClock,
+        }
\ No newline at end of file
@@ -0,0 +1,164 @@
+import atexit
+import os
+import threading
+import time
+import numpy as np
+
+class RollupBucket:
+    def __init__(self, key: int, start: float):
+        self.key = key
+        self.start = start
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def getMean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class RollupTier:
+    """Open buckets of one resolution. Closed buckets are appended to <sensor>_rollup_<name>.csv."""
+    def __init__(self, name: str, resolution: int, filePath: str):
+        self.name = name
+        self.resolution = resolution
+        self.filePath = filePath
+        self.buckets = {}
+        self.file = None
+
+    def add(self, localTime: float, timestamp: float, measurementName: str, value: float) -> None:
+        key = int(localTime // self.resolution)
+        bucket = self.buckets.get(measurementName)
+        if bucket is None or bucket.key != key:
+            if bucket is not None:
+                self._write(measurementName, bucket)
+            bucket = RollupBucket(key, timestamp - (localTime - key * self.resolution))
+            self.buckets[measurementName] = bucket
+        bucket.add(value)
+
+    def checkpoint(self) -> None:
+        """Persist what the open buckets gathered so far and keep collecting into empty ones with the same
+        start; readers merge rows that share a bucket start, so a crash only loses samples since the last one."""
+        for measurementName, bucket in self.buckets.items():
+            if bucket.count:
+                self._write(measurementName, bucket)
+                self.buckets[measurementName] = RollupBucket(bucket.key, bucket.start)
+
+    def close(self) -> None:
+        self.checkpoint()
+        self.buckets = {}
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _write(self, measurementName: str, bucket: RollupBucket) -> None:
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.filePath), exist_ok=True)
+            isNew = not os.path.isfile(self.filePath)
+            self.file = open(self.filePath, 'a')
+            if isNew:
+                self.file.write("start,measurement,count,mean,min,max\n")
+        self.file.write(f"{bucket.start:.0f},{measurementName},{bucket.count},{bucket.getMean():.4f},{bucket.min:.4f},{bucket.max:.4f}\n")
+        self.file.flush()
+
+class RollupEngine:
+    """Incremental min/max/mean/count per measurement at several resolutions, O(1) per sample. Closed
+    buckets are written at their tier boundary, open ones every checkpointInterval seconds."""
+    defaultTiers = (("1m", 60), ("1h", 3600), ("1d", 86400))
+    _engines = []
+    _lock = threading.Lock()
+
+    def __init__(self, sensorName: str, path: str = None, tiers: tuple = None, checkpointInterval: float = 300.0):
+        self.sensorName = sensorName
+        self.checkpointInterval = checkpointInterval
+        self.lastCheckpoint = time.monotonic()
+        self.path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+        self.tiers = [RollupTier(name, resolution, rollupPath(self.path, sensorName, name))
+                      for name, resolution in (tiers or self.defaultTiers)]
+        with RollupEngine._lock:
+            RollupEngine._engines.append(self)
+
+    @classmethod
+    def closeAll(cls) -> None:
+        with cls._lock:
+            engines = list(cls._engines)
+            cls._engines.clear()
+        for engine in engines:
+            engine.close()
+
+    def addSample(self, timestamp: float, measurementNames: list, values: list) -> None:
+        # Buckets are aligned to local midnight so the day tier matches the daily CSV files
+        localTime = timestamp + time.localtime(timestamp).tm_gmtoff
+        for tier in self.tiers:
+            for name, value in zip(measurementNames, values):
+                tier.add(localTime, timestamp, name, value)
+        if time.monotonic() - self.lastCheckpoint >= self.checkpointInterval:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        for tier in self.tiers:
+            tier.checkpoint()
+        self.lastCheckpoint = time.monotonic()
+
+    def getCurrent(self, tierName: str, measurementName: str) -> RollupBucket:
+        for tier in self.tiers:
+            if tier.name == tierName:
+                return tier.buckets.get(measurementName)
+        raise ValueError(f"Unknown rollup tier {tierName}")
+
+    def getTiers(self) -> list:
+        return [(tier.name, tier.resolution) for tier in self.tiers]
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            tier.close()
+        with RollupEngine._lock:
+            if self in RollupEngine._engines:
+                RollupEngine._engines.remove(self)
+
+def rollupPath(path: str, sensorName: str, tierName: str) -> str:
+    return os.path.join(path, f"{sensorName}_rollup_{tierName}.csv")
+
+def readRollup(sensorName: str, tierName: str, measurementName: str, start: float = None, end: float = None,
+               path: str = None) -> dict:
+    """Pre-aggregated series as NumPy arrays: start, count, mean, min, max."""
+    path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+    merged = {}
+    filePath = rollupPath(path, sensorName, tierName)
+    if os.path.isfile(filePath):
+        with open(filePath) as file:
+            next(file, None)
+            for line in file:
+                bucketStart, name, count, mean, low, high = line.rstrip("\n").split(",")
+                if name != measurementName:
+                    continue
+                bucketStart, count = float(bucketStart), int(count)
+                if (start is not None and bucketStart < start) or (end is not None and bucketStart >= end):
+                    continue
+                row = merged.get(bucketStart)
+                if row is None:
+                    merged[bucketStart] = [count, float(mean) * count, float(low), float(high)]
+                else:
+                    row[0] += count
+                    row[1] += float(mean) * count
+                    row[2] = min(row[2], float(low))
+                    row[3] = max(row[3], float(high))
+    starts = sorted(merged)
+    rows = np.array([merged[key] for key in starts], dtype=np.float64).reshape(-1, 4)
+    counts = rows[:, 0]
+    return {
+        "start": np.array(starts, dtype=np.float64),
+        "count": counts.astype(np.int64),
+        "mean": np.divide(rows[:, 1], counts, out=np.zeros_like(counts), where=counts > 0),
+        "min": rows[:, 2],
+        "max": rows[:, 3],
+    }
+
+atexit.register(RollupEngine.closeAll)
\ No newline at end of file
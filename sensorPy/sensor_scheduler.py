@@ -0,0 +1,118 @@
+import asyncio
+import heapq
+import math
+import time
+from sensor_utility import SensorIO
+
+class DeadlineClock:
+    """Absolute monotonic deadlines: time spent reading, printing or exporting never shifts later samples."""
+    def __init__(self, clock = time.monotonic):
+        self.clock = clock
+        self.deadline = None
+        self.period = 0.0
+        self.missed = 0
+        self.samples = 0
+        self.jitterSum = 0.0
+        self.jitterMax = 0.0
+
+    def begin(self) -> None:
+        """Anchor the clock to now unless the previous deadline is still on schedule."""
+        now = self.clock()
+        if self.deadline is None or now - self.deadline > self.period:
+            self.deadline = now
+
+    def restart(self) -> None:
+        """Re-anchor the deadline to now, e.g. after an unscheduled retry."""
+        self.deadline = self.clock()
+
+    def advance(self, period: float) -> float:
+        """Move the deadline forward by period and return the seconds left until it (0 if it already passed)."""
+        self.period = period
+        if self.deadline is None:
+            self.deadline = self.clock()
+        self.deadline += period
+        now = self.clock()
+        if now > self.deadline and period > 0:
+            # Skip the slots we cannot make any more instead of bursting to catch up
+            skipped = math.ceil((now - self.deadline) / period)
+            self.missed += skipped
+            self.deadline += skipped * period
+        return max(0.0, self.deadline - now)
+
+    def wait(self, period: float, sleep = time.sleep) -> None:
+        delay = self.advance(period)
+        if delay > 0:
+            sleep(delay)
+        self.mark()
+
+    async def waitAsync(self, period: float) -> None:
+        delay = self.advance(period)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.mark()
+
+    def mark(self) -> float:
+        """Record the wake-up jitter against the current deadline."""
+        jitter = self.clock() - self.deadline
+        self.samples += 1
+        self.jitterSum += abs(jitter)
+        self.jitterMax = max(self.jitterMax, abs(jitter))
+        return jitter
+
+    def getStatistics(self) -> dict:
+        return {
+            "samples": self.samples,
+            "missed": self.missed,
+            "meanJitter": self.jitterSum / self.samples if self.samples else 0.0,
+            "maxJitter": self.jitterMax,
+        }
+
+class SamplingScheduler:
+    """Samples several sensors at their own rates on one thread, earliest deadline first."""
+    def __init__(self, clock = time.monotonic, sleep = time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.entries = []
+
+    def add(self, sensor, rate: float, callback = None) -> float:
+        """Schedule sensor at rate [Hz], clamped to the device's minimum sampling period. Returns the period used."""
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        period = 1.0 / rate
+        if period < sensor.minSamplingPeriod:
+            SensorIO.printWarning(f"{sensor.name} cannot be sampled at {rate} Hz, using {1.0 / sensor.minSamplingPeriod:.3g} Hz")
+            period = sensor.minSamplingPeriod
+        self.entries.append((sensor, period, callback, DeadlineClock(self.clock)))
+        return period
+
+    def run(self, duration: float = None, samples: int = None) -> None:
+        """Run until duration seconds have passed or samples reads were taken (forever if both are None)."""
+        start = self.clock()
+        queue = []
+        for index, (sensor, period, callback, deadline) in enumerate(self.entries):
+            deadline.deadline = start
+            queue.append((start, index))
+        heapq.heapify(queue)
+        taken = 0
+        while queue:
+            due, index = heapq.heappop(queue)
+            if duration is not None and due - start >= duration:
+                break
+            sensor, period, callback, deadline = self.entries[index]
+            delay = due - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            deadline.mark()
+            sensor.sample()
+            if callback is not None:
+                callback(sensor)
+            taken += 1
+            if samples is not None and taken >= samples:
+                break
+            deadline.advance(period)
+            heapq.heappush(queue, (deadline.deadline, index))
+
+    def report(self) -> dict:
+        """Missed deadlines and wake-up jitter per sensor."""
+        return {sensor.name: {"period": period, **deadline.getStatistics()}
+                for sensor, period, callback, deadline in self.entries}
\ No newline at end of file
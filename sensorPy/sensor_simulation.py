@@ -0,0 +1,165 @@
+import importlib.util
+import random
+import sys
+import time
+import types
+
+class SimulationSettings:
+    """Defaults picked up by every simulated device created after they are changed."""
+    def __init__(self):
+        self.seed = None
+        self.noise = 0.0
+        self.errorRate = 0.0
+        self.noneRate = 0.0
+        self.latency = 0.0
+        self.devicesCreated = 0
+
+simulation = SimulationSettings()
+
+class SimulatedDevice:
+    """Fake device: readings are base values plus optional seeded gaussian noise.
+    A read blocks for `latency` seconds and fails with RuntimeError at `errorRate`, like a DHT checksum error."""
+    trigger = None
+    baseValues = {}
+
+    def __init__(self, seed: int = None, noise: float = None, errorRate: float = None,
+                 noneRate: float = None, latency: float = None, **baseValues):
+        seed = simulation.seed if seed is None else seed
+        # Each device gets its own stream so adding a sensor does not change the others' readings
+        self.random = random.Random(None if seed is None else seed + simulation.devicesCreated)
+        simulation.devicesCreated += 1
+        self.noise = simulation.noise if noise is None else noise
+        self.errorRate = simulation.errorRate if errorRate is None else errorRate
+        self.noneRate = simulation.noneRate if noneRate is None else noneRate
+        self.latency = simulation.latency if latency is None else latency
+        self.values = {**self.baseValues, **baseValues}
+        self.lastValues = dict(self.values)
+        self.reads = 0
+
+    def _sample(self, name: str) -> float:
+        if name == self.trigger:
+            self.reads += 1
+            if self.latency > 0:
+                time.sleep(self.latency)
+            if self.errorRate > 0 and self.random.random() < self.errorRate:
+                raise RuntimeError("Checksum did not validate. Try again.")
+            if self.noneRate > 0 and self.random.random() < self.noneRate:
+                self.lastValues = {key: None for key in self.values}
+            else:
+                self.lastValues = {key: value + self.random.gauss(0.0, self.noise) if self.noise > 0 else value
+                                   for key, value in self.values.items()}
+        return self.lastValues[name]
+
+    def exit(self) -> None:
+        pass
+
+class SimulatedDHT(SimulatedDevice):
+    trigger = "temperature"
+    baseValues = {"temperature": 21.0, "humidity": 45.0}
+
+    def __init__(self, pin = None, use_pulseio: bool = True, **options):
+        super().__init__(**options)
+        self.pin = pin
+
+    @property
+    def temperature(self) -> float:
+        return self._sample("temperature")
+
+    @property
+    def humidity(self) -> float:
+        return self._sample("humidity")
+
+class SimulatedBME280(SimulatedDevice):
+    trigger = "temperature"
+    baseValues = {"temperature": 22.0, "humidity": 40.0, "pressure": 1008.0}
+
+    def __init__(self, i2c = None, address: int = 0x77, **options):
+        super().__init__(**options)
+        self.i2c = i2c
+        self.address = address
+        self.sea_level_pressure = 1013.25
+
+    @property
+    def temperature(self) -> float:
+        return self._sample("temperature")
+
+    @property
+    def humidity(self) -> float:
+        return self._sample("humidity")
+
+    @property
+    def relative_humidity(self) -> float:
+        return self.humidity
+
+    @property
+    def pressure(self) -> float:
+        return self._sample("pressure")
+
+    @property
+    def altitude(self) -> float:
+        pressure = self.pressure
+        if pressure is None:
+            return None
+        return 44330 * (1.0 - (pressure / self.sea_level_pressure) ** 0.1903)
+
+class SimulatedSHTC3(SimulatedDevice):
+    trigger = "temperature"
+    baseValues = {"temperature": 23.0, "relative_humidity": 42.0}
+
+    def __init__(self, i2c = None, **options):
+        super().__init__(**options)
+        self.i2c = i2c
+
+    @property
+    def measurements(self) -> tuple:
+        return self._sample("temperature"), self._sample("relative_humidity")
+
+class SimulatedI2C:
+    def __init__(self, scl = None, sda = None, frequency: int = 100000):
+        self.scl = scl
+        self.sda = sda
+
+    def deinit(self) -> None:
+        pass
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+def installSimulatedHardware(seed: int = None, noise: float = 0.0, errorRate: float = 0.0,
+                             noneRate: float = 0.0, latency: float = 0.0, force: bool = False) -> list:
+    """Register simulated board/adafruit_* modules so the sensor classes import and run without hardware.
+    Real driver modules that are already importable are left alone unless force is set. Returns the names installed."""
+    simulation.seed = seed
+    simulation.noise = noise
+    simulation.errorRate = errorRate
+    simulation.noneRate = noneRate
+    simulation.latency = latency
+    simulation.devicesCreated = 0
+
+    pins = {f"D{number}": number for number in range(28)}
+    basic = _module("adafruit_bme280.basic", Adafruit_BME280_I2C=SimulatedBME280)
+    modules = {
+        "board": _module("board", I2C=SimulatedI2C, SCL="SCL", SDA="SDA", SCLK="SCLK", MOSI="MOSI", MISO="MISO", **pins),
+        "adafruit_dht": _module("adafruit_dht", DHT11=SimulatedDHT, DHT22=SimulatedDHT),
+        "adafruit_bme280": _module("adafruit_bme280", basic=basic, __path__=[]),
+        "adafruit_bme280.basic": basic,
+        "adafruit_shtc3": _module("adafruit_shtc3", SHTC3=SimulatedSHTC3),
+    }
+    installed = []
+    for name, module in modules.items():
+        if not force and name in sys.modules and not getattr(sys.modules[name], "__simulated__", False):
+            continue
+        if not force and _isImportable(name):
+            continue
+        module.__simulated__ = True
+        sys.modules[name] = module
+        installed.append(name)
+    return installed
+
+def _isImportable(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
\ No newline at end of file
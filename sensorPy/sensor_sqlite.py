@@ -0,0 +1,172 @@
+import argparse
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from sensor_utility import Colour, SensorIO, SensorSink
+
+class SQLiteSink(SensorSink):
+    """All sensors in one WAL-mode SQLite database. Rows are buffered and inserted in one transaction
+    every batchRows values (one row per measurement) or batchInterval seconds. Open sinks are closed at interpreter exit."""
+    _sinks = []
+    _sinksLock = threading.Lock()
+    insertStatement = "INSERT INTO readings (sensor, measurement, unit, timestamp, value) VALUES (?, ?, ?, ?, ?)"
+
+    def __init__(self, databasePath: str, batchRows: int = 256, batchInterval: float = 30.0):
+        self.databasePath = databasePath
+        self.batchRows = batchRows
+        self.batchInterval = batchInterval
+        self.rows = []
+        self.lastCommit = time.monotonic()
+        self.lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(databasePath))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly around each batch
+        self.connection = sqlite3.connect(databasePath, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS readings (
+            sensor TEXT NOT NULL, measurement TEXT NOT NULL, unit TEXT NOT NULL,
+            timestamp REAL NOT NULL, value REAL NOT NULL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS readings_series ON readings (sensor, measurement, timestamp)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS imported_files (path TEXT PRIMARY KEY, size INTEGER NOT NULL)")
+        with SQLiteSink._sinksLock:
+            SQLiteSink._sinks.append(self)
+
+    @classmethod
+    def closeAll(cls) -> None:
+        with cls._sinksLock:
+            sinks = list(cls._sinks)
+        for sink in sinks:
+            sink.close()
+
+    def write(self, sensorName: str, measurementNames: list, measurementData: list, units: list, timestamp: float = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            for name, value, unit in zip(measurementNames, measurementData, units):
+                self.rows.append((sensorName, name, unit, timestamp, float(value)))
+            if len(self.rows) >= self.batchRows or time.monotonic() - self.lastCommit >= self.batchInterval:
+                self._commit()
+
+    def flush(self) -> None:
+        with self.lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection is None:
+                return
+            self._commit()
+            self.connection.close()
+            self.connection = None
+        with SQLiteSink._sinksLock:
+            if self in SQLiteSink._sinks:
+                SQLiteSink._sinks.remove(self)
+
+    def _commit(self) -> None:
+        if self.rows and self.connection is not None:
+            with _Transaction(self.connection):
+                # Same SQL text every time, so sqlite3 reuses the prepared statement from its cache
+                self.connection.executemany(self.insertStatement, self.rows)
+            self.rows = []
+        self.lastCommit = time.monotonic()
+
+    def query(self, sensorName: str, measurementName: str, start: float = None, end: float = None) -> tuple:
+        """Return (timestamps, values) NumPy arrays of one series in [start, end)."""
+        self.flush()
+        rows = self.connection.execute(
+            "SELECT timestamp, value FROM readings WHERE sensor = ? AND measurement = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            (sensorName, measurementName, start if start is not None else float("-inf"), end if end is not None else float("inf"))).fetchall()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return data[:, 0], data[:, 1]
+
+    def queryLatest(self) -> dict:
+        """Most recent (timestamp, value, unit) of every sensor/measurement pair."""
+        self.flush()
+        rows = self.connection.execute(
+            """SELECT r.sensor, r.measurement, r.timestamp, r.value, r.unit FROM readings r
+               JOIN (SELECT sensor, measurement, MAX(timestamp) AS latest FROM readings GROUP BY sensor, measurement) l
+               ON r.sensor = l.sensor AND r.measurement = l.measurement AND r.timestamp = l.latest""").fetchall()
+        return {(sensor, measurement): (timestamp, value, unit) for sensor, measurement, timestamp, value, unit in rows}
+
+    def importCSVFile(self, sensorName: str, filePath: str) -> int:
+        """Bulk-load one daily CSV in a single transaction. Files already imported at the same size are skipped."""
+        match = re.search(r"(\d{4}_\d{2}_\d{2})(?:_\d+)?\.csv$", filePath)
+        if match is None:
+            return 0
+        size = os.path.getsize(filePath)
+        with self.lock:
+            self._commit()
+            known = self.connection.execute("SELECT size FROM imported_files WHERE path = ?", (filePath,)).fetchone()
+            if known is not None and known[0] == size:
+                return 0
+            midnight = time.mktime(time.strptime(match.group(1), "%Y_%m_%d"))
+            rows = []
+            with open(filePath) as file:
+                columns = [column.rstrip("]").split("[") for column in file.readline().rstrip("\n").split(",")[1:]]
+                for line in file:
+                    fields = line.rstrip("\n").split(",")
+                    if len(fields) != len(columns) + 1:
+                        continue
+                    try:
+                        hours, minutes, seconds = fields[0].split(":")
+                        timestamp = midnight + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+                        rows.extend([(sensorName, name, unit, timestamp, float(value)) for (name, unit), value in zip(columns, fields[1:])])
+                    except ValueError:
+                        # Torn row of a crashed run
+                        continue
+            with _Transaction(self.connection):
+                if known is not None:
+                    # The file grew since the last import: replace its rows, leaving other rows of the day alone
+                    self.connection.executemany("DELETE FROM readings WHERE sensor = ? AND measurement = ? AND timestamp = ?",
+                                                [(sensor, name, timestamp) for sensor, name, unit, timestamp, value in rows])
+                self.connection.executemany(self.insertStatement, rows)
+                self.connection.execute("INSERT OR REPLACE INTO imported_files (path, size) VALUES (?, ?)", (filePath, size))
+            return len(rows)
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN")
+        return self.connection
+
+    def __exit__(self, excType, excValue, traceback):
+        self.connection.execute("COMMIT" if excType is None else "ROLLBACK")
+        return False
+
+def importCSVArchive(sink: SQLiteSink, root: str) -> int:
+    """Import every <root>/<sensor>/data/<sensor>_YYYY_MM_DD[_<n>].csv into the database. Returns the rows inserted."""
+    total = 0
+    for sensorName in sorted(os.listdir(root)):
+        dataPath = os.path.join(root, sensorName, "data")
+        if not os.path.isdir(dataPath):
+            continue
+        pattern = re.compile(rf"^{re.escape(sensorName)}_\d{{4}}_\d{{2}}_\d{{2}}(?:_\d+)?\.csv$")
+        for name in sorted(os.listdir(dataPath)):
+            if pattern.match(name):
+                inserted = sink.importCSVFile(sensorName, os.path.join(dataPath, name))
+                if inserted:
+                    SensorIO.printMessage(f"Imported {inserted} values from {name}", Colour.DARK_GREY)
+                total += inserted
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Import the daily sensor CSV files into a SQLite database.")
+    parser.add_argument("database", help="SQLite database file")
+    parser.add_argument("root", nargs="?", default=os.getcwd(), help="directory holding the <sensor>/data folders")
+    args = parser.parse_args()
+    sink = SQLiteSink(args.database)
+    total = importCSVArchive(sink, args.root)
+    sink.close()
+    SensorIO.printSuccess(f"Imported {total} values into {args.database}")
+
+atexit.register(SQLiteSink.closeAll)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
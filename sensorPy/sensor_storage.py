@@ -0,0 +1,218 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+from sensor_utility import Colour, SensorIO, SensorSink
+
+class BinaryStorage:
+    """Appends fixed-width records (float64 epoch timestamp + one float per measurement) to daily chunk files.
+    When the columns change (derived channels, rejection counts), writing rolls over to a new schema version
+    with its own chunk files, so earlier records keep their layout. Like CSVWriter, records are flushed every
+    flushRows rows or flushInterval seconds, the latter also by a background thread for shared writers."""
+    _writers = {}
+    _lock = threading.Lock()
+    _flusher = None
+    flushCheckInterval = 1.0
+
+    def __init__(self, sensorName: str, path: str = None, precision = np.float32, flushRows: int = 32,
+                 flushInterval: float = 60.0):
+        self.sensorName = sensorName
+        self.path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+        self.precision = np.dtype(precision)
+        self.flushRows = flushRows
+        self.flushInterval = flushInterval
+        self.lastFlush = time.monotonic()
+        self.lock = threading.RLock()
+        self.dtype = None
+        self.fields = None
+        self.version = None
+        self.file = None
+        self.day = None
+        self.rows = []
+
+    @classmethod
+    def forSensor(cls, sensorName: str, path: str = None, **options) -> "BinaryStorage":
+        key = (sensorName, path)
+        with cls._lock:
+            storage = cls._writers.get(key)
+            if storage is None:
+                storage = cls(sensorName, path, **options)
+                cls._writers[key] = storage
+                if cls._flusher is None:
+                    cls._flusher = threading.Thread(target=cls._flushLoop, name="binary-flush", daemon=True)
+                    cls._flusher.start()
+            return storage
+
+    @classmethod
+    def closeAll(cls) -> None:
+        with cls._lock:
+            writers = list(cls._writers.values())
+            cls._writers.clear()
+        for storage in writers:
+            storage.close()
+
+    @classmethod
+    def flushDue(cls) -> None:
+        """Flush the shared writers whose buffered records have waited flushInterval seconds."""
+        with cls._lock:
+            writers = list(cls._writers.values())
+        for storage in writers:
+            with storage.lock:
+                if storage.rows and time.monotonic() - storage.lastFlush >= storage.flushInterval:
+                    try:
+                        storage.flush()
+                    except OSError as error:
+                        SensorIO.printError(f"Could not flush the binary file of {storage.sensorName}: {error}")
+
+    @classmethod
+    def _flushLoop(cls) -> None:
+        while True:
+            time.sleep(cls.flushCheckInterval)
+            cls.flushDue()
+
+    def writeRow(self, measurementNames: list, measurementData: list, units: list, timestamp: float = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        fields = [{"name": name, "unit": unit} for name, unit in zip(measurementNames, units)]
+        with self.lock:
+            if fields != self.fields:
+                self.close()
+                self.version = self._loadSchema(fields)
+                self.dtype = recordDtype(measurementNames, self.precision)
+                self.fields = fields
+            day = time.strftime("%Y_%m_%d", time.localtime(timestamp))
+            if day != self.day:
+                self.flush()
+                if self.file is not None:
+                    self.file.close()
+                os.makedirs(self.path, exist_ok=True)
+                self.file = open(chunkPath(self.path, self.sensorName, day, self.version), 'ab')
+                self.day = day
+            self.rows.append((timestamp, *measurementData))
+            if len(self.rows) >= self.flushRows or time.monotonic() - self.lastFlush >= self.flushInterval:
+                self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.file is None or not self.rows:
+                return
+            self.file.write(np.array(self.rows, dtype=self.dtype).tobytes())
+            self.file.flush()
+            self.rows = []
+            self.lastFlush = time.monotonic()
+
+    def close(self) -> None:
+        with self.lock:
+            self.flush()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                self.day = None
+
+    def _loadSchema(self, fields: list) -> int:
+        """Chunk files carry no header: the record layout lives in a schema file per sensor and version.
+        Returns the version matching fields, creating the next one if none does."""
+        versions = getSchemaVersions(self.path, self.sensorName)
+        for version in reversed(versions):
+            schema = readSchema(self.path, self.sensorName, version)
+            if schema["fields"] == fields and schema["precision"] == self.precision.str:
+                return version
+        version = versions[-1] + 1 if versions else 1
+        schema_path = schemaPath(self.path, self.sensorName, version)
+        os.makedirs(self.path, exist_ok=True)
+        with open(schema_path, 'w') as file:
+            json.dump({"fields": fields, "precision": self.precision.str}, file)
+        SensorIO.printMessage(f"New schema created: {schema_path}", Colour.DARK_GREY)
+        return version
+
+class BinarySink(SensorSink):
+    def __init__(self, path: str = None, **options):
+        self.path = path
+        self.options = options
+
+    def write(self, sensorName: str, measurementNames: list, measurementData: list, units: list, timestamp: float = None) -> None:
+        BinaryStorage.forSensor(sensorName, self.path, **self.options).writeRow(measurementNames, measurementData, units, timestamp)
+
+    def flush(self) -> None:
+        for (sensorName, path), storage in list(BinaryStorage._writers.items()):
+            if path == self.path:
+                storage.flush()
+
+class BinaryReader:
+    """Memory-maps a sensor's chunk files of one schema version (the latest by default); range queries
+    return views into the mapped records."""
+    def __init__(self, sensorName: str, path: str = None, version: int = None):
+        self.sensorName = sensorName
+        self.path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+        versions = getSchemaVersions(self.path, sensorName)
+        if not versions:
+            raise FileNotFoundError(f"No binary schema for {sensorName} in {self.path}")
+        self.version = versions[-1] if version is None else version
+        schema = readSchema(self.path, sensorName, self.version)
+        self.names = [field["name"] for field in schema["fields"]]
+        self.units = [field["unit"] for field in schema["fields"]]
+        self.dtype = recordDtype(self.names, np.dtype(schema["precision"]))
+
+    def getChunkDays(self) -> list:
+        suffix = "" if self.version == 1 else f"_v{self.version}"
+        pattern = re.compile(rf"^{re.escape(self.sensorName)}_(\d{{4}}_\d{{2}}_\d{{2}}){suffix}\.bin$")
+        return sorted(match.group(1) for match in map(pattern.match, os.listdir(self.path)) if match is not None)
+
+    def load(self, day: str) -> np.ndarray:
+        file_path = chunkPath(self.path, self.sensorName, day, self.version)
+        # A record cut short by a crash is ignored rather than misaligning the map
+        count = os.path.getsize(file_path) // self.dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(file_path, dtype=self.dtype, mode='r', shape=(count,))
+
+    def iterRange(self, start: float = None, end: float = None):
+        """Yield one zero-copy record view per chunk overlapping [start, end)."""
+        for day in self.getChunkDays():
+            dayStart = time.mktime(time.strptime(day, "%Y_%m_%d"))
+            if (end is not None and dayStart >= end) or (start is not None and dayStart + 86400 <= start):
+                continue
+            records = self.load(day)
+            timestamps = records["timestamp"]
+            first = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+            last = len(records) if end is None else np.searchsorted(timestamps, end, side='left')
+            if last > first:
+                yield records[first:last]
+
+    def query(self, start: float = None, end: float = None, measurementName: str = None) -> tuple:
+        """Return (timestamps, values) for the range; values is the record array when no measurement is named."""
+        views = list(self.iterRange(start, end))
+        if not views:
+            records = np.empty(0, dtype=self.dtype)
+        elif len(views) == 1:
+            records = views[0]
+        else:
+            records = np.concatenate(views)
+        if measurementName is None:
+            return records["timestamp"], records
+        return records["timestamp"], records[measurementName]
+
+def recordDtype(measurementNames: list, precision: np.dtype) -> np.dtype:
+    return np.dtype([("timestamp", "<f8")] + [(name, precision.newbyteorder('<')) for name in measurementNames])
+
+# Version 1 keeps the unversioned file names of the first layout
+def chunkPath(path: str, sensorName: str, day: str, version: int = 1) -> str:
+    return os.path.join(path, f"{sensorName}_{day}.bin" if version == 1 else f"{sensorName}_{day}_v{version}.bin")
+
+def schemaPath(path: str, sensorName: str, version: int = 1) -> str:
+    return os.path.join(path, f"{sensorName}_schema.json" if version == 1 else f"{sensorName}_schema_v{version}.json")
+
+def readSchema(path: str, sensorName: str, version: int = 1) -> dict:
+    with open(schemaPath(path, sensorName, version)) as file:
+        return json.load(file)
+
+def getSchemaVersions(path: str, sensorName: str) -> list:
+    pattern = re.compile(rf"^{re.escape(sensorName)}_schema(?:_v(\d+))?\.json$")
+    if not os.path.isdir(path):
+        return []
+    return sorted(int(match.group(1) or 1) for match in map(pattern.match, os.listdir(path)) if match is not None)
+
+atexit.register(BinaryStorage.closeAll)
\ No newline at end of file
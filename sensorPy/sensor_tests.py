@@ -1,96 +1,1324 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import numpy as np
 from unittest.mock import patch
-from MeassurementTypes import Temperature, RelativeHumidity, Pressure, UnitType
+from sensor import Sensor
+from sensor_acquisition import measureAll
+from sensor_scheduler import DeadlineClock, SamplingScheduler
+from sensor_measurements import Temperature, RelativeHumidity, Pressure
+from sensor_units import UnitType, unitConverter, convert_array
+from sensor_utility import CSVWriter, FsyncPolicy
+from sensor_buffer import RingBuffer
+from sensor_retry import RetryPolicy
+from sensor_rollup import RollupEngine, readRollup
+from sensor_query import CSVArchiveIndex
+from sensor_archive import ArchiveReader
+from sensor_retention import RetentionPolicy, compactSensor
+from sensor_replay import ReplaySensor, findRecordings
+from sensor_fleet import runFleet
+from sensor_sqlite import SQLiteSink, importCSVArchive
+from sensor_pipeline import Pipeline, ConvertUnits, MovingAverage, Decimate, ExportSink, Branch, Reading, Deadband
+from sensor_measurements import MeasurementType, BurstReducer, psychrometrics
+from sensor_simulation import installSimulatedHardware
+from sensor_storage import BinaryStorage, BinaryReader, getSchemaVersions
+from sensor_registry import SensorRegistry, sensorRegistry
+from sensor_i2c import I2CBus, i2cBuses
+from sensor_daemon import AcquisitionDaemon, SharedRingReader
+from sensor_metrics import MetricsExporter, MetricsServer
+from sensor_deadband import DeadbandFilter
+from sensor_pubsub import PubSubServer, TopicFilter, subscribe, encodeReading, decodeReading, _Subscriber
 
 class TestTemperature(unittest.TestCase):
     def setUp(self):
         self.temp = Temperature()
 
     def test_convert_value_to_celsius(self):
-        self.temp.setValue(25)
-        value, unit = self.temp.convert_value(self.temp.value, UnitType.Celsius)
+        self.temp.setValue(25, False)
+        value, unit = self.temp.getValue(UnitType.Celsius)
         self.assertEqual(value, 25)
         self.assertEqual(unit, UnitType.Celsius)
 
     def test_convert_value_to_fahrenheit(self):
-        self.temp.setValue(25)
-        value, unit = self.temp.convert_value(self.temp.value, UnitType.Fahrenheit)
+        self.temp.setValue(25, False)
+        value, unit = self.temp.getValue(UnitType.Fahrenheit)
         self.assertAlmostEqual(value, 77.0, places=1)
         self.assertEqual(unit, UnitType.Fahrenheit)
 
     def test_convert_value_to_kelvin(self):
-        self.temp.setValue(25)
-        value, unit = self.temp.convert_value(self.temp.value, UnitType.Kelvin)
+        self.temp.setValue(25, False)
+        value, unit = self.temp.getValue(UnitType.Kelvin)
         self.assertAlmostEqual(value, 298.15, places=2)
         self.assertEqual(unit, UnitType.Kelvin)
 
     @patch('builtins.print')
     def test_print_temperature(self, mock_print):
-        self.temp.setValue(25)
+        self.temp.setValue(25, False)
         self.temp.printValue()
-        mock_print.assert_called_with('38;5;208Temperature : 025 38;5;208[°C]0')
+        mock_print.assert_called_with('\x1b[38;5;208mTemperature          :      25.00  [°C  ]\x1b[0m')
 
 class TestRelativeHumidity(unittest.TestCase):
     def setUp(self):
         self.rh = RelativeHumidity()
 
     def test_convert_value_to_percent(self):
-        self.rh.setValue(50)
-        value, unit = self.rh.convert_value(self.rh.value, UnitType.Percent)
+        self.rh.setValue(50, False)
+        value, unit = self.rh.getValue(UnitType.Percent)
         self.assertEqual(value, 50)
         self.assertEqual(unit, UnitType.Percent)
 
     @patch('builtins.print')
     def test_print_relative_humidity(self, mock_print):
-        self.rh.setValue(50)
+        self.rh.setValue(50, False)
         self.rh.printValue()
-        mock_print.assert_called_with("Relative Humidity: 50 %")
+        mock_print.assert_called_with('\x1b[94mRelative Humidity    :      50.00  [%   ]\x1b[0m')
 
 class TestPressure(unittest.TestCase):
     def setUp(self):
         self.pressure = Pressure()
 
     def test_convert_value_to_hectopascal(self):
-        self.pressure.setValue(1013.25)
-        value, unit = self.pressure.convert_value(self.pressure.value, UnitType.Hectopascal)
+        self.pressure.setValue(1013.25, False)
+        value, unit = self.pressure.getValue(UnitType.Hectopascal)
         self.assertEqual(value, 1013.25)
         self.assertEqual(unit, UnitType.Hectopascal)
 
     def test_convert_value_to_pascal(self):
-        self.pressure.setValue(1013.25)
-        value, unit = self.pressure.convert_value(self.pressure.value, UnitType.Pascal)
-        self.assertEqual(value, 101325)
+        self.pressure.setValue(1013.25, False)
+        value, unit = self.pressure.getValue(UnitType.Pascal)
+        self.assertAlmostEqual(value, 101325)
         self.assertEqual(unit, UnitType.Pascal)
 
     def test_convert_value_to_millimeter_of_mercury(self):
-        self.pressure.setValue(1013.25)
-        value, unit = self.pressure.convert_value(self.pressure.value, UnitType.MillimeterOfMercury)
+        self.pressure.setValue(1013.25, False)
+        value, unit = self.pressure.getValue(UnitType.MillimeterOfMercury)
         self.assertAlmostEqual(value, 760.0, places=1)
         self.assertEqual(unit, UnitType.MillimeterOfMercury)
 
     def test_convert_value_to_inch_of_mercury(self):
-        self.pressure.setValue(1013.25)
-        value, unit = self.pressure.convert_value(self.pressure.value, UnitType.InchOfMercury)
+        self.pressure.setValue(1013.25, False)
+        value, unit = self.pressure.getValue(UnitType.InchOfMercury)
         self.assertAlmostEqual(value, 29.92, places=2)
         self.assertEqual(unit, UnitType.InchOfMercury)
 
     def test_convert_value_to_bar(self):
-        self.pressure.setValue(1013.25)
-        value, unit = self.pressure.convert_value(self.pressure.value, UnitType.Bar)
+        self.pressure.setValue(1013.25, False)
+        value, unit = self.pressure.getValue(UnitType.Bar)
         self.assertAlmostEqual(value, 1.01325, places=5)
         self.assertEqual(unit, UnitType.Bar)
 
     def test_convert_value_to_atmosphere(self):
-        self.pressure.setValue(1013.25)
-        value, unit = self.pressure.convert_value(self.pressure.value, UnitType.Atmosphere)
+        self.pressure.setValue(1013.25, False)
+        value, unit = self.pressure.getValue(UnitType.Atmosphere)
         self.assertAlmostEqual(value, 1.0, places=2)
         self.assertEqual(unit, UnitType.Atmosphere)
 
     @patch('builtins.print')
     def test_print_pressure(self, mock_print):
-        self.pressure.setValue(1013.25)
+        self.pressure.setValue(1013.25, False)
         self.pressure.printValue()
-        mock_print.assert_called_with("Pressure: 1013.25 hPa")
+        mock_print.assert_called_with('\x1b[38;5;141mPressure             :    1013.25  [hPa ]\x1b[0m')
+
+class FakeDHTDevice:
+    """Stands in for adafruit_dht: every property read blocks for `latency` seconds."""
+    def __init__(self, temperature, humidity, latency):
+        self._temperature = temperature
+        self._humidity = humidity
+        self.latency = latency
+
+    @property
+    def temperature(self):
+        time.sleep(self.latency)
+        return self._temperature
+
+    @property
+    def humidity(self):
+        return self._humidity
+
+class FakeSensor(Sensor):
+    def __init__(self, name, device):
+        super().__init__()
+        self.device = device
+        self.name = name
+        self.temperature = Temperature()
+        self.relativeHumidity = RelativeHumidity()
+        self.measurements = [self.temperature, self.relativeHumidity]
+
+    def _measure(self) -> list:
+        return [self.device.temperature, self.device.humidity]
+
+class TestConcurrentAcquisition(unittest.TestCase):
+    @patch('builtins.print')
+    def test_cycle_time_is_max_of_sensor_reads(self, mock_print):
+        sensors = [FakeSensor("A", FakeDHTDevice(21.0, 40.0, 0.2)),
+                   FakeSensor("B", FakeDHTDevice(22.0, 45.0, 0.3)),
+                   FakeSensor("C", FakeDHTDevice(23.0, 50.0, 0.3))]
+        start = time.monotonic()
+        asyncio.run(measureAll(sensors, burstNum=1, burstDelay=0))
+        elapsed = time.monotonic() - start
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(sensors[1].temperature.getValue(), (22.0, sensors[1].temperature.getUnit()))
+        self.assertEqual(sensors[2].relativeHumidity.getValue()[0], 50.0)
+
+    @patch('builtins.print')
+    def test_read_errors_do_not_stop_other_sensors(self, mock_print):
+        class FailingDevice(FakeDHTDevice):
+            @property
+            def temperature(self):
+                raise RuntimeError("Checksum did not validate")
+        good = FakeSensor("good", FakeDHTDevice(20.0, 30.0, 0.0))
+        bad = FakeSensor("bad", FailingDevice(0.0, 0.0, 0.0))
+        asyncio.run(measureAll([good, bad], burstNum=1, burstDelay=0))
+        self.assertEqual(good.temperature.getValue()[0], 20.0)
+        self.assertEqual(bad.temperature.getValue()[0], 0.0)
+
+    def test_sigterm_closes_the_csv_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            script = ("from sensor_simulation import installSimulatedHardware; installSimulatedHardware(); "
+                      "from BME280.sensor_bme280 import BME280; from sensor_acquisition import runConcurrently; "
+                      f"runConcurrently([BME280()], burstDelay=0.01, consolePrint=False, exportToCSV=True, csvPath={directory!r}, "
+                      f"exportToBinary=True, binaryPath={directory!r})")
+            process = subprocess.Popen([sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            deadline = time.monotonic() + 20
+            while not any(name.endswith(".bin") for name in os.listdir(directory)) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.2)
+            process.terminate()
+            self.assertEqual(process.wait(20), 128 + 15, process.stderr.read())
+            process.stderr.close()
+            # Rows still buffered when the signal arrived were written on the way out
+            csvName = next(name for name in os.listdir(directory) if name.endswith(".csv"))
+            with open(os.path.join(directory, csvName)) as file:
+                self.assertGreater(len(file.read().splitlines()), 1)
+            self.assertGreater(len(BinaryReader("BME280", directory).query()[0]), 0)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class TestDeadlineScheduling(unittest.TestCase):
+    def test_work_time_does_not_drift_deadlines(self):
+        clock = FakeClock()
+        deadline = DeadlineClock(clock)
+        deadline.begin()
+        for _ in range(10):
+            clock.now += 0.3  # read + export time
+            deadline.wait(1.0, clock.sleep)
+        self.assertAlmostEqual(clock.now, 10.0)
+        self.assertEqual(deadline.getStatistics()["missed"], 0)
+
+    def test_overrun_counts_missed_deadlines(self):
+        clock = FakeClock()
+        deadline = DeadlineClock(clock)
+        deadline.begin()
+        clock.now += 2.5
+        deadline.wait(1.0, clock.sleep)
+        self.assertEqual(deadline.missed, 2)
+        self.assertAlmostEqual(clock.now, 3.0)
+
+    @patch('builtins.print')
+    def test_scheduler_honours_minimum_sampling_period(self, mock_print):
+        clock = FakeClock()
+        scheduler = SamplingScheduler(clock, clock.sleep)
+        slow = FakeSensor("DHT22", FakeDHTDevice(20.0, 30.0, 0.0))
+        slow.minSamplingPeriod = 2.0
+        fast = FakeSensor("BME280", FakeDHTDevice(21.0, 35.0, 0.0))
+        self.assertEqual(scheduler.add(slow, 10.0), 2.0)
+        self.assertEqual(scheduler.add(fast, 2.0), 0.5)
+        scheduler.run(duration=10.0)
+        report = scheduler.report()
+        self.assertEqual(report["DHT22"]["samples"], 5)
+        self.assertEqual(report["BME280"]["samples"], 20)
+        self.assertEqual(report["BME280"]["missed"], 0)
+
+class TestCSVWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('builtins.print')
+    def test_rows_are_buffered_until_flush(self, mock_print):
+        writer = CSVWriter("DHT22", self.directory.name, flushRows=3, flushInterval=3600)
+        writer.writeRow(["T", "RH"], [21.0, 40.0], ["°C", "%"])
+        writer.writeRow(["T", "RH"], [21.5, 41.0], ["°C", "%"])
+        with open(writer.getFilePath()) as file:
+            self.assertEqual(file.read(), "timestamp,T[°C],RH[%]\n")
+        writer.writeRow(["T", "RH"], [22.0, 42.0], ["°C", "%"])
+        with open(writer.getFilePath()) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[-1].endswith(",22.00,42.00"))
+        writer.close()
+
+    @patch('builtins.print')
+    def test_idle_shared_writer_is_flushed_by_timer(self, mock_print):
+        writer = CSVWriter.forSensor("DHT22", self.directory.name, flushRows=100, flushInterval=3600)
+        self.assertTrue(CSVWriter._flusher.is_alive())
+        writer.writeRow(["T"], [21.0], ["°C"])
+        writer.writeRow(["T"], [21.5], ["°C"])
+        CSVWriter.flushDue()
+        with open(writer.getFilePath()) as file:
+            self.assertEqual(len(file.read().splitlines()), 1)
+        # No further row arrives, the timer alone writes the buffered ones once flushInterval has passed
+        writer.lastFlush -= 3600
+        CSVWriter.flushDue()
+        with open(writer.getFilePath()) as file:
+            self.assertEqual(len(file.read().splitlines()), 3)
+        CSVWriter.closeAll()
+
+    def test_shared_writer_rejects_other_settings(self):
+        writer = CSVWriter.forSensor("DHT22", self.directory.name, flushRows=8)
+        self.assertIs(CSVWriter.forSensor("DHT22", self.directory.name), writer)
+        self.assertIs(CSVWriter.forSensor("DHT22", self.directory.name, flushRows=8), writer)
+        with self.assertRaises(ValueError):
+            CSVWriter.forSensor("DHT22", self.directory.name, fsyncPolicy=FsyncPolicy.OnFlush)
+        CSVWriter.closeAll()
+
+    @patch('builtins.print')
+    def test_rollover_at_midnight(self, mock_print):
+        writer = CSVWriter("DHT22", self.directory.name)
+        midnight = time.mktime((2024, 10, 21, 0, 0, 0, 0, 0, -1))
+        writer.writeRow(["T"], [20.0], ["°C"], midnight - 1)
+        writer.writeRow(["T"], [19.0], ["°C"], midnight + 1)
+        writer.close()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["DHT22_2024_10_20.csv", "DHT22_2024_10_21.csv"])
+        with open(os.path.join(self.directory.name, "DHT22_2024_10_20.csv")) as file:
+            self.assertEqual(file.read().splitlines()[1], "23:59:59,20.00")
+
+    @patch('builtins.print')
+    def test_new_columns_start_a_new_segment(self, mock_print):
+        start = time.mktime((2024, 10, 20, 12, 0, 0, 0, 0, -1))
+        writer = CSVWriter("DHT22", self.directory.name)
+        writer.writeRow(["T", "RH"], [20.0, 50.0], ["°C", "%"], start)
+        writer.writeRow(["T", "RH", "Td"], [20.0, 50.0, 9.26], ["°C", "%", "°C"], start + 60)
+        writer.close()
+        # A later process with the original columns appends to the first segment again
+        writer = CSVWriter("DHT22", self.directory.name)
+        writer.writeRow(["T", "RH"], [21.0, 50.0], ["°C", "%"], start + 120)
+        writer.close()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["DHT22_2024_10_20.csv", "DHT22_2024_10_20_2.csv"])
+        with open(os.path.join(self.directory.name, "DHT22_2024_10_20_2.csv")) as file:
+            self.assertEqual(file.read().splitlines(), ["timestamp,T[°C],RH[%],Td[°C]", "12:01:00,20.00,50.00,9.26"])
+        index = CSVArchiveIndex("DHT22", self.directory.name)
+        self.assertEqual(index.query("T")[1].tolist(), [20.0, 20.0, 21.0])
+        self.assertEqual(index.query("Td")[1].tolist(), [9.26])
+
+class TestBinaryStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('builtins.print')
+    def test_idle_shared_storage_is_flushed_by_timer(self, mock_print):
+        storage = BinaryStorage.forSensor("BME280", self.directory.name, flushRows=100, flushInterval=3600)
+        self.assertTrue(BinaryStorage._flusher.is_alive())
+        storage.writeRow(["T"], [21.0], ["°C"])
+        BinaryStorage.flushDue()
+        self.assertEqual(BinaryReader("BME280", self.directory.name).query()[1].size, 0)
+        storage.lastFlush -= 3600
+        BinaryStorage.flushDue()
+        self.assertEqual(BinaryReader("BME280", self.directory.name).query(measurementName="T")[1].tolist(), [21.0])
+        BinaryStorage.closeAll()
+
+    @patch('builtins.print')
+    def test_range_query_returns_mapped_records(self, mock_print):
+        storage = BinaryStorage("BME280", self.directory.name, flushRows=4)
+        start = time.mktime((2024, 10, 20, 23, 59, 0, 0, 0, -1))
+        for i in range(10):
+            storage.writeRow(["T", "P"], [20.0 + i, 1000.0 + i], ["°C", "hPa"], start + 20 * i)
+        storage.close()
+        reader = BinaryReader("BME280", self.directory.name)
+        self.assertEqual(reader.getChunkDays(), ["2024_10_20", "2024_10_21"])
+        timestamps, pressure = reader.query(start + 40, start + 100, "P")
+        self.assertEqual(list(timestamps), [start + 40, start + 60, start + 80])
+        self.assertEqual(list(pressure), [1002.0, 1003.0, 1004.0])
+        timestamps, records = reader.query(start + 100)
+        self.assertEqual(len(records), 5)
+        self.assertEqual(reader.units, ["°C", "hPa"])
+
+    @patch('builtins.print')
+    def test_new_columns_roll_over_to_a_new_schema_version(self, mock_print):
+        start = time.mktime((2024, 10, 20, 12, 0, 0, 0, 0, -1))
+        storage = BinaryStorage("DHT22", self.directory.name)
+        storage.writeRow(["T", "RH"], [20.0, 50.0], ["°C", "%"], start)
+        storage.writeRow(["T", "RH", "Td"], [20.0, 50.0, 9.25], ["°C", "%", "°C"], start + 60)
+        storage.close()
+        storage = BinaryStorage("DHT22", self.directory.name)
+        storage.writeRow(["T", "RH"], [21.0, 50.0], ["°C", "%"], start + 120)
+        storage.close()
+        self.assertEqual(getSchemaVersions(self.directory.name, "DHT22"), [1, 2])
+        timestamps, dewPoint = BinaryReader("DHT22", self.directory.name).query(measurementName="Td")
+        self.assertEqual((timestamps.tolist(), dewPoint.tolist()), ([start + 60], [9.25]))
+        reader = BinaryReader("DHT22", self.directory.name, version=1)
+        self.assertEqual(reader.getChunkDays(), ["2024_10_20"])
+        self.assertEqual(reader.query(measurementName="T")[1].tolist(), [20.0, 21.0])
+
+class TestBurstStatistics(unittest.TestCase):
+    def test_ring_buffer_window_statistics(self):
+        buffer = RingBuffer(3)
+        for value in [5.0, 1.0, 3.0, 8.0]:
+            buffer.push(value)
+        self.assertEqual(buffer.values().tolist(), [1.0, 3.0, 8.0])
+        self.assertAlmostEqual(buffer.getMean(), 4.0)
+        self.assertAlmostEqual(buffer.getVariance(), 13.0)
+        self.assertEqual((buffer.getMin(), buffer.getMax()), (1.0, 8.0))
+
+    def test_burst_average_and_conversion(self):
+        temp = Temperature()
+        temp.reserveBurst(20)
+        for i in range(20):
+            temp.setValue(20.0 + i % 2, True)
+        self.assertEqual(len(temp.burstValues), 20)
+        self.assertAlmostEqual(temp.getAverageBurstValue(), 20.5)
+        self.assertAlmostEqual(temp.getAverageBurstValue(UnitType.Fahrenheit), 68.9)
+        self.assertEqual(temp.getBurstStatistics()["max"], 21.0)
+        temp.resetBurstValues()
+        self.assertEqual(temp.getAverageBurstValue(), 0.0)
+
+    @patch('builtins.print')
+    def test_print_empty_burst(self, mock_print):
+        RelativeHumidity().printBurstValues()
+        self.assertIn("0.00", mock_print.call_args[0][0])
+
+class TestRobustBurstReducers(unittest.TestCase):
+    def _burst(self, values, interval=2.0):
+        temp = Temperature()
+        for i, value in enumerate(values):
+            temp.setValue(value, True, i * interval)
+        return temp
+
+    def test_reducer_parameters_are_validated(self):
+        temp = Temperature()
+        for trimFraction in (-0.1, 0.5, 0.8):
+            with self.assertRaises(ValueError):
+                temp.setBurstReducer(BurstReducer.TrimmedMean, trimFraction=trimFraction)
+        with self.assertRaises(ValueError):
+            temp.setBurstReducer(BurstReducer.MADFilter, madThreshold=0)
+        temp.setBurstReducer(BurstReducer.TrimmedMean, trimFraction=0.0)
+        self.assertEqual(temp.reducer, BurstReducer.TrimmedMean)
+
+    @patch('builtins.print')
+    def test_burst_is_reduced_once_per_cycle(self, mock_print):
+        sensor = FakeSensor("A", FakeDHTDevice(21.0, 40.0, 0))
+        sensor.temperature.setBurstReducer(BurstReducer.Median)
+        sink = SQLiteSink(":memory:", batchRows=1)
+        sensor.addSink(sink)
+        reduce = Temperature.getReducedBurstValue
+        with patch.object(Temperature, "getReducedBurstValue", autospec=True, side_effect=reduce) as mock_reduce:
+            sensor.measure(burstNum=3, burstInterval=0, burstDelay=0, printArray=True)
+        self.assertEqual(mock_reduce.call_count, 1)
+        self.assertTrue(any("21.00" in str(call) for call in mock_print.call_args_list))
+        self.assertEqual(sink.query("A", "T")[1].tolist(), [21.0])
+        sink.close()
+
+    def test_median_and_trimmed_mean(self):
+        temp = self._burst([21.0, 21.2, 45.0, 21.1, 20.9])
+        temp.setBurstReducer(BurstReducer.Median)
+        self.assertAlmostEqual(temp.getReducedBurstValue(), 21.1)
+        temp.setBurstReducer(BurstReducer.TrimmedMean, trimFraction=0.2)
+        self.assertAlmostEqual(temp.getReducedBurstValue(), 21.1)
+        self.assertEqual(temp.rejectedCount, 0)
+
+    def test_mad_filter_rejects_spike(self):
+        temp = self._burst([21.0, 21.2, 45.0, 21.1, 20.9])
+        temp.setBurstReducer(BurstReducer.MADFilter)
+        self.assertAlmostEqual(temp.getReducedBurstValue(), 21.05)
+        self.assertEqual(temp.rejectedCount, 1)
+        self.assertAlmostEqual(temp.getReducedBurstValue(UnitType.Fahrenheit), 69.89)
+
+    def test_rate_of_change_limit(self):
+        temp = self._burst([60.0, 21.0, 21.2, 21.1, 35.0])
+        temp.setPlausibilityLimit()
+        self.assertAlmostEqual(temp.getReducedBurstValue(), 21.1)
+        self.assertEqual(temp.rejectedCount, 2)
+        slow = self._burst([21.0, 22.0, 23.0, 24.0])
+        slow.setPlausibilityLimit()
+        self.assertEqual(slow.getReducedBurstValue(), 22.5)
+        self.assertEqual(slow.rejectedCount, 0)
+
+    @patch('builtins.print')
+    def test_rejected_counts_are_exported(self, mock_print):
+        class SpikyDevice(FakeDHTDevice):
+            reads = 0
+            @property
+            def temperature(self):
+                self.reads += 1
+                return 80.0 if self.reads == 3 else 20.0
+        sensor = FakeSensor("DHT22", SpikyDevice(0.0, 50.0, 0.0))
+        sensor.minSamplingPeriod = 0.0
+        sensor.temperature.setBurstReducer(BurstReducer.MADFilter)
+        with tempfile.TemporaryDirectory() as directory:
+            sensor.measure(burstNum=5, burstInterval=0, burstDelay=0, consolePrint=False, exportToCSV=True, csvPath=directory)
+            CSVWriter.closeAll()
+            with open(os.path.join(directory, os.listdir(directory)[0])) as file:
+                header, row = file.read().splitlines()
+        self.assertEqual(header, "timestamp,T[°C],RH[%],T_rejected[n],RH_rejected[n]")
+        self.assertTrue(row.endswith(",20.00,50.00,1.00,0.00"))
+
+class TestUnitConversionTable(unittest.TestCase):
+    def test_scalar_conversions_share_the_table(self):
+        self.assertAlmostEqual(unitConverter(100.0, UnitType.Celsius, UnitType.Fahrenheit), 212.0)
+        self.assertAlmostEqual(unitConverter(212.0, UnitType.Fahrenheit, UnitType.Kelvin), 373.15)
+        self.assertAlmostEqual(unitConverter(1.0, UnitType.Atmosphere, UnitType.Hectopascal), 1013.25)
+        self.assertAlmostEqual(unitConverter(1.0, UnitType.Foot, UnitType.Inch), 12.0)
+
+    def test_convert_array(self):
+        converted = convert_array([0.0, 37.0, 100.0], UnitType.Celsius, UnitType.Fahrenheit)
+        self.assertEqual([round(value, 6) for value in converted], [32.0, 98.6, 212.0])
+        self.assertEqual(convert_array([], UnitType.Day, UnitType.Hour).shape, (0,))
+
+    def test_incompatible_units_raise(self):
+        with self.assertRaises(ValueError):
+            unitConverter(1.0, UnitType.Celsius, UnitType.Bar)
+
+class TestInstrumentation(unittest.TestCase):
+    @patch('builtins.print')
+    def test_read_outcomes_and_phases_are_counted(self, mock_print):
+        class FlakyDevice(FakeDHTDevice):
+            reads = 0
+            @property
+            def temperature(self):
+                self.reads += 1
+                if self.reads % 3 == 0:
+                    raise RuntimeError("Checksum did not validate")
+                return None if self.reads % 3 == 1 else 20.0
+        sensor = FakeSensor("flaky", FlakyDevice(0.0, 30.0, 0.0))
+        for _ in range(6):
+            sensor.sample()
+        sensor.measure(burstDelay=0)
+        snapshot = sensor.getInstrumentation()
+        self.assertEqual(snapshot["reads"], 7)
+        self.assertEqual(snapshot["successes"], 2)
+        self.assertEqual(snapshot["noneReadings"], 3)
+        self.assertEqual(snapshot["failures"], {"RuntimeError": 2})
+        self.assertEqual(snapshot["readLatency"]["count"], 7)
+        self.assertEqual(snapshot["cycles"], 1)
+        self.assertGreater(snapshot["phaseTime"]["console"], 0.0)
+        self.assertIn("meanJitter", snapshot["cycleTiming"])
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_is_exponential_and_capped(self):
+        policy = RetryPolicy(backoffFactor=2.0, maxBackoff=5.0)
+        self.assertEqual([policy.getRetryDelay(n, 1.0) for n in range(1, 6)], [1.0, 2.0, 4.0, 5.0, 5.0])
+
+    def test_delay_has_a_floor_without_sampling_period(self):
+        policy = RetryPolicy(minDelay=0.05)
+        self.assertEqual([policy.getRetryDelay(n, 0.0) for n in range(1, 4)], [0.05, 0.1, 0.2])
+        with self.assertRaises(ValueError):
+            RetryPolicy(minDelay=0)
+
+    @patch('builtins.print')
+    def test_burst_is_filled_with_good_samples(self, mock_print):
+        class AlternatingDevice(FakeDHTDevice):
+            reads = 0
+            @property
+            def temperature(self):
+                self.reads += 1
+                if self.reads % 2 == 0:
+                    raise RuntimeError("Checksum did not validate")
+                return 20.0
+        sensor = FakeSensor("DHT11", AlternatingDevice(0.0, 30.0, 0.0))
+        sensor.minSamplingPeriod = 0.001
+        sensor.setRetryPolicy(RetryPolicy(timeBudget=5.0, minDelay=0.001))
+        sensor.measure(burstNum=5, burstInterval=0.001, burstDelay=0)
+        report = sensor.lastBurstReport
+        self.assertEqual((report.good, report.attempts), (5, 9))
+        self.assertAlmostEqual(report.getSuccessRate(), 5 / 9)
+        self.assertEqual(sensor.getInstrumentation()["bursts"]["last"]["good"], 5)
+
+    @patch('builtins.print')
+    def test_time_budget_ends_a_failing_burst(self, mock_print):
+        class DeadDevice(FakeDHTDevice):
+            @property
+            def temperature(self):
+                raise RuntimeError("A full buffer was not returned")
+        sensor = FakeSensor("DHT22", DeadDevice(0.0, 0.0, 0.0))
+        sensor.minSamplingPeriod = 0.001
+        sensor.setRetryPolicy(RetryPolicy(timeBudget=0.05))
+        sensor.measure(burstNum=3, burstInterval=0.001, burstDelay=0)
+        self.assertEqual(sensor.lastBurstReport.good, 0)
+        self.assertLess(sensor.lastBurstReport.wallClock, 1.0)
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_buckets_close_and_merge_on_read(self):
+        engine = RollupEngine("BME280", self.directory.name)
+        start = time.mktime((2024, 10, 21, 10, 0, 0, 0, 0, -1))
+        for second in range(0, 150, 10):
+            engine.addSample(start + second, ["T", "P"], [20.0 + second / 10, 1000.0])
+        current = engine.getCurrent("1h", "T")
+        self.assertEqual((current.count, current.min, current.max), (15, 20.0, 34.0))
+        engine.close()
+        minutes = readRollup("BME280", "1m", "T", path=self.directory.name)
+        self.assertEqual(minutes["start"].tolist(), [start, start + 60, start + 120])
+        self.assertEqual(minutes["count"].tolist(), [6, 6, 3])
+        self.assertAlmostEqual(minutes["mean"][1], 28.5)
+        restarted = RollupEngine("BME280", self.directory.name)
+        restarted.addSample(start + 170, ["T"], [40.0])
+        restarted.close()
+        minutes = readRollup("BME280", "1m", "T", start + 120, path=self.directory.name)
+        self.assertEqual(minutes["count"].tolist(), [4])
+        self.assertEqual(minutes["max"].tolist(), [40.0])
+
+    @patch('builtins.print')
+    def test_sensor_feeds_rollups(self, mock_print):
+        sensor = FakeSensor("DHT22", FakeDHTDevice(21.0, 40.0, 0.0))
+        engine = sensor.enableRollups(self.directory.name)
+        for _ in range(3):
+            sensor.sample()
+        self.assertEqual(engine.getCurrent("1d", "RH").count, 3)
+        engine.close()
+
+    def test_open_buckets_are_checkpointed(self):
+        engine = RollupEngine("BME280", self.directory.name, checkpointInterval=0)
+        start = time.mktime((2024, 10, 21, 10, 0, 0, 0, 0, -1))
+        for second in range(0, 30, 10):
+            engine.addSample(start + second, ["T"], [20.0 + second])
+        # Without close() (a killed process) the hour so far is already on disk
+        hours = readRollup("BME280", "1h", "T", path=self.directory.name)
+        self.assertEqual((hours["count"].tolist(), hours["min"].tolist(), hours["max"].tolist()), ([3], [20.0], [40.0]))
+        self.assertAlmostEqual(hours["mean"][0], 30.0)
+        engine.close()
+        self.assertEqual(readRollup("BME280", "1h", "T", path=self.directory.name)["count"].tolist(), [3])
+
+    @patch('builtins.print')
+    def test_rollup_errors_do_not_fail_the_read(self, mock_print):
+        class BrokenEngine:
+            def addSample(self, timestamp, measurementNames, values):
+                raise OSError("No space left on device")
+        sensor = FakeSensor("DHT22", FakeDHTDevice(21.0, 40.0, 0.0))
+        sensor.rollups = BrokenEngine()
+        self.assertTrue(sensor.sample())
+        self.assertEqual(sensor.instrumentation.getFailureCount(), 0)
+
+    @patch('builtins.print')
+    def test_enabling_again_reuses_or_closes_the_engine(self, mock_print):
+        sensor = FakeSensor("DHT22", FakeDHTDevice(21.0, 40.0, 0.0))
+        engine = sensor.enableRollups(self.directory.name)
+        self.assertIs(sensor.enableRollups(self.directory.name), engine)
+        sensor.sample()
+        replacement = sensor.enableRollups(self.directory.name, (("1m", 60),))
+        self.assertIsNot(replacement, engine)
+        self.assertNotIn(engine, RollupEngine._engines)
+        # The replaced engine persisted its open day bucket
+        self.assertEqual(readRollup("DHT22", "1d", "T", path=self.directory.name)["count"].tolist(), [1])
+        replacement.close()
+
+class TestArchiveQuery(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('builtins.print')
+    def test_range_query_across_days_and_incremental_update(self, mock_print):
+        writer = CSVWriter("BME280", self.directory.name, flushRows=1)
+        start = time.mktime((2024, 10, 20, 20, 0, 0, 0, 0, -1))
+        for i in range(12):
+            writer.writeRow(["T", "P"], [20.0 + i, 1000.0 + i], ["°C", "hPa"], start + i * 3600)
+        index = CSVArchiveIndex("BME280", self.directory.name)
+        timestamps, pressure = index.query("P", start + 2 * 3600, start + 6 * 3600)
+        self.assertEqual(pressure.tolist(), [1002.0, 1003.0, 1004.0, 1005.0])
+        self.assertEqual(timestamps[0], start + 2 * 3600)
+        self.assertEqual(sorted(entry["day"] for entry in index.files.values()), ["2024_10_20", "2024_10_21"])
+        writer.writeRow(["T", "P"], [99.0, 1099.0], ["°C", "hPa"], start + 12 * 3600 + 30)
+        writer.close()
+        reloaded = CSVArchiveIndex("BME280", self.directory.name)
+        self.assertEqual(reloaded.query("T", start + 11 * 3600)[1].tolist(), [31.0, 99.0])
+        self.assertEqual(len(reloaded.query("RH")[1]), 0)
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.start = time.mktime((2024, 10, 20, 0, 0, 0, 0, 0, -1))
+        writer = CSVWriter("BME280", self.directory.name, flushRows=100)
+        with patch('builtins.print'):
+            for i in range(3 * 1440):
+                writer.writeRow(["T", "P"], [20.0 + (i % 50) * 0.01, 1000.0 + i % 7], ["°C", "hPa"], self.start + i * 60)
+            writer.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_old_days_are_compressed_and_stay_queryable(self):
+        before = CSVArchiveIndex("BME280", self.directory.name).query("T", self.start + 86000, self.start + 2 * 86400 + 600)
+        report = compactSensor("BME280", self.directory.name, RetentionPolicy(archiveAge=1), now=self.start + 3 * 86400 + 3600)
+        self.assertEqual(report["archived"], 2)
+        self.assertLess(report["bytesAfter"] * 5, report["bytesBefore"])
+        files = sorted(os.listdir(self.directory.name))
+        self.assertIn("BME280_2024_10_20.spz", files)
+        self.assertNotIn("BME280_2024_10_20.csv", files)
+        self.assertIn("BME280_2024_10_22.csv", files)
+        after = CSVArchiveIndex("BME280", self.directory.name).query("T", self.start + 86000, self.start + 2 * 86400 + 600)
+        self.assertEqual(after[0].tolist(), before[0].tolist())
+        np.testing.assert_allclose(after[1], before[1])
+
+    @patch('builtins.print')
+    def test_rollup_only_age_needs_rollups(self, mock_print):
+        policy = RetentionPolicy(archiveAge=1, rollupOnlyAge=2)
+        now = self.start + 3 * 86400 + 3600
+        self.assertEqual(compactSensor("BME280", self.directory.name, policy, now)["kept"], 1)
+        engine = RollupEngine("BME280", self.directory.name, (("1d", 86400),))
+        engine.addSample(self.start + 60, ["T", "P"], [20.0, 1000.0])
+        engine.checkpoint()
+        # A single bucket row does not cover the day's 1440 archived rows
+        self.assertEqual(compactSensor("BME280", self.directory.name, policy, now)["kept"], 1)
+        for i in range(1, 1440):
+            engine.addSample(self.start + i * 60, ["T", "P"], [20.0, 1000.0])
+        engine.close()
+        report = compactSensor("BME280", self.directory.name, policy, now)
+        self.assertEqual(report["dropped"], 1)
+        self.assertNotIn("BME280_2024_10_20.spz", os.listdir(self.directory.name))
+        self.assertEqual(readRollup("BME280", "1d", "T", path=self.directory.name)["count"].tolist(), [1440])
+
+    @patch('builtins.print')
+    def test_archive_with_wrong_times_keeps_the_csv(self, mock_print):
+        query = ArchiveReader.query
+        with patch.object(ArchiveReader, "query", lambda reader, *args: (query(reader, *args)[0] + 3600, query(reader, *args)[1])):
+            report = compactSensor("BME280", self.directory.name, RetentionPolicy(archiveAge=1), now=self.start + 3 * 86400 + 3600)
+        self.assertEqual(report["archived"], 0)
+        files = os.listdir(self.directory.name)
+        self.assertIn("BME280_2024_10_20.csv", files)
+        self.assertNotIn("BME280_2024_10_20.spz", files)
+
+class TestExportDeadband(unittest.TestCase):
+    @patch('builtins.print')
+    def test_stable_sensor_writes_only_changes_and_heartbeats(self, mock_print):
+        device = FakeDHTDevice(21.0, 40.0, 0)
+        sensor = FakeSensor("A", device)
+        exportFilter = sensor.setExportDeadband({MeasurementType.RelativeHumidity: 2.0}, maxSilence=3600)
+        sink = SQLiteSink(":memory:", batchRows=1)
+        sensor.addSink(sink)
+        temperatures = [21.0, 21.05, 21.02, 21.2, 21.2, 21.2, 21.2]
+        for temperature in temperatures:
+            device._temperature = temperature
+            sensor.measure(burstDelay=0, consolePrint=False)
+        device._humidity = 41.0
+        sensor.measure(burstDelay=0, consolePrint=False)
+        self.assertEqual(sink.query("A", "T")[1].tolist(), [21.0, 21.2])
+        self.assertEqual((exportFilter.written, exportFilter.suppressed), (2, 6))
+        self.assertEqual(sensor.getInstrumentation()["exports"]["suppressed"], 6)
+        exportFilter.lastTime -= 3600
+        sensor.measure(burstDelay=0, consolePrint=False)
+        self.assertEqual(len(sink.query("A", "T")[1]), 3)
+        sink.close()
+
+    def test_zero_deadband_suppresses_unchanged_values_and_steps_are_exact(self):
+        exportFilter = DeadbandFilter(maxSilence=None)
+        types = (MeasurementType.Distance, MeasurementType.Temperature)
+        self.assertTrue(exportFilter.accept(types, (1.5, 21.1), 0))
+        self.assertFalse(exportFilter.accept(types, (1.5, 21.1), 1))
+        self.assertTrue(exportFilter.accept(types, (1.5, 21.2), 2))
+        self.assertTrue(exportFilter.accept(types, (1.50001, 21.2), 3))
+        self.assertEqual(exportFilter.getStatistics()["suppressed"], 1)
+
+    def test_pipeline_stage(self):
+        stage = Deadband(maxSilence=None)
+        readings = [Reading(i, "A", (MeasurementType.Pressure,), (1000.0 + i * 0.04,), (UnitType.Hectopascal,)) for i in range(10)]
+        passed = [reading.values[0] for reading in Pipeline(stage).run(readings)]
+        self.assertEqual(len(passed), 4)
+        self.assertEqual(stage.filter.getStatistics()["suppressed"], 6)
+
+class TestReplaySensor(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.start = time.mktime((2024, 10, 21, 0, 0, 0, 0, 0, -1))
+        with open(os.path.join(self.directory.name, "2024-10-20_DHT22.csv"), "w") as file:
+            file.write("hour,min,sec,avg_temp,avg_hum\n23,59,00,19.50,55.00\n23,59,30,19.60,55.50\n")
+        writer = CSVWriter("DHT22", self.directory.name, flushRows=100)
+        with patch('builtins.print'):
+            for i in range(5):
+                writer.writeRow(["T", "RH"], [20.0 + i, 50.0], ["°C", "%"], self.start + i * 60)
+            writer.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replays_current_and_legacy_files_with_recorded_timestamps(self):
+        sensor = ReplaySensor.fromDirectory(self.directory.name, "DHT22", speed=None)
+        self.assertEqual(os.path.basename(sensor.recordings[0]), "2024-10-20_DHT22.csv")
+        sink = SQLiteSink(":memory:")
+        sensor.addSink(sink)
+        self.assertEqual(sensor.replay(), 7)
+        timestamps, temperatures = sink.query("DHT22", "T")
+        self.assertEqual(temperatures.tolist(), [19.5, 19.6, 20.0, 21.0, 22.0, 23.0, 24.0])
+        self.assertEqual(timestamps[0], self.start - 60)
+        self.assertEqual(timestamps[-1], self.start + 240)
+        sink.close()
+
+    def test_accelerated_playback_is_paced(self):
+        sensor = ReplaySensor(findRecordings(self.directory.name, "DHT22")[1:], speed=1200)
+        self.assertEqual(sensor.name, "DHT22")
+        start = time.monotonic()
+        sensor.replay(burstNum=2, burstInterval=0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertEqual(sensor.replayed, 5)
+
+    def test_bursts_replay_without_wall_clock_waits(self):
+        sensor = ReplaySensor(findRecordings(self.directory.name, "DHT22")[1:], speed=None)
+        start = time.monotonic()
+        sensor.replay(burstNum=3)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(sensor.replayed, 5)
+
+    @patch('builtins.print')
+    def test_recordings_missing_a_column_are_skipped(self, mock_print):
+        with open(os.path.join(self.directory.name, "DHT22_2024_10_22.csv"), "w") as file:
+            file.write("timestamp,T[°C]\n00:00:00,18.00\n")
+        sensor = ReplaySensor.fromDirectory(self.directory.name, "DHT22", speed=None)
+        self.assertEqual(sensor.replay(), 7)
+        self.assertEqual([os.path.basename(filePath) for filePath in sensor.skipped], ["DHT22_2024_10_22.csv"])
+        self.assertEqual(sensor.instrumentation.noneReadings, 0)
+
+class TestPsychrometrics(unittest.TestCase):
+    def test_reference_values(self):
+        dewPoint, heatIndex, absoluteHumidity, vapourPressureDeficit = psychrometrics([20.0, 30.0, 25.0], [50.0, 70.0, 100.0])
+        np.testing.assert_allclose(dewPoint, [9.26, 23.93, 25.0], atol=0.01)
+        # Below 80 °F the heat index stays close to the air temperature; 86 °F at 70 % feels like 95 °F
+        np.testing.assert_allclose(heatIndex, [19.36, 35.04, 26.17], atol=0.01)
+        np.testing.assert_allclose(absoluteHumidity, [8.62, 21.20, 22.98], atol=0.01)
+        np.testing.assert_allclose(vapourPressureDeficit, [1.167, 1.271, 0.0], atol=0.001)
+
+    def test_derived_channels_are_exported_and_cached(self):
+        device = FakeDHTDevice(20.0, 50.0, 0)
+        sensor = FakeSensor("A", device)
+        derived = sensor.enablePsychrometrics()
+        sink = SQLiteSink(":memory:", batchRows=1)
+        sensor.addSink(sink)
+        sensor.measure(burstNum=3, burstInterval=0, burstDelay=0, consolePrint=False)
+        sensor.measure(burstNum=3, burstInterval=0, burstDelay=0, consolePrint=False)
+        self.assertEqual(derived.computations, 1)
+        line = next(line for line in MetricsExporter([sensor]).render().decode().splitlines()
+                    if line.startswith('sensorpy_measurement{sensor="A",measurement="Dew Point"'))
+        self.assertAlmostEqual(float(line.split()[-1]), 9.26, places=2)
+        device._temperature = 30.0
+        sensor.measure(burstDelay=0, consolePrint=False)
+        self.assertEqual(derived.computations, 2)
+        np.testing.assert_allclose(sink.query("A", "Td")[1], [9.26, 9.26, 18.44], atol=0.01)
+        np.testing.assert_allclose(sink.query("A", "VPD")[1], [1.167, 1.167, 2.118], atol=0.001)
+        self.assertEqual(derived.absoluteHumidity.getUnit().getType(), UnitType.GramPerCubicMeter)
+        self.assertAlmostEqual(derived.absoluteHumidity.getValue(UnitType.KilogramPerCubicMeter)[0], 0.01514, places=5)
+        sink.close()
+
+    def test_spikes_rejected_by_the_source_channels_are_left_out(self):
+        class SpikyDevice(FakeDHTDevice):
+            reads = 0
+            @property
+            def temperature(self):
+                self.reads += 1
+                return 80.0 if self.reads == 3 else 20.0
+        sensor = FakeSensor("A", SpikyDevice(0.0, 50.0, 0))
+        sensor.temperature.setBurstReducer(BurstReducer.MADFilter)
+        derived = sensor.enablePsychrometrics()
+        sensor.measure(burstNum=5, burstInterval=0, burstDelay=0, consolePrint=False)
+        self.assertAlmostEqual(derived.dewPoint.value, 9.26, places=2)
+        self.assertAlmostEqual(derived.heatIndex.value, 19.36, places=2)
+
+    @patch('builtins.print')
+    def test_enabling_after_todays_export_keeps_both_layouts(self, mock_print):
+        sensor = FakeSensor("A", FakeDHTDevice(20.0, 50.0, 0))
+        with tempfile.TemporaryDirectory() as directory:
+            options = dict(burstDelay=0, consolePrint=False, exportToCSV=True, csvPath=directory,
+                           exportToBinary=True, binaryPath=directory)
+            sensor.measure(**options)
+            sensor.enablePsychrometrics()
+            sensor.measure(**options)
+            CSVWriter.closeAll()
+            BinaryStorage.closeAll()
+            index = CSVArchiveIndex("A", directory)
+            self.assertEqual(len(index.query("T")[1]), 2)
+            np.testing.assert_allclose(index.query("Td")[1], [9.26])
+            self.assertEqual(len(BinaryReader("A", directory, version=1).query()[0]), 1)
+            np.testing.assert_allclose(BinaryReader("A", directory).query(measurementName="Td")[1], [9.26], atol=0.01)
+
+    def test_requires_temperature_and_humidity(self):
+        sensor = FakeSensor("A", FakeDHTDevice(20.0, 50.0, 0))
+        sensor.measurements = [Pressure()]
+        with self.assertRaises(ValueError):
+            sensor.enablePsychrometrics()
+
+class TestFleetSimulator(unittest.TestCase):
+    def test_fleet_runs_through_the_acquisition_loop(self):
+        result = runFleet(20, cycles=2, burstDelay=0, latencyMedian=0.001, errorRate=0.2)
+        self.assertEqual(result["readings"] + result["failures"], 40)
+        self.assertGreater(result["failures"], 0)
+        self.assertGreater(result["memoryPerSensor"], 0)
+        self.assertGreaterEqual(result["peakMemoryPerSensor"], result["memoryPerSensor"])
+        self.assertEqual(runFleet(5, cycles=1, burstDelay=0, latencyMedian=0, traceMemory=False)["memoryPerSensor"], 0.0)
+        self.assertGreater(result["readingsPerSecond"], 0)
+        self.assertLessEqual(result["readLatencyP50"], result["readLatencyP99"])
+
+class TestStreamingPipeline(unittest.TestCase):
+    def test_stream_yields_readings(self):
+        sensor = FakeSensor("DHT22", FakeDHTDevice(25.0, 40.0, 0.0))
+        readings = list(sensor.stream(count=3))
+        self.assertEqual(len(readings), 3)
+        self.assertEqual(readings[0].getValue(MeasurementType.Temperature), 25.0)
+        self.assertEqual(readings[0].units, (UnitType.Celsius, UnitType.Percent))
+
+    @patch('builtins.print')
+    def test_failing_listener_does_not_fail_the_read(self, mock_print):
+        sensor = FakeSensor("DHT22", FakeDHTDevice(25.0, 40.0, 0.0))
+        received = []
+        def closedLoop(reading):
+            raise RuntimeError("Event loop is closed")
+        sensor.addListener(closedLoop)
+        sensor.addListener(received.append)
+        sensor.setRetryPolicy(RetryPolicy(timeBudget=1.0))
+        sensor.measure(burstNum=4, burstInterval=0, burstDelay=0, consolePrint=False)
+        self.assertEqual((sensor.lastBurstReport.good, sensor.lastBurstReport.attempts), (4, 4))
+        self.assertEqual((sensor.instrumentation.successes, sensor.instrumentation.getFailureCount()), (4, 0))
+        self.assertEqual(len(received), 4)
+
+    @patch('builtins.print')
+    def test_stages_compose_and_branch(self, mock_print):
+        class RampDevice(FakeDHTDevice):
+            @property
+            def temperature(self):
+                self._temperature += 1.0
+                return self._temperature
+        sensor = FakeSensor("DHT22", RampDevice(0.0, 50.0, 0.0))
+        with tempfile.TemporaryDirectory() as directory:
+            export = ExportSink(directory)
+            pipeline = Pipeline(Branch(Pipeline(Decimate(2), export)),
+                                MovingAverage(2),
+                                ConvertUnits({MeasurementType.Temperature: UnitType.Fahrenheit}))
+            averaged = [reading.values[0] for reading in pipeline.run(sensor.stream(count=4))]
+            self.assertEqual([round(value, 6) for value in averaged], [33.8, 34.7, 36.5, 38.3])
+            CSVWriter.closeAll()
+            with open(os.path.join(directory, os.listdir(directory)[0])) as file:
+                rows = file.read().splitlines()
+        self.assertEqual(rows[0], "timestamp,T[°C],RH[%]")
+        self.assertEqual([row.split(",")[1] for row in rows[1:]], ["2.00", "4.00"])
+
+class TestSQLiteSink(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('builtins.print')
+    def test_sensors_share_one_database(self, mock_print):
+        sink = SQLiteSink(os.path.join(self.directory.name, "sensors.db"), batchRows=100)
+        self.assertEqual(sink.connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        dht = FakeSensor("DHT22", FakeDHTDevice(21.0, 40.0, 0.0))
+        shtc = FakeSensor("SHTC3", FakeDHTDevice(23.0, 45.0, 0.0))
+        for sensor in (dht, shtc):
+            sensor.addSink(sink)
+            sensor.measure(burstDelay=0, consolePrint=False)
+        self.assertEqual(len(sink.rows), 4)
+        timestamps, values = sink.query("SHTC3", "RH")
+        self.assertEqual(values.tolist(), [45.0])
+        self.assertEqual(sink.queryLatest()[("DHT22", "T")][1:], (21.0, "°C"))
+        sink.close()
+
+    @patch('builtins.print')
+    def test_csv_archive_migration(self, mock_print):
+        writer = CSVWriter("BME280", os.path.join(self.directory.name, "BME280", "data"))
+        start = time.mktime((2024, 10, 21, 8, 0, 0, 0, 0, -1))
+        for i in range(5):
+            writer.writeRow(["T", "P"], [20.0 + i, 1000.0], ["°C", "hPa"], start + 60 * i)
+        writer.close()
+        sink = SQLiteSink(os.path.join(self.directory.name, "sensors.db"))
+        self.assertEqual(importCSVArchive(sink, self.directory.name), 10)
+        self.assertEqual(importCSVArchive(sink, self.directory.name), 0)
+        timestamps, values = sink.query("BME280", "T", start + 60, start + 180)
+        self.assertEqual(values.tolist(), [21.0, 22.0])
+        self.assertEqual(timestamps.tolist(), [start + 60, start + 120])
+        sink.close()
+
+    @patch('builtins.print')
+    def test_reimport_keeps_rows_of_the_live_sink(self, mock_print):
+        dataPath = os.path.join(self.directory.name, "BME280", "data")
+        start = time.mktime((2024, 10, 21, 8, 0, 0, 0, 0, -1))
+        writer = CSVWriter("BME280", dataPath)
+        writer.writeRow(["T"], [20.0], ["°C"], start)
+        writer.close()
+        sink = SQLiteSink(os.path.join(self.directory.name, "sensors.db"), batchRows=1)
+        importCSVArchive(sink, self.directory.name)
+        sink.write("BME280", ["T"], [25.0], ["°C"], start + 3600)
+        writer.writeRow(["T"], [21.0], ["°C"], start + 60)
+        writer.close()
+        self.assertEqual(importCSVArchive(sink, self.directory.name), 2)
+        self.assertEqual(sink.query("BME280", "T")[1].tolist(), [20.0, 21.0, 25.0])
+        sink.close()
+
+    @patch('builtins.print')
+    def test_torn_rows_are_skipped_on_import(self, mock_print):
+        dataPath = os.path.join(self.directory.name, "BME280", "data")
+        os.makedirs(dataPath)
+        with open(os.path.join(dataPath, "BME280_2024_10_21.csv"), "w") as file:
+            file.write("Time,T[°C],P[hPa]\n08:00:00,20.0,1000.0\n08:01:00,20.5,10\x0000.\n08:0,21.0,1000.0\n08:03:00,21.5,1000.0\n")
+        sink = SQLiteSink(os.path.join(self.directory.name, "sensors.db"))
+        self.assertEqual(importCSVArchive(sink, self.directory.name), 4)
+        self.assertEqual(sink.query("BME280", "T")[1].tolist(), [20.0, 21.5])
+        sink.close()
+
+    def test_open_sinks_are_closed_at_exit(self):
+        sink = SQLiteSink(os.path.join(self.directory.name, "sensors.db"), batchRows=100)
+        sink.write("A", ["T"], [20.0], ["°C"], 1.0)
+        SQLiteSink.closeAll()
+        self.assertIsNone(sink.connection)
+        reopened = SQLiteSink(os.path.join(self.directory.name, "sensors.db"))
+        self.assertEqual(reopened.query("A", "T")[1].tolist(), [20.0])
+        reopened.close()
+
+class TestSimulatedHardware(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        installSimulatedHardware()
+
+    @patch('builtins.print')
+    def test_sensor_classes_run_on_simulated_devices(self, mock_print):
+        installSimulatedHardware(seed=1)
+        import board
+        from DHT22.sensor_dht22 import DHT22
+        from BME280.sensor_bme280 import BME280
+        dht = DHT22(board.D17)
+        dht.minSamplingPeriod = 0.0
+        dht.measure(burstNum=3, burstInterval=0, burstDelay=0, consolePrint=False)
+        self.assertEqual(dht.device.reads, 3)
+        bme = BME280()
+        bme.measure(burstDelay=0, consolePrint=False)
+        self.assertEqual(bme.pressure.getValue()[0], 1008.0)
+        self.assertGreater(bme.altitude.getValue()[0], 0.0)
+
+    def test_seeded_noise_and_error_rate(self):
+        installSimulatedHardware(seed=7, noise=0.5, errorRate=0.3)
+        import adafruit_dht
+        first = self._read(adafruit_dht.DHT22(None))
+        installSimulatedHardware(seed=7, noise=0.5, errorRate=0.3)
+        second = self._read(adafruit_dht.DHT22(None))
+        self.assertEqual(first, second)
+        self.assertTrue(0 < first.count(None) < 200)
+
+    def _read(self, device):
+        readings = []
+        for _ in range(200):
+            try:
+                readings.append(device.temperature)
+            except RuntimeError:
+                readings.append(None)
+        return readings
+
+class TestLazyInitialization(unittest.TestCase):
+    @patch('builtins.print')
+    def test_device_is_created_on_first_read(self, mock_print):
+        installSimulatedHardware(seed=2)
+        bme = sensorRegistry.create("BME280")
+        self.assertIsNone(bme._device)
+        bme.setSeaLevelPressure(1000.0)
+        bme.measure(burstDelay=0, consolePrint=False)
+        self.assertIsNotNone(bme._device)
+        self.assertEqual(bme.device.sea_level_pressure, 1000.0)
+
+    @patch('builtins.print')
+    def test_missing_bus_only_fails_reads(self, mock_print):
+        sensor = sensorRegistry.create("SHTC3")
+        with patch.object(type(sensor), "_createDevice", side_effect=ValueError("No I2C device at address")):
+            self.assertFalse(sensor.sample())
+            self.assertFalse(sensor.sample())
+        self.assertEqual(sensor.instrumentation.getFailureCount(), 2)
+        self.assertIsNone(sensor._device)
+
+    def test_registry_imports_on_demand(self):
+        registry = SensorRegistry()
+        registry.register("Fake", "sensor_tests", "FakeSensor")
+        self.assertIs(registry.getClass("Fake"), FakeSensor)
+        with self.assertRaises(ValueError):
+            registry.create("BMP180")
+
+class TestI2CBusManager(unittest.TestCase):
+    @patch('builtins.print')
+    def test_i2c_sensors_share_one_bus(self, mock_print):
+        installSimulatedHardware(seed=3)
+        bme = sensorRegistry.create("BME280")
+        shtc3 = sensorRegistry.create("SHTC3")
+        self.assertTrue(bme.sample())
+        self.assertTrue(shtc3.sample())
+        self.assertIs(bme.bus, shtc3.bus)
+        self.assertIs(bme.bus, i2cBuses.getBus())
+        self.assertIn("0x70", bme.bus.getStatistics()["devices"])
+
+    def test_transactions_do_not_interleave(self):
+        bus = I2CBus(object(), "test")
+        active, overlaps = [0], []
+
+        def worker(address):
+            for _ in range(200):
+                with bus.transaction(address):
+                    active[0] += 1
+                    if active[0] > 1:
+                        overlaps.append(address)
+                    time.sleep(0)
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=worker, args=(address,)) for address in (0x70, 0x76, 0x77)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        statistics = bus.getStatistics()
+        self.assertEqual(overlaps, [])
+        self.assertEqual(statistics["transactions"], 600)
+        self.assertEqual(sorted(statistics["devices"]), ["0x70", "0x76", "0x77"])
+
+class FakeBME280Registers:
+    """Register-level stand-in for the Adafruit driver, with the calibration example of the BME280 datasheet."""
+    def __init__(self):
+        self._temp_calib = [27504, 26435, -1000]
+        self._pressure_calib = [36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000]
+        self._humidity_calib = [75, 362, 0, 313, 50, 30]
+        self.overscan_temperature = self.overscan_pressure = self.overscan_humidity = 0
+        self.sea_level_pressure = 1013.25
+        self.modeWrites = []
+        self.dataReads = 0
+
+    @property
+    def mode(self):
+        return self.modeWrites[-1] if self.modeWrites else 0
+
+    @mode.setter
+    def mode(self, value):
+        self.modeWrites.append(value)
+
+    def _write_ctrl_meas(self):
+        pass
+
+    def _read_register(self, register, length):
+        if register == 0xF3:
+            return bytearray([0x00])
+        self.dataReads += 1
+        return bytearray([0x65, 0x5A, 0xC0, 0x7E, 0xED, 0x00, 0x6A, 0x3F])
+
+class TestBME280BulkRead(unittest.TestCase):
+    def _sensor(self, **options):
+        from BME280.sensor_bme280 import BME280
+        sensor = BME280(object(), **options)
+        sensor.bus = i2cBuses.getBus(sensor.pin)
+        sensor.device = FakeBME280Registers()
+        return sensor
+
+    def test_one_register_burst_per_sample(self):
+        sensor = self._sensor(pressureOversampling=1)
+        temperature, humidity, pressure, altitude = sensor._measure()
+        self.assertEqual(temperature, 25.08)
+        self.assertEqual(pressure, 1006.53)
+        self.assertTrue(0.0 < humidity < 100.0)
+        self.assertAlmostEqual(altitude, 44330 * (1.0 - (1006.5326 / 1013.25) ** 0.1903), places=1)
+        self.assertEqual(sensor.device.dataReads, 1)
+        self.assertEqual(sensor.device.modeWrites, [0x01])
+
+    def test_oversampling_and_mode_configuration(self):
+        sensor = self._sensor()
+        sensor.setOversampling(temperature=2, pressure=4, humidity=0)
+        self.assertEqual((sensor.device.overscan_temperature, sensor.device.overscan_pressure,
+                          sensor.device.overscan_humidity), (2, 3, 0))
+        self.assertAlmostEqual(sensor.getMeasurementTime(), (1.25 + 4.6 + 9.2 + 0.575) / 1000)
+        sensor.setForcedMode(False)
+        self.assertEqual(sensor.device.mode, 0x03)
+        sensor._measure()
+        self.assertEqual(sensor.device.modeWrites[-1], 0x03)
+        with self.assertRaises(ValueError):
+            sensor.setOversampling(pressure=3)
+
+class TestSharedMemoryDaemon(unittest.TestCase):
+    def setUp(self):
+        self.sensors = [FakeSensor("A", FakeDHTDevice(21.0, 40.0, 0)), FakeSensor("B", FakeDHTDevice(22.0, 45.0, 0))]
+        # Virtual time: a slow test machine must not make the scheduler skip deadlines and reorder the sensors
+        clock = FakeClock()
+        self.daemon = AcquisitionDaemon(self.sensors, f"sensorPyTest{os.getpid()}", capacity=8, rate=1000.0,
+                                        scheduler=SamplingScheduler(clock, clock.sleep))
+
+    def tearDown(self):
+        self.daemon.close()
+
+    def test_readers_see_every_reading_in_order(self):
+        reader = SharedRingReader(self.daemon.ring.memory.name)
+        self.daemon.run(samples=6)
+        readings = reader.read()
+        self.assertEqual([reading.sensorName for reading in readings], ["A", "B"] * 3)
+        self.assertEqual(readings[1].getValue(MeasurementType.RelativeHumidity), 45.0)
+        self.assertEqual(readings[0].units, self.sensors[0].lastReading.units)
+        self.assertEqual(reader.read(), [])
+        reader.close()
+
+    def test_slow_reader_skips_ahead(self):
+        reader = SharedRingReader(self.daemon.ring.memory.name)
+        self.daemon.run(samples=20)
+        records = reader.readSlots()
+        self.assertEqual(records["seq"].tolist(), list(range(13, 21)))
+        self.assertEqual(reader.dropped, 12)
+        reader.close()
+
+    def test_reader_in_another_process(self):
+        self.daemon.run(samples=4)
+        script = ("from sensor_daemon import SharedRingReader; "
+                  f"reader = SharedRingReader('{self.daemon.ring.memory.name}', fromStart=True); "
+                  "print(len(reader.read())); reader.close()")
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), "4", result.stderr)
+
+class TestPubSub(unittest.TestCase):
+    def _reading(self, sensorName="A", temperature=21.5):
+        return Reading(1700000000.25, sensorName, (MeasurementType.Temperature, MeasurementType.RelativeHumidity),
+                       (temperature, 40.0), (UnitType.Celsius, UnitType.Percent))
+
+    def test_framing_round_trip(self):
+        frame = encodeReading(self._reading(), dropped=3)
+        self.assertEqual(int.from_bytes(frame[:4], "big"), len(frame) - 4)
+        self.assertEqual(decodeReading(frame[4:]), (self._reading(), 3))
+
+    def test_topic_filter(self):
+        reading = self._reading()
+        self.assertEqual(TopicFilter(["A/RH"]).select(reading).values, (40.0,))
+        self.assertEqual(TopicFilter(["*/T", "B/*"]).select(reading).getSymbols(), ["T"])
+        self.assertIs(TopicFilter(["A"]).select(reading), reading)
+        self.assertIsNone(TopicFilter(["B/T"]).select(reading))
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def offer():
+            subscriber = _Subscriber(None, TopicFilter(), 2)
+            for temperature in range(5):
+                subscriber.offer(self._reading(temperature=float(temperature)))
+            return subscriber
+        subscriber = asyncio.run(offer())
+        self.assertEqual(subscriber.dropped, 3)
+        self.assertEqual([reading.values[0] for reading in subscriber.queue], [3.0, 4.0])
+
+    def test_subscribers_receive_filtered_readings(self):
+        sensors = [FakeSensor("A", FakeDHTDevice(21.0, 40.0, 0)), FakeSensor("B", FakeDHTDevice(22.0, 45.0, 0))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "readings.sock")
+
+            async def run():
+                server = PubSubServer(path)
+                await server.start()
+                for sensor in sensors:
+                    server.attach(sensor)
+                stream = subscribe(path, ["B/T"])
+                received = asyncio.ensure_future(stream.__anext__())
+                while not server.subscribers:
+                    await asyncio.sleep(0.01)
+                for sensor in sensors:
+                    await asyncio.get_running_loop().run_in_executor(None, sensor.sample)
+                reading, dropped = await asyncio.wait_for(received, 5)
+                await stream.aclose()
+                await server.close()
+                return reading, dropped
+
+            reading, dropped = asyncio.run(run())
+        self.assertEqual((reading.sensorName, reading.values, dropped), ("B", (22.0,), 0))
+
+    def test_closing_the_server_cancels_the_subscriber_tasks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "readings.sock")
+
+            async def run():
+                server = PubSubServer(path)
+                await server.start()
+                stream = subscribe(path)
+                received = asyncio.ensure_future(stream.__anext__())
+                while not server.subscribers:
+                    await asyncio.sleep(0.01)
+                task = next(iter(server.subscribers)).task
+                await server.close()
+                await asyncio.wait([task], timeout=5)
+                received.cancel()
+                await asyncio.gather(received, return_exceptions=True)
+                await stream.aclose()
+                return task, server.subscribers
+
+            task, subscribers = asyncio.run(run())
+        self.assertTrue(task.cancelled())
+        self.assertEqual(subscribers, set())
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.sensor = FakeSensor("A", FakeDHTDevice(21.5, 40.0, 0))
+        self.exporter = MetricsExporter([self.sensor])
+
+    @patch('builtins.print')
+    def test_exposition_format(self, mock_print):
+        self.assertNotIn(b"sensorpy_measurement{", self.exporter.render())
+        self.sensor.sample()
+        self.sensor.sample()
+        page = self.exporter.render().decode()
+        self.assertIn('sensorpy_measurement{sensor="A",measurement="Temperature",symbol="T",unit="°C"} 21.5', page)
+        self.assertIn('sensorpy_reads_total{sensor="A",outcome="success"} 2', page)
+        self.assertIn('sensorpy_read_latency_seconds_bucket{sensor="A",le="+Inf"} 2', page)
+        self.assertIn('sensorpy_read_latency_seconds_count{sensor="A"} 2', page)
+        self.assertIn("# TYPE sensorpy_read_latency_seconds histogram", page)
+
+    def test_burst_cycles_report_the_reduced_value(self):
+        self.sensor.measure(burstNum=3, burstInterval=0, burstDelay=0, consolePrint=False)
+        page = self.exporter.render().decode()
+        self.assertIn('sensorpy_measurement{sensor="A",measurement="Temperature",symbol="T",unit="°C"} 21.5', page)
+        self.sensor.device._temperature = 22.5
+        self.sensor.measure(burstNum=3, burstInterval=0, burstDelay=0, consolePrint=False)
+        page = self.exporter.render().decode()
+        self.assertIn('sensorpy_measurement{sensor="A",measurement="Temperature",symbol="T",unit="°C"} 22.5', page)
+
+    @patch('builtins.print')
+    def test_special_float_values(self, mock_print):
+        self.sensor.sample()
+        for value, token in ((float("nan"), "NaN"), (float("inf"), "+Inf"), (float("-inf"), "-Inf"), (np.float64(21.25), "21.25")):
+            self.sensor.temperature.value = value
+            self.sensor.instrumentation.generation += 1
+            page = self.exporter.render().decode()
+            self.assertIn(f'sensorpy_measurement{{sensor="A",measurement="Temperature",symbol="T",unit="°C"}} {token}\n', page)
+
+    @patch('builtins.print')
+    def test_render_is_cached_until_values_change(self, mock_print):
+        self.sensor.sample()
+        first = self.exporter.render()
+        self.assertIs(self.exporter.render(), first)
+        self.assertEqual(self.exporter.renders, 1)
+        self.sensor.sample()
+        self.exporter.render()
+        self.assertEqual(self.exporter.renders, 2)
+
+    @patch('builtins.print')
+    def test_http_scrape(self, mock_print):
+        self.sensor.sample()
+
+        async def scrape():
+            server = MetricsServer(self.exporter, "127.0.0.1", 0)
+            await server.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            await server.close()
+            return response
+
+        response = asyncio.run(scrape())
+        self.assertTrue(response.startswith(b"HTTP/1.0 200 OK"))
+        self.assertTrue(response.endswith(self.exporter.render()))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from enum import Enum
 from abc import ABC, abstractmethod
+import numpy as np
 
 class UnitType(Enum):
     # Temperature
@@ -32,6 +33,9 @@ class UnitType(Enum):
     Minute = ("Minute", "min", 23)
     Hour = ("Hour", "h", 24)
     Day = ("Day", "d", 25)
+    # Absolute Humidity
+    GramPerCubicMeter = ("Gram per Cubic Meter", "g/m³", 26)
+    KilogramPerCubicMeter = ("Kilogram per Cubic Meter", "kg/m³", 27)
     # None
     TypeNone= ("TypeNone", "TypeNone", 0)
 
@@ -45,6 +49,56 @@ class UnitType(Enum):
         return self.value[2]
     
     
+class UnitConversionTable:
+    """Every conversion here is affine, so each (source, target) pair is precomputed as target = value * scale + offset."""
+    # (unit, scale, offset) such that base = value * scale + offset, grouped by dimension with the base unit first
+    dimensions = [
+        [(UnitType.Celsius, 1.0, 0.0), (UnitType.Fahrenheit, 5 / 9, -32 * 5 / 9), (UnitType.Kelvin, 1.0, -273.15)],
+        [(UnitType.Percent, 1.0, 0.0)],
+        [(UnitType.Pascal, 1.0, 0.0), (UnitType.Hectopascal, 100.0, 0.0), (UnitType.Kilopascal, 1000.0, 0.0),
+         (UnitType.MillimeterOfMercury, 133.322, 0.0), (UnitType.InchOfMercury, 3386.39, 0.0),
+         (UnitType.Bar, 100000.0, 0.0), (UnitType.Atmosphere, 101325.0, 0.0), (UnitType.PSI, 6894.76, 0.0)],
+        [(UnitType.Meter, 1.0, 0.0), (UnitType.Kilometer, 1000.0, 0.0), (UnitType.Centimeter, 0.01, 0.0),
+         (UnitType.Millimeter, 0.001, 0.0), (UnitType.Inch, 0.0254, 0.0), (UnitType.Foot, 0.3048, 0.0),
+         (UnitType.Yard, 0.9144, 0.0)],
+        [(UnitType.Microsecond, 1e-6, 0.0), (UnitType.Millisecond, 1e-3, 0.0), (UnitType.Second, 1.0, 0.0),
+         (UnitType.Minute, 60.0, 0.0), (UnitType.Hour, 3600.0, 0.0), (UnitType.Day, 86400.0, 0.0)],
+        [(UnitType.GramPerCubicMeter, 1.0, 0.0), (UnitType.KilogramPerCubicMeter, 1000.0, 0.0)],
+    ]
+
+    def __init__(self):
+        self.transforms = {}
+        self.compatible = {}
+        for dimension in self.dimensions:
+            units = [unit for unit, scale, offset in dimension]
+            for source, sourceScale, sourceOffset in dimension:
+                self.compatible[source] = units
+                for target, targetScale, targetOffset in dimension:
+                    self.transforms[(source, target)] = (sourceScale / targetScale, (sourceOffset - targetOffset) / targetScale)
+
+    def getTransform(self, fromType: UnitType, toType: UnitType) -> tuple:
+        transform = self.transforms.get((fromType, toType))
+        if transform is None:
+            raise ValueError(f"Conversion from {fromType} to {toType} is not supported.")
+        return transform
+
+    def getCompatibleUnits(self, unitType: UnitType) -> list:
+        return self.compatible.get(unitType, [])
+
+    def convert(self, value: float, fromType: UnitType, toType: UnitType) -> float:
+        scale, offset = self.getTransform(fromType, toType)
+        return value * scale + offset
+
+    def convert_array(self, values, fromType: UnitType, toType: UnitType) -> np.ndarray:
+        """Convert a whole array or sequence in one vectorized operation."""
+        scale, offset = self.getTransform(fromType, toType)
+        values = np.asarray(values, dtype=np.float64)
+        if offset == 0.0:
+            return values * scale
+        return values * scale + offset
+
+conversionTable = UnitConversionTable()
+
 class UnitBase(ABC):
     def __init__(self):
         self._type = UnitType.TypeNone
@@ -58,9 +112,15 @@ class UnitBase(ABC):
     def getName(self) -> str:
         return self._type.getName()
 
-    @abstractmethod
     def convert_value(self, value: float, target_unit: UnitType) -> tuple:
-        pass
+        if (self._type, target_unit) not in conversionTable.transforms:
+            self._throwUnsupportedUnitError(target_unit, conversionTable.getCompatibleUnits(self._type))
+        return conversionTable.convert(value, self._type, target_unit), target_unit
+
+    def convert_array(self, values, target_unit: UnitType) -> np.ndarray:
+        if (self._type, target_unit) not in conversionTable.transforms:
+            self._throwUnsupportedUnitError(target_unit, conversionTable.getCompatibleUnits(self._type))
+        return conversionTable.convert_array(values, self._type, target_unit)
     
     def _throwUnsupportedUnitError(self, target_unit: UnitType, supported_units: list):
         raise ValueError(f"Conversion to {target_unit} is not supported. Supported units are {supported_units}.")
@@ -70,241 +130,41 @@ class TemperatureUnit(UnitBase):
         super().__init__() 
         self._type = UnitType.Celsius
 
-    def convert_value(self, value: float, target_unit: UnitType) -> tuple:
-        if target_unit == UnitType.Celsius:
-            return value, target_unit
-        elif target_unit == UnitType.Fahrenheit:
-            return value * 9/5 + 32, target_unit
-        elif target_unit == UnitType.Kelvin:
-            return value + 273.15, target_unit
-        else:
-            self._throwUnsupportedUnitError(target_unit, [UnitType.Celsius, UnitType.Fahrenheit, UnitType.Kelvin])
-
 class RelativeHumidityUnit(UnitBase):
     def __init__(self):
         super().__init__() 
         self._type = UnitType.Percent
 
-    def convert_value(self, value: float, target_unit: UnitType) -> tuple:
-        if target_unit == UnitType.Percent:
-            return value, target_unit
-        else:
-            self._throwUnsupportedUnitError(target_unit, [UnitType.Percent])
-
 class PressureUnit(UnitBase):
     def __init__(self):
         super().__init__() 
         self._type = UnitType.Hectopascal
 
-    def convert_value(self, value: float, target_unit: UnitType) -> tuple:
-        if target_unit == UnitType.Pascal:
-            return value, target_unit
-        elif target_unit == UnitType.Hectopascal:
-            return value / 100, target_unit
-        elif target_unit == UnitType.Kilopascal:
-            return value / 1000, target_unit
-        elif target_unit == UnitType.MillimeterOfMercury:
-            return value / 133.322, target_unit
-        elif target_unit == UnitType.InchOfMercury:
-            return value / 3386.39, target_unit
-        elif target_unit == UnitType.Bar:
-            return value / 100000, target_unit
-        elif target_unit == UnitType.Atmosphere:
-            return value / 101325, target_unit
-        elif target_unit == UnitType.PSI:
-            return value / 6894.76, target_unit
-        else:
-            self._throwUnsupportedUnitError(target_unit, [UnitType.Pascal, UnitType.Hectopascal, UnitType.Kilopascal, UnitType.MillimeterOfMercury, UnitType.InchOfMercury, UnitType.Bar, UnitType.Atmosphere, UnitType.PSI])
-
 class DistanceUnit(UnitBase):
     def __init__(self):
         super().__init__() 
         self._type = UnitType.Meter
 
-    def convert_value(self, value: float, target_unit: UnitType) -> tuple:
-        if target_unit == UnitType.Meter:
-            return value, target_unit
-        elif target_unit == UnitType.Kilometer:
-            return value / 1000, target_unit
-        elif target_unit == UnitType.Centimeter:
-            return value * 100, target_unit
-        elif target_unit == UnitType.Millimeter:
-            return value * 1000, target_unit
-        elif target_unit == UnitType.Inch:
-            return value * 39.3701, target_unit
-        elif target_unit == UnitType.Foot:
-            return value * 3.28084, target_unit
-        elif target_unit == UnitType.Yard:
-            return value * 1.09361, target_unit
-        else:
-            self._throwUnsupportedUnitError(target_unit, [UnitType.Meter, UnitType.Kilometer, UnitType.Centimeter, UnitType.Millimeter, UnitType.Inch, UnitType.Foot, UnitType.Yard])
-
 class TimeUnit(UnitBase):
     def __init__(self):
         super().__init__() 
         self._type = UnitType.Second
 
-    def convert_value(self, value: float, target_unit: UnitType) -> tuple:
-        if target_unit == UnitType.Microsecond:
-            return value * 1000000, target_unit
-        elif target_unit == UnitType.Millisecond:
-            return value * 1000, target_unit
-        elif target_unit == UnitType.Second:
-            return value, target_unit
-        elif target_unit == UnitType.Minute:
-            return value / 60, target_unit
-        elif target_unit == UnitType.Hour:
-            return value / 3600, target_unit
-        elif target_unit == UnitType.Day:
-            return value / 86400, target_unit
-        else:
-            self._throwUnsupportedUnitError(target_unit, [UnitType.Microsecond, UnitType.Millisecond, UnitType.Second, UnitType.Minute, UnitType.Hour, UnitType.Day])
+class AbsoluteHumidityUnit(UnitBase):
+    def __init__(self):
+        super().__init__()
+        self._type = UnitType.GramPerCubicMeter
+
+class VapourPressureUnit(UnitBase):
+    """Vapour pressures are small next to the air pressure, so they default to kPa instead of hPa."""
+    def __init__(self):
+        super().__init__()
+        self._type = UnitType.Kilopascal
 
 
 
 def unitConverter(value: float, fromType: UnitType, toType: UnitType) -> float:
-    converter = {
-        # Temperature
-        (UnitType.Celsius, UnitType.Fahrenheit): lambda x: x * 9/5 + 32,
-        (UnitType.Celsius, UnitType.Kelvin): lambda x: x + 273.15,
-        (UnitType.Fahrenheit, UnitType.Celsius): lambda x: (x - 32) * 5/9,
-        (UnitType.Fahrenheit, UnitType.Kelvin): lambda x: (x - 32) * 5/9 + 273.15,
-        (UnitType.Kelvin, UnitType.Celsius): lambda x: x - 273.15,
-        (UnitType.Kelvin, UnitType.Fahrenheit): lambda x: (x - 273.15) * 9/5 + 32,
-        # Pressure
-        (UnitType.Pascal, UnitType.Hectopascal): lambda x: x / 100,
-        (UnitType.Pascal, UnitType.Kilopascal): lambda x: x / 1000,
-        (UnitType.Pascal, UnitType.MillimeterOfMercury): lambda x: x / 133.322,
-        (UnitType.Pascal, UnitType.InchOfMercury): lambda x: x / 3386.39,
-        (UnitType.Pascal, UnitType.Bar): lambda x: x / 100000,
-        (UnitType.Pascal, UnitType.Atmosphere): lambda x: x / 101325,
-        (UnitType.Pascal, UnitType.PSI): lambda x: x / 6894.76,
-        (UnitType.Hectopascal, UnitType.Pascal): lambda x: x * 100,
-        (UnitType.Hectopascal, UnitType.Kilopascal): lambda x: x / 10,
-        (UnitType.Hectopascal, UnitType.MillimeterOfMercury): lambda x: x / 1.33322,
-        (UnitType.Hectopascal, UnitType.InchOfMercury): lambda x: x / 33.8639,
-        (UnitType.Hectopascal, UnitType.Bar): lambda x: x / 1000,
-        (UnitType.Hectopascal, UnitType.Atmosphere): lambda x: x / 1013.25,
-        (UnitType.Hectopascal, UnitType.PSI): lambda x: x / 68.9476,
-        (UnitType.Kilopascal, UnitType.Pascal): lambda x: x * 1000,
-        (UnitType.Kilopascal, UnitType.Hectopascal): lambda x: x * 10,
-        (UnitType.Kilopascal, UnitType.MillimeterOfMercury): lambda x: x * 7.50062,
-        (UnitType.Kilopascal, UnitType.InchOfMercury): lambda x: x / 3.38639,
-        (UnitType.Kilopascal, UnitType.Bar): lambda x: x / 100,
-        (UnitType.Kilopascal, UnitType.Atmosphere): lambda x: x / 101.325,
-        (UnitType.Kilopascal, UnitType.PSI): lambda x: x / 6.89476,
-        (UnitType.MillimeterOfMercury, UnitType.Pascal): lambda x: x * 133.322,
-        (UnitType.MillimeterOfMercury, UnitType.Hectopascal): lambda x: x * 1.33322,
-        (UnitType.MillimeterOfMercury, UnitType.Kilopascal): lambda x: x / 7.50062,
-        (UnitType.MillimeterOfMercury, UnitType.InchOfMercury): lambda x: x / 25.4,
-        (UnitType.MillimeterOfMercury, UnitType.Bar): lambda x: x / 750.062,
-        (UnitType.MillimeterOfMercury, UnitType.Atmosphere): lambda x: x / 760,
-        (UnitType.MillimeterOfMercury, UnitType.PSI): lambda x: x / 51.7149,
-        (UnitType.InchOfMercury, UnitType.Pascal): lambda x: x * 3386.39,
-        (UnitType.InchOfMercury, UnitType.Hectopascal): lambda x: x * 33.8639,
-        (UnitType.InchOfMercury, UnitType.Kilopascal): lambda x: x * 3.38639,
-        (UnitType.InchOfMercury, UnitType.MillimeterOfMercury): lambda x: x * 25.4,
-        (UnitType.InchOfMercury, UnitType.Bar): lambda x: x / 29.53,
-        (UnitType.InchOfMercury, UnitType.Atmosphere): lambda x: x / 29.9213,
-        (UnitType.InchOfMercury, UnitType.PSI): lambda x: x / 2.03602,
-        (UnitType.Bar, UnitType.Pascal): lambda x: x * 100000,
-        (UnitType.Bar, UnitType.Hectopascal): lambda x: x * 1000,
-        (UnitType.Bar, UnitType.Kilopascal): lambda x: x * 100,
-        (UnitType.Bar, UnitType.MillimeterOfMercury): lambda x: x * 750.062,
-        (UnitType.Bar, UnitType.InchOfMercury): lambda x: x * 29.53,
-        (UnitType.Bar, UnitType.Atmosphere): lambda x: x / 1.01325,
-        (UnitType.Bar, UnitType.PSI): lambda x: x * 14.5038,
-        (UnitType.Atmosphere, UnitType.Pascal): lambda x: x * 101325,
-        (UnitType.Atmosphere, UnitType.Hectopascal): lambda x: x * 1013.25,
-        (UnitType.Atmosphere, UnitType.Kilopascal): lambda x: x * 101.325,
-        (UnitType.Atmosphere, UnitType.MillimeterOfMercury): lambda x: x * 760,
-        (UnitType.Atmosphere, UnitType.InchOfMercury): lambda x: x * 29.9213,
-        (UnitType.Atmosphere, UnitType.Bar): lambda x: x * 1.01325,
-        (UnitType.Atmosphere, UnitType.PSI): lambda x: x * 14.696,
-        (UnitType.PSI, UnitType.Pascal): lambda x: x * 6894.76,
-        (UnitType.PSI, UnitType.Hectopascal): lambda x: x * 68.9476,
-        (UnitType.PSI, UnitType.Kilopascal): lambda x: x * 6.89476,
-        (UnitType.PSI, UnitType.MillimeterOfMercury): lambda x: x * 51.7149,
-        (UnitType.PSI, UnitType.InchOfMercury): lambda x: x * 2.03602,
-        (UnitType.PSI, UnitType.Bar): lambda x: x / 14.5038,
-        (UnitType.PSI, UnitType.Atmosphere): lambda x: x / 14.696,
-        # Distance
-        (UnitType.Millimeter, UnitType.Centimeter): lambda x: x / 10,
-        (UnitType.Millimeter, UnitType.Meter): lambda x: x / 1000,
-        (UnitType.Millimeter, UnitType.Kilometer): lambda x: x / 1000000,
-        (UnitType.Millimeter, UnitType.Inch): lambda x: x / 25.4,
-        (UnitType.Millimeter, UnitType.Foot): lambda x: x / 304.8,
-        (UnitType.Millimeter, UnitType.Yard): lambda x: x / 914.4,
-        (UnitType.Centimeter, UnitType.Millimeter): lambda x: x * 10,
-        (UnitType.Centimeter, UnitType.Meter): lambda x: x / 100,
-        (UnitType.Centimeter, UnitType.Kilometer): lambda x: x / 100000,
-        (UnitType.Centimeter, UnitType.Inch): lambda x: x / 2.54,
-        (UnitType.Centimeter, UnitType.Foot): lambda x: x / 30.48,
-        (UnitType.Centimeter, UnitType.Yard): lambda x: x / 91.44,
-        (UnitType.Meter, UnitType.Millimeter): lambda x: x * 1000,
-        (UnitType.Meter, UnitType.Centimeter): lambda x: x * 100,
-        (UnitType.Meter, UnitType.Kilometer): lambda x: x / 1000,
-        (UnitType.Meter, UnitType.Inch): lambda x: x * 39.3701,
-        (UnitType.Meter, UnitType.Foot): lambda x: x * 3.28084,
-        (UnitType.Meter, UnitType.Yard): lambda x: x * 1.09361,
-        (UnitType.Kilometer, UnitType.Millimeter): lambda x: x * 1000000,
-        (UnitType.Kilometer, UnitType.Centimeter): lambda x: x * 100000,
-        (UnitType.Kilometer, UnitType.Meter): lambda x: x * 1000,
-        (UnitType.Kilometer, UnitType.Inch): lambda x: x * 39370.1,
-        (UnitType.Kilometer, UnitType.Foot): lambda x: x * 3280.84,
-        (UnitType.Kilometer, UnitType.Yard): lambda x: x * 1093.61,
-        (UnitType.Inch, UnitType.Millimeter): lambda x: x * 25.4,
-        (UnitType.Inch, UnitType.Centimeter): lambda x: x * 2.54,
-        (UnitType.Inch, UnitType.Meter): lambda x: x / 39.3701,
-        (UnitType.Inch, UnitType.Kilometer): lambda x: x / 39370.1,
-        (UnitType.Inch, UnitType.Foot): lambda x: x / 12,
-        (UnitType.Inch, UnitType.Yard): lambda x: x / 36,
-        (UnitType.Foot, UnitType.Millimeter): lambda x: x * 304.8,
-        (UnitType.Foot, UnitType.Centimeter): lambda x: x * 30.48,
-        (UnitType.Foot, UnitType.Meter): lambda x: x / 3.28084,
-        (UnitType.Foot, UnitType.Kilometer): lambda x: x / 3280.84,
-        (UnitType.Foot, UnitType.Inch): lambda x: x * 12,
-        (UnitType.Foot, UnitType.Yard): lambda x: x / 3,
-        (UnitType.Yard, UnitType.Millimeter): lambda x: x * 914.4,
-        (UnitType.Yard, UnitType.Centimeter): lambda x: x * 91.44,
-        (UnitType.Yard, UnitType.Meter): lambda x: x / 1.09361,
-        (UnitType.Yard, UnitType.Kilometer): lambda x: x / 1093.61,
-        (UnitType.Yard, UnitType.Inch): lambda x: x * 36,
-        (UnitType.Yard, UnitType.Foot): lambda x: x * 3,
-        # Time
-        (UnitType.Microsecond, UnitType.Millisecond): lambda x: x / 1000,
-        (UnitType.Microsecond, UnitType.Second): lambda x: x / 1000000,
-        (UnitType.Microsecond, UnitType.Minute): lambda x: x / 60000000,
-        (UnitType.Microsecond, UnitType.Hour): lambda x: x / 3600000000,
-        (UnitType.Microsecond, UnitType.Day): lambda x: x / 86400000000,
-        (UnitType.Millisecond, UnitType.Microsecond): lambda x: x * 1000,
-        (UnitType.Millisecond, UnitType.Second): lambda x: x / 1000,
-        (UnitType.Millisecond, UnitType.Minute): lambda x: x / 60000,
-        (UnitType.Millisecond, UnitType.Hour): lambda x: x / 3600000,
-        (UnitType.Millisecond, UnitType.Day): lambda x: x / 86400000,
-        (UnitType.Second, UnitType.Microsecond): lambda x: x * 1000000,
-        (UnitType.Second, UnitType.Millisecond): lambda x: x * 1000,
-        (UnitType.Second, UnitType.Minute): lambda x: x / 60,
-        (UnitType.Second, UnitType.Hour): lambda x: x / 3600,
-        (UnitType.Second, UnitType.Day): lambda x: x / 86400,
-        (UnitType.Minute, UnitType.Microsecond): lambda x: x * 60000000,
-        (UnitType.Minute, UnitType.Millisecond): lambda x: x * 60000,
-        (UnitType.Minute, UnitType.Second): lambda x: x * 60,
-        (UnitType.Minute, UnitType.Hour): lambda x: x / 60,
-        (UnitType.Minute, UnitType.Day): lambda x: x / 1440,
-        (UnitType.Hour, UnitType.Microsecond): lambda x: x * 3600000000,
-        (UnitType.Hour, UnitType.Millisecond): lambda x: x * 3600000,
-        (UnitType.Hour, UnitType.Second): lambda x: x * 3600,
-        (UnitType.Hour, UnitType.Minute): lambda x: x * 60,
-        (UnitType.Hour, UnitType.Day): lambda x: x / 24,
-        (UnitType.Day, UnitType.Microsecond): lambda x: x * 86400000000,
-        (UnitType.Day, UnitType.Millisecond): lambda x: x * 86400000,
-        (UnitType.Day, UnitType.Second): lambda x: x * 86400,
-        (UnitType.Day, UnitType.Minute): lambda x: x * 1440,
-        (UnitType.Day, UnitType.Hour): lambda x: x * 24,
-    }
-    
-    if (fromType, toType) in converter:
-        return converter[(fromType, toType)](value)
-    else:
-        raise ValueError(f"Conversion from {fromType} to {toType} is not supported.")
\ No newline at end of file
+    return conversionTable.convert(value, fromType, toType)
+
+def convert_array(values, fromType: UnitType, toType: UnitType) -> np.ndarray:
+    return conversionTable.convert_array(values, fromType, toType)
\ No newline at end of file
@@ -1,5 +1,8 @@
 from enum import Enum
+from abc import ABC, abstractmethod
+import atexit
 import os
+import threading
 import time
 from collections.abc import Iterable
 
@@ -65,30 +68,181 @@ class SensorIO:
 
     @staticmethod
     def exportToCSV(sensorName: str, measurementNames: list, measurementData: list, units: list, path: str = None) -> None:
-        print_util = SensorIO()
-        
         if len(measurementNames) != len(measurementData) or len(measurementNames) != len(units):
-            print_util.printError("ERROR: Argument length mismatch - Measurement names, data, and units must have the same length.")
+            SensorIO.printError("ERROR: Argument length mismatch - Measurement names, data, and units must have the same length.")
             return
-        if path is None:
-            path = os.path.join(os.getcwd(), sensorName, "data")
-        if not os.path.exists(path):
-            os.makedirs(path)
-            print_util.printMessage(f"Directory created successfully: {path}", Colour.DARK_GREY)
-        
-        day = time.strftime("%Y_%m_%d")
-        dateTime = time.strftime("%H:%M:%S")
-        file_path = os.path.join(path, f"{sensorName}_{day}.csv")
-        if not os.path.isfile(file_path):
-            with open(file_path, 'w') as file:
-                header = "timestamp," + ",".join([f"{name}[{unit}]" for name, unit in zip(measurementNames, units)]) + "\n"
-                file.write(header)
-            print_util.printMessage(f"New file created: {file_path}", Colour.DARK_GREY)       
-        with open(file_path, 'a') as file:
-            # Ensure data is iterable
-            if not isinstance(measurementData, Iterable):
-                measurementData = [measurementData]  # Wrap it in a list if it's not iterable
-            # Flatten the data into a single line
-            line = f"{dateTime}," + ",".join([f"{float(value):.2f}" for value in measurementData]) + "\n"
-            file.write(line)
-            print_util.printMessage(f"Data successfully appended to {file_path}.", Colour.DARK_GREY)
+        CSVWriter.forSensor(sensorName, path).writeRow(measurementNames, measurementData, units)
+
+class SensorSink(ABC):
+    """Destination for exported rows. One sink may serve any number of sensors."""
+    @abstractmethod
+    def write(self, sensorName: str, measurementNames: list, measurementData: list, units: list, timestamp: float = None) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class CSVSink(SensorSink):
+    """Daily CSV files per sensor through the shared CSVWriter of each sensor."""
+    def __init__(self, path: str = None):
+        self.path = path
+
+    def write(self, sensorName: str, measurementNames: list, measurementData: list, units: list, timestamp: float = None) -> None:
+        CSVWriter.forSensor(sensorName, self.path).writeRow(measurementNames, measurementData, units, timestamp)
+
+    def flush(self) -> None:
+        for (sensorName, path), writer in list(CSVWriter._writers.items()):
+            if path == self.path:
+                writer.flush()
+
+class FsyncPolicy(Enum):
+    Never = ("Never", 0)
+    OnFlush = ("On Flush", 1)
+    OnClose = ("On Close", 2)
+
+    def getName(self) -> str:
+        return self.value[0]
+
+class CSVWriter:
+    """Keeps one sensor's daily CSV open and buffers rows, flushing every flushRows rows or flushInterval seconds.
+    When the columns change during a day, writing continues in a new segment <sensor>_YYYY_MM_DD_<n>.csv.
+    Shared writers are also flushed by a background thread, so a sensor that stops writing loses no rows."""
+    _writers = {}
+    _lock = threading.Lock()
+    _flusher = None
+    flushCheckInterval = 1.0
+
+    def __init__(self, sensorName: str, path: str = None, flushRows: int = 32, flushInterval: float = 60.0,
+                 fsyncPolicy: FsyncPolicy = FsyncPolicy.OnClose):
+        self.sensorName = sensorName
+        self.path = path if path is not None else os.path.join(os.getcwd(), sensorName, "data")
+        self.flushRows = flushRows
+        self.flushInterval = flushInterval
+        self.fsyncPolicy = fsyncPolicy
+        self.file = None
+        self.day = None
+        self.header = None
+        self.rows = []
+        self.lastFlush = time.monotonic()
+        self.rowsWritten = 0
+        self.lock = threading.RLock()
+
+    @classmethod
+    def forSensor(cls, sensorName: str, path: str = None, **options) -> "CSVWriter":
+        """Shared writer for a sensor/path pair, created on first use and closed at interpreter exit.
+        Options given for an existing writer must match its settings."""
+        key = (sensorName, path)
+        with cls._lock:
+            writer = cls._writers.get(key)
+            if writer is None:
+                writer = cls(sensorName, path, **options)
+                cls._writers[key] = writer
+                if cls._flusher is None:
+                    cls._flusher = threading.Thread(target=cls._flushLoop, name="csv-flush", daemon=True)
+                    cls._flusher.start()
+            else:
+                differing = [name for name, value in options.items() if getattr(writer, name) != value]
+                if differing:
+                    raise ValueError(f"CSV writer of {sensorName} is already open with other {', '.join(differing)}")
+            return writer
+
+    @classmethod
+    def closeAll(cls) -> None:
+        with cls._lock:
+            writers = list(cls._writers.values())
+            cls._writers.clear()
+        for writer in writers:
+            writer.close()
+
+    @classmethod
+    def flushDue(cls) -> None:
+        """Flush the shared writers whose buffered rows have waited flushInterval seconds."""
+        with cls._lock:
+            writers = list(cls._writers.values())
+        for writer in writers:
+            with writer.lock:
+                if writer.rows and time.monotonic() - writer.lastFlush >= writer.flushInterval:
+                    try:
+                        writer.flush()
+                    except OSError as error:
+                        SensorIO.printError(f"Could not flush the CSV file of {writer.sensorName}: {error}")
+
+    @classmethod
+    def _flushLoop(cls) -> None:
+        while True:
+            time.sleep(cls.flushCheckInterval)
+            cls.flushDue()
+
+    def getFilePath(self, day: str = None, segment: int = 1) -> str:
+        day = day or time.strftime('%Y_%m_%d')
+        return os.path.join(self.path, f"{self.sensorName}_{day}.csv" if segment == 1 else f"{self.sensorName}_{day}_{segment}.csv")
+
+    def writeRow(self, measurementNames: list, measurementData: list, units: list, timestamp: float = None) -> None:
+        now = time.localtime(timestamp)
+        day = time.strftime("%Y_%m_%d", now)
+        header = "timestamp," + ",".join([f"{name}[{unit}]" for name, unit in zip(measurementNames, units)])
+        # Ensure data is iterable
+        if not isinstance(measurementData, Iterable):
+            measurementData = [measurementData]
+        row = f"{time.strftime('%H:%M:%S', now)}," + ",".join([f"{float(value):.2f}" for value in measurementData]) + "\n"
+        with self.lock:
+            if day != self.day or header != self.header:
+                # Midnight rollover or new columns: finish the old file before the first row of the new one
+                self._open(day, header)
+            self.rows.append(row)
+            self.rowsWritten += 1
+            if len(self.rows) >= self.flushRows or time.monotonic() - self.lastFlush >= self.flushInterval:
+                self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            if self.rows:
+                self.file.write("".join(self.rows))
+                self.rows = []
+            self.file.flush()
+            if self.fsyncPolicy == FsyncPolicy.OnFlush:
+                os.fsync(self.file.fileno())
+            self.lastFlush = time.monotonic()
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is None:
+                return
+            self.flush()
+            if self.fsyncPolicy == FsyncPolicy.OnClose:
+                os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+            self.day = None
+            self.header = None
+
+    def _open(self, day: str, header: str) -> None:
+        self.close()
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            SensorIO.printMessage(f"Directory created successfully: {self.path}", Colour.DARK_GREY)
+        # Append to the day's segment with the same header, or start the next segment
+        segment = 1
+        file_path = self.getFilePath(day, segment)
+        while os.path.isfile(file_path) and readHeader(file_path) != header:
+            segment += 1
+            file_path = self.getFilePath(day, segment)
+        isNew = not os.path.isfile(file_path)
+        self.file = open(file_path, 'a')
+        self.day = day
+        self.header = header
+        if isNew:
+            self.file.write(header + "\n")
+            self.file.flush()
+            SensorIO.printMessage(f"New file created: {file_path}", Colour.DARK_GREY)
+
+def readHeader(filePath: str) -> str:
+    with open(filePath) as file:
+        return file.readline().rstrip("\n")
+
+atexit.register(CSVWriter.closeAll)
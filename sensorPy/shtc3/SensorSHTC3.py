@@ -1,17 +1,27 @@
 from sensor import Sensor
+from sensor_i2c import i2cBuses
 from sensor_measurements import Temperature, RelativeHumidity
-import adafruit_shtc3
-import board
 
 class SHTC3(Sensor):
-    def __init__(self, pin = board.I2C()):
+    def __init__(self, pin = None):
         super().__init__() 
-        self.device = adafruit_shtc3.SHTC3(pin)
+        self.pin = pin
+        self.address = 0x70
+        self.bus = None
         self.name = "SHTC3"
+        self.minSamplingPeriod = 0.02
         self.temperature = Temperature()
         self.relativeHumidity = RelativeHumidity()
         self.measurements = [self.temperature, self.relativeHumidity]
 
+    def _createDevice(self):
+        import adafruit_shtc3
+        self.bus = i2cBuses.getBus(self.pin)
+        with self.bus.transaction(self.address) as i2c:
+            return adafruit_shtc3.SHTC3(i2c)
+
     def _measure(self) -> list:
-        return list(self.device.measurements)
+        device = self.device
+        with self.bus.transaction(self.address):
+            return list(device.measurements)
         
\ No newline at end of file